@@ -0,0 +1,181 @@
+"""
+Per-backend health tracking with a circuit breaker.
+
+Every hook process records whether its backend call worked. After a run of
+consecutive failures the circuit opens and later reviews fail fast instead
+of waiting out a 30-60 s timeout. Once the cooldown has passed, one process
+moves the circuit to half-open and probes the backend with a cheap GET (the
+same check tests/testme.py uses); the circuit closes again on success.
+State lives in the shared state directory so all hook processes agree.
+"""
+
+import json
+import os
+import sys
+import time
+import urllib.parse
+
+import hook_http
+import hook_metrics
+import hook_state
+import host_limiter
+import latency_stats
+
+# Configuration
+BREAKER_ENABLED = os.getenv("CODE_HOOK_BREAKER", "1") != "0"
+FAILURE_THRESHOLD = int(os.getenv("CODE_HOOK_BREAKER_FAILURES", "3"))
+COOLDOWN = float(os.getenv("CODE_HOOK_BREAKER_COOLDOWN", "30"))  # seconds the circuit stays open
+PROBE_TIMEOUT = float(os.getenv("CODE_HOOK_PROBE_TIMEOUT", "2"))
+# A timeout counts against the backend once the request had this share of the hook's whole budget
+FAIR_SHARE = 0.5
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+def _health_path(service):
+    return os.path.join(hook_state.STATE_DIR, "health", f"{service}.json")
+
+def get_state(service):
+    """Return the stored health record for `service`."""
+    return hook_state.read_json(_health_path(service), {"state": CLOSED, "failures": 0})
+
+def probe(url, timeout=None):
+    """GET a cheap endpoint such as /v1/models or /api/tags; return the HttpResponse or None."""
+    try:
+        response = hook_http.get(url, timeout=PROBE_TIMEOUT if timeout is None else timeout)
+    except Exception:
+        return None
+    return response if response.ok else None
+
+def allow(service, probe_url):
+    """Return True if a request to `service` may go ahead.
+
+    Fails fast while the circuit is open. After the cooldown, exactly one
+    caller probes `probe_url`; everyone else keeps failing fast until the
+    probe has settled the matter.
+    """
+    if not BREAKER_ENABLED:
+        return True
+
+    record = get_state(service)
+    if record["state"] == CLOSED:
+        return True
+
+    now = time.time()
+    if record["state"] == OPEN and now - record.get("opened_at", 0) < COOLDOWN:
+        return False
+    if record["state"] == HALF_OPEN and now - record.get("probe_started", 0) < PROBE_TIMEOUT * 2:
+        return False  # Someone else is probing right now
+
+    # Claim the probe so concurrent hooks don't all hit a struggling backend
+    path = _health_path(service)
+    with hook_state.locked(path):
+        record = get_state(service)
+        if record["state"] == CLOSED:
+            return True
+        if record["state"] == OPEN and now - record.get("opened_at", 0) < COOLDOWN:
+            return False
+        if record["state"] == HALF_OPEN and now - record.get("probe_started", 0) < PROBE_TIMEOUT * 2:
+            return False
+        record.update(state=HALF_OPEN, probe_started=now)
+        hook_state.write_json(path, record)
+
+    if probe(probe_url) is not None:
+        return True  # The real request decides whether the circuit closes
+
+    print(f"{service} health probe failed; circuit stays open", file=sys.stderr)
+    record_failure(service)
+    return False
+
+def record_success(service):
+    """Close the circuit for `service` if it wasn't already healthy."""
+    if not BREAKER_ENABLED:
+        return
+    record = get_state(service)
+    if record["state"] == CLOSED and not record.get("failures"):
+        return  # Common case: nothing to write
+
+    path = _health_path(service)
+    with hook_state.locked(path):
+        hook_state.write_json(path, {"state": CLOSED, "failures": 0})
+
+def record_failure(service):
+    """Count a failure for `service`, opening the circuit once the threshold is reached."""
+    if not BREAKER_ENABLED:
+        return
+    path = _health_path(service)
+    with hook_state.locked(path):
+        record = get_state(service)
+        failures = record.get("failures", 0) + 1
+        if record["state"] == HALF_OPEN or failures >= FAILURE_THRESHOLD:
+            if record["state"] != OPEN:
+                print(f"{service} marked unhealthy after {failures} failures; failing fast for {COOLDOWN:.0f}s",
+                      file=sys.stderr)
+            record = {"state": OPEN, "failures": failures, "opened_at": time.time()}
+        else:
+            record = {"state": record["state"], "failures": failures}
+        hook_state.write_json(path, record)
+
+def record_result(service, ok):
+    """Record the outcome of one request to `service`."""
+    if ok:
+        record_success(service)
+    else:
+        record_failure(service)
+
+def post(service, model, url, payload, prompt_tokens, default_timeout, headers=None, consume=None):
+    """POST to a backend with an adaptive timeout, recording its latency and health.
+
+    With `consume`, the reply is streamed and `consume(StreamResponse)`
+    decides how much of it to read; its return value is returned instead.
+    Raises like hook_http.post_json(); a TimeoutError is also raised up front
+    when the hook's deadline leaves no time for the request at all.
+    """
+    timeout = latency_stats.timeout_for(service, model, prompt_tokens, default_timeout)
+    if timeout <= 0:
+        raise TimeoutError("no time left before the hook deadline")
+
+    if hook_metrics.current() is not None:
+        hook_metrics.annotate(service=service, model=model, payload_bytes=len(json.dumps(payload)))
+
+    # A shared local server gets only so many requests at once; queueing or shedding says nothing about its health
+    with host_limiter.slot(service, urllib.parse.urlsplit(url).netloc, timeout):
+        # Time spent queued comes out of the hook's deadline
+        timeout = latency_stats.timeout_for(service, model, prompt_tokens, default_timeout)
+        if timeout <= 0:
+            raise TimeoutError("no time left before the hook deadline")
+        # Only a request left with a sliver of the deadline (after queueing, hedging or chunks before it)
+        # isn't the backend's fault. One that hangs for most of the hook's budget is.
+        left = latency_stats.remaining()
+        budget = latency_stats.HOOK_TIMEOUT - latency_stats.DEADLINE_MARGIN
+        cut_short = left is not None and left <= timeout and timeout < FAIR_SHARE * budget
+        return _send(service, model, url, payload, prompt_tokens, timeout, cut_short, headers, consume)
+
+def _send(service, model, url, payload, prompt_tokens, timeout, cut_short, headers, consume):
+    started = time.monotonic()
+    try:
+        with hook_metrics.span("network"):
+            if consume is None:
+                result = hook_http.post_json(url, payload, headers=headers, timeout=timeout)
+                status = result.status
+            else:
+                with hook_http.post_json_stream(url, payload, headers=headers, timeout=timeout) as response:
+                    status = response.status
+                    result = consume(response)
+    except hook_http.Cancelled:
+        raise
+    except TimeoutError:
+        if not cut_short:
+            # A timed-out request still tells us the backend needs at least this long
+            latency_stats.record(service, model, prompt_tokens, time.monotonic() - started)
+            record_failure(service)
+        raise
+    except Exception:
+        record_failure(service)
+        raise
+
+    latency_stats.record(service, model, prompt_tokens, time.monotonic() - started)
+    record_result(service, status < 500)
+    hook_metrics.annotate(status=status)
+    return result
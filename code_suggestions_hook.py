@@ -6,11 +6,41 @@ This hook runs after code-writing tools (Write, Edit, MultiEdit) and uses
 a local LLM instance (Ollama or LM Studio) to provide code suggestions and improvements.
 """
 
-import json
 import sys
-import subprocess
 import os
-from pathlib import Path
+
+import fast_reject
+
+if __name__ == "__main__":
+    # Most events are for tools or files we never review: say so from the raw
+    # input before paying ~100 ms for the imports below
+    STDIN_TEXT = sys.stdin.read()
+    if fast_reject.not_interested(STDIN_TEXT):
+        sys.exit(0)
+
+import functools
+import json
+
+import backend_health
+import findings
+import findings_ledger
+import hook_debug
+import hook_http
+import hook_metrics
+import latency_stats
+import model_warmup
+import ollama_context
+import prompt_budget
+import review_cache
+import review_chunks
+import review_hedge
+import review_queue
+import review_scope
+import review_similarity
+import review_stream
+import semantic_fingerprint
+import static_checks
+import symbol_index
 
 # Configuration
 USE_SERVICE = os.getenv("CODE_HOOK_SERVICE", "openrouter")  # Options: "openrouter", "lm_studio", "ollama"
@@ -18,45 +48,94 @@ USE_SERVICE = os.getenv("CODE_HOOK_SERVICE", "openrouter")  # Options: "openrout
 # OpenRouter Configuration
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")  # Required for OpenRouter
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "x-ai/grok-code-fast-1")  # Grok Code Fast 1
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_HOST = os.getenv("OPENROUTER_HOST", "https://openrouter.ai")  # Override to point at a mock server
+OPENROUTER_URL = f"{OPENROUTER_HOST}/api/v1/chat/completions"
+OPENROUTER_MAX_TOKENS = 2048
 
 # LM Studio Configuration
 LM_STUDIO_MODEL = os.getenv("LM_STUDIO_MODEL", "nousresearch/hermes-4-70b")
 LM_STUDIO_HOST = os.getenv("LM_STUDIO_HOST", "http://localhost:1234")
+LM_STUDIO_MAX_TOKENS = 500
 
 # Ollama Configuration
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "codellama:7b")
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MAX_TOKENS = 500
+
+# Bump whenever a prompt template changes so cached reviews of the old prompt are ignored
+PROMPT_VERSION = "2"
+
+# Prompt templates; prompt_budget.build_prompt() fills in {file_name} and {code}.
+# The fixed instructions come first and the code last, so consecutive reviews
+# share as long a prefix as possible and the backends' prompt caches can hit.
+SUGGESTIONS_PROMPT = """Analyze the code below and provide suggestions for improvements.
+
+Please provide specific, actionable suggestions for:
+1. Code quality improvements
+2. Best practices
+3. Potential bugs or issues
+4. Performance optimizations
+5. Security considerations
+
+Keep suggestions concise and focused on the most important issues.
+
+File: {file_name}
+```code
+{code}
+```"""
+
+CRITICAL_ISSUES_PROMPT = """Review the code below and provide ONLY the most critical issues.
+
+List only severe issues (max 3):
+- Security vulnerabilities
+- Critical bugs that will cause crashes
+- Major performance problems
+
+Be extremely concise. One line per issue.
+
+File: {file_name}
+```
+{code}
+```"""
+
+# Sent instead of SUGGESTIONS_PROMPT when Ollama continues from its stored context
+FOLLOWUP_PROMPT = """The code below is an edited part of {file_name}, which you reviewed above.
+Review it the same way, concisely, without repeating suggestions that still apply.
+
+```code
+{code}
+```"""
+
+CRITICAL_ISSUES_MAX = 3  # Streaming stops reading once this many issues are in
+
+CRITICAL_ISSUES_SYSTEM = "You are a code reviewer. Be extremely concise and only report critical issues."
+
+# File types worth reviewing; shared with the fast path so the two never disagree
+CODE_EXTENSIONS = fast_reject.CODE_EXTENSIONS
+CODE_FILENAMES = fast_reject.CODE_FILENAMES
 
 def is_code_file(file_path):
     """Check if the file contains code that should be analyzed."""
-    code_extensions = {
-        '.py', '.js', '.ts', '.java', '.cpp', '.c', '.cs', '.php', '.rb',
-        '.go', '.rs', '.swift', '.kt', '.scala', '.clj', '.hs', '.ml',
-        '.sh', '.bash', '.zsh', '.fish', '.ps1', '.sql', '.html', '.css',
-        '.scss', '.sass', '.less', '.vue', '.svelte', '.jsx', '.tsx'
-    }
+    return fast_reject.is_code_path(file_path)
 
-    if not file_path:
-        return False
-
-    path = Path(file_path)
-    return path.suffix.lower() in code_extensions or path.name in {
-        'Dockerfile', 'Makefile', 'CMakeLists.txt', 'package.json',
-        'requirements.txt', 'Cargo.toml', 'go.mod', 'composer.json'
-    }
+def get_code_content(tool_name, tool_input, tool_response, file_content=None):
+    """Extract the code content from the tool input/response.
 
-def get_code_content(tool_name, tool_input, tool_response):
-    """Extract the code content from the tool input/response."""
+    `file_content` is the edited file as sent by review_client.py to a team
+    daemon on another machine, where the file itself doesn't exist.
+    """
     content = ""
 
     # For Write tool
     if tool_name == "Write":
         content = tool_input.get("content", "")
 
+    elif tool_name in ["Edit", "MultiEdit"] and file_content is not None:
+        content = file_content
+
     # For Edit/MultiEdit tools, we need to read the file to see what changed
     elif tool_name in ["Edit", "MultiEdit"]:
-        file_path = tool_input.get("filePath", "")
+        file_path = tool_input.get("file_path", "") or tool_input.get("filePath", "")
         if file_path and os.path.exists(file_path):
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
@@ -65,81 +144,88 @@ def get_code_content(tool_name, tool_input, tool_response):
                 print(f"Error reading file {file_path}: {e}", file=sys.stderr)
                 return ""
 
-    return content.strip()
+    return content
+
+def get_ollama_suggestions(code_content, file_path, changed=None, conversation=None, notes=""):
+    """Get code suggestions from Ollama.
 
-def get_ollama_suggestions(code_content, file_path):
-    """Get code suggestions from Ollama."""
+    `conversation` (from ollama_context.conversation()) lets a follow-up
+    review continue from the context of the previous one.
+    """
     if not code_content:
         return None
 
-    # Create a prompt for code suggestions
+    # Create a prompt for code suggestions, as a follow-up if Ollama still has the file
     file_name = os.path.basename(file_path) if file_path else "code"
-    prompt = f"""Analyze this code and provide suggestions for improvements:
-
-File: {file_name}
-```code
-{code_content}
-```
-
-Please provide specific, actionable suggestions for:
-1. Code quality improvements
-2. Best practices
-3. Potential bugs or issues
-4. Performance optimizations
-5. Security considerations
-
-Keep suggestions concise and focused on the most important issues."""
+    with hook_metrics.span("prompt"):
+        context = ollama_context.load(conversation, OLLAMA_MODEL)
+        if context is not None:
+            prompt = prompt_budget.build_prompt(FOLLOWUP_PROMPT, code_content, file_name,
+                                                OLLAMA_MODEL, OLLAMA_MAX_TOKENS, changed, appendix=notes)
+            if not ollama_context.fits(context, prompt_budget.estimate_tokens(prompt), OLLAMA_MODEL,
+                                       OLLAMA_MAX_TOKENS):
+                ollama_context.forget(conversation)
+                context = None
+        if context is None:
+            prompt = prompt_budget.build_prompt(SUGGESTIONS_PROMPT, code_content, file_name,
+                                                OLLAMA_MODEL, OLLAMA_MAX_TOKENS, changed, appendix=notes)
+    hook_metrics.annotate(ollama_context=len(context) if context else None)
+
+    payload = {
+        "model": OLLAMA_MODEL,
+        "prompt": prompt,
+        "stream": review_stream.STREAM,
+        "options": {
+            "temperature": 0.3,
+            "num_predict": OLLAMA_MAX_TOKENS,
+            **model_warmup.runner_options("ollama", OLLAMA_MODEL)
+        },
+        **model_warmup.keep_alive_options("ollama")
+    }
+    if context:
+        payload["context"] = context
 
     try:
         # Call Ollama API
-        result = subprocess.run([
-            'curl', '-s', f'{OLLAMA_HOST}/api/generate',
-            '-H', 'Content-Type: application/json',
-            '-d', json.dumps({
-                "model": OLLAMA_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "num_predict": 500
-                }
-            })
-        ], capture_output=True, text=True, timeout=30)
-
-        if result.returncode == 0:
-            response = json.loads(result.stdout)
+        final = {}  # The streamed reply's last event, which carries the new context
+        result = backend_health.post("ollama", OLLAMA_MODEL, f'{OLLAMA_HOST}/api/generate', payload,
+                                     prompt_budget.estimate_tokens(prompt), 30,
+                                     consume=review_stream.reader(review_stream.NDJSON, on_done=final.update)
+                                     if review_stream.STREAM else None)
+
+        if result.ok and review_stream.STREAM:
+            ollama_context.save(conversation, OLLAMA_MODEL, final.get("context"))
+            return result.text.strip()
+        elif result.ok:
+            with hook_metrics.span("parse_response"):
+                response = result.json()
+            hook_metrics.record_usage(response)
+            ollama_context.save(conversation, OLLAMA_MODEL, response.get("context"))
             return response.get('response', '').strip()
         else:
-            print(f"Ollama API error: {result.stderr}", file=sys.stderr)
+            print(f"Ollama API error: HTTP {result.status}: {result.text}", file=sys.stderr)
             return None
 
-    except subprocess.TimeoutExpired:
+    except TimeoutError:
         print("Ollama request timed out", file=sys.stderr)
         return None
+    except hook_http.Cancelled:
+        return None  # Superseded; nobody is waiting for this answer
     except Exception as e:
         print(f"Error calling Ollama: {e}", file=sys.stderr)
         return None
 
-def get_openrouter_suggestions(code_content, file_path):
+def get_openrouter_suggestions(code_content, file_path, changed=None, notes=""):
     """Get code suggestions from OpenRouter API."""
     if not code_content:
         return None
 
     # Create a focused prompt for code review
     file_name = os.path.basename(file_path) if file_path else "code"
-    prompt = f"""Review this code and provide ONLY the most critical issues:
-
-File: {file_name}
-```
-{code_content}
-```
-
-List only severe issues (max 3):
-- Security vulnerabilities
-- Critical bugs that will cause crashes
-- Major performance problems
-
-Be extremely concise. One line per issue."""
+    with hook_metrics.span("prompt"):
+        prompt = prompt_budget.build_prompt(CRITICAL_ISSUES_PROMPT, code_content, file_name,
+                                            OPENROUTER_MODEL, OPENROUTER_MAX_TOKENS, changed,
+                                            extra=CRITICAL_ISSUES_SYSTEM, appendix=notes)
 
     try:
         # Call OpenRouter API
@@ -147,64 +233,56 @@ Be extremely concise. One line per issue."""
             "model": OPENROUTER_MODEL,
             "messages": [{
                 "role": "system",
-                "content": "You are a code reviewer. Be extremely concise and only report critical issues."
+                "content": CRITICAL_ISSUES_SYSTEM
             }, {
                 "role": "user",
                 "content": prompt
             }],
             "temperature": 0.2,
-            "max_tokens": 2048
+            "max_tokens": OPENROUTER_MAX_TOKENS,
+            "stream": review_stream.STREAM
         }
 
-        result = subprocess.run([
-            'curl', '-s', OPENROUTER_URL,
-            '-H', f'Authorization: Bearer {OPENROUTER_API_KEY}',
-            '-H', 'Content-Type: application/json',
-            '-H', 'HTTP-Referer: https://8b.is?source=HookedOnCode',
-            '-H', 'X-Title: Code Suggestions Hook',
-            '-d', json.dumps(payload)
-        ], capture_output=True, text=True, timeout=10)
-
-        if result.returncode == 0:
-            response = json.loads(result.stdout)
-            if 'choices' in response and len(response['choices']) > 0:
-                return response['choices'][0]['message']['content'].strip()
-            elif 'error' in response:
-                print(f"OpenRouter API error: {response['error']}", file=sys.stderr)
-                return None
+        result = backend_health.post("openrouter", OPENROUTER_MODEL, OPENROUTER_URL, payload,
+                                     prompt_budget.estimate_tokens(prompt), 10, headers={
+            'Authorization': f'Bearer {OPENROUTER_API_KEY}',
+            'HTTP-Referer': 'https://8b.is?source=HookedOnCode',
+            'X-Title': 'Code Suggestions Hook'
+        }, consume=review_stream.reader(review_stream.SSE, CRITICAL_ISSUES_MAX) if review_stream.STREAM else None)
+
+        if result.ok and review_stream.STREAM:
+            return result.text.strip()
+        with hook_metrics.span("parse_response"):
+            response = result.json()
+        hook_metrics.record_usage(response)
+        if result.ok and 'choices' in response and len(response['choices']) > 0:
+            return response['choices'][0]['message']['content'].strip()
+        elif 'error' in response:
+            print(f"OpenRouter API error: HTTP {result.status}: {response['error']}", file=sys.stderr)
+            return None
         else:
-            print(f"OpenRouter API error: {result.stderr}", file=sys.stderr)
+            print(f"OpenRouter API error: HTTP {result.status}: {result.text}", file=sys.stderr)
             return None
 
-    except subprocess.TimeoutExpired:
+    except TimeoutError:
         print("OpenRouter request timed out", file=sys.stderr)
         return None
+    except hook_http.Cancelled:
+        return None  # Superseded; nobody is waiting for this answer
     except Exception as e:
         print(f"Error calling OpenRouter: {e}", file=sys.stderr)
         return None
 
-def get_lm_studio_suggestions(code_content, file_path):
+def get_lm_studio_suggestions(code_content, file_path, changed=None, notes=""):
     """Get code suggestions from LM Studio."""
     if not code_content:
         return None
 
     # Create a prompt for code suggestions
     file_name = os.path.basename(file_path) if file_path else "code"
-    prompt = f"""Analyze this code and provide suggestions for improvements:
-
-File: {file_name}
-```code
-{code_content}
-```
-
-Please provide specific, actionable suggestions for:
-1. Code quality improvements
-2. Best practices
-3. Potential bugs or issues
-4. Performance optimizations
-5. Security considerations
-
-Keep suggestions concise and focused on the most important issues."""
+    with hook_metrics.span("prompt"):
+        prompt = prompt_budget.build_prompt(SUGGESTIONS_PROMPT, code_content, file_name,
+                                            LM_STUDIO_MODEL, LM_STUDIO_MAX_TOKENS, changed, appendix=notes)
 
     try:
         # Call LM Studio API (OpenAI-compatible)
@@ -212,89 +290,329 @@ Keep suggestions concise and focused on the most important issues."""
             "model": LM_STUDIO_MODEL,
             "messages": [{"role": "user", "content": prompt}],
             "temperature": 0.3,
-            "max_tokens": 500,
-            "stream": False
+            "max_tokens": LM_STUDIO_MAX_TOKENS,
+            "stream": review_stream.STREAM,
+            **model_warmup.keep_alive_options("lm_studio")
         }
 
-        result = subprocess.run([
-            'curl', '-s', f'{LM_STUDIO_HOST}/v1/chat/completions',
-            '-H', 'Content-Type: application/json',
-            '-d', json.dumps(payload)
-        ], capture_output=True, text=True, timeout=60)  # LM Studio might be slower
-
-        if result.returncode == 0:
-            response = json.loads(result.stdout)
+        result = backend_health.post("lm_studio", LM_STUDIO_MODEL, f'{LM_STUDIO_HOST}/v1/chat/completions',
+                                     payload, prompt_budget.estimate_tokens(prompt),
+                                     60,  # LM Studio might be slower
+                                     consume=review_stream.reader(review_stream.SSE) if review_stream.STREAM else None)
+
+        if result.ok and review_stream.STREAM:
+            return result.text.strip()
+        elif result.ok:
+            with hook_metrics.span("parse_response"):
+                response = result.json()
+            hook_metrics.record_usage(response)
             if 'choices' in response and len(response['choices']) > 0:
                 return response['choices'][0]['message']['content'].strip()
             else:
-                print(f"Unexpected LM Studio response format: {result.stdout}", file=sys.stderr)
+                print(f"Unexpected LM Studio response format: {result.text}", file=sys.stderr)
                 return None
         else:
-            print(f"LM Studio API error: {result.stderr}", file=sys.stderr)
+            print(f"LM Studio API error: HTTP {result.status}: {result.text}", file=sys.stderr)
             return None
 
-    except subprocess.TimeoutExpired:
+    except TimeoutError:
         print("LM Studio request timed out", file=sys.stderr)
         return None
+    except hook_http.Cancelled:
+        return None  # Superseded; nobody is waiting for this answer
     except Exception as e:
         print(f"Error calling LM Studio: {e}", file=sys.stderr)
         return None
 
-def main():
-    try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON input: {e}", file=sys.stderr)
-        sys.exit(1)
+def current_model(service=USE_SERVICE):
+    """Return the model configured for `service`."""
+    return {
+        "openrouter": OPENROUTER_MODEL,
+        "lm_studio": LM_STUDIO_MODEL,
+        "ollama": OLLAMA_MODEL
+    }.get(service, "")
+
+def current_max_tokens(service=USE_SERVICE):
+    """Return the reply length requested from `service`."""
+    return {
+        "openrouter": OPENROUTER_MAX_TOKENS,
+        "lm_studio": LM_STUDIO_MAX_TOKENS,
+        "ollama": OLLAMA_MAX_TOKENS
+    }.get(service, 0)
+
+def backend_host(service):
+    """Return the base URL of `service`."""
+    return {
+        "openrouter": OPENROUTER_HOST,
+        "lm_studio": LM_STUDIO_HOST,
+        "ollama": OLLAMA_HOST
+    }.get(service, "")
+
+def health_url(service):
+    """Return a cheap endpoint that shows whether `service` is up."""
+    return {
+        "openrouter": f"{OPENROUTER_HOST}/api/v1/models",
+        "lm_studio": f"{LM_STUDIO_HOST}/v1/models",
+        "ollama": f"{OLLAMA_HOST}/api/tags"
+    }.get(service, "")
+
+def get_suggestions(service, code_content, file_path, changed=None, conversation=None, notes=""):
+    """Get suggestions from `service`. `changed` marks line ranges to keep if the code must be trimmed.
+
+    `conversation` identifies the (session, file) for backends that keep context between reviews.
+    `notes` is appended to the prompt, after the code.
+    """
+    if service in ("openrouter", "lm_studio", "ollama") and not backend_health.allow(service, health_url(service)):
+        print(f"{service} is marked unhealthy; skipping", file=sys.stderr)
+        return None
+    # A local model that is still loading would only run out the clock
+    if not model_warmup.ready(service, current_model(service), backend_host(service)):
+        hook_metrics.annotate(skipped="model_loading")
+        return None
+
+    if service == "openrouter":
+        return get_openrouter_suggestions(code_content, file_path, changed, notes)
+    elif service == "lm_studio":
+        suggestions = get_lm_studio_suggestions(code_content, file_path, changed, notes)
+    elif service == "ollama":
+        suggestions = get_ollama_suggestions(code_content, file_path, changed, conversation, notes)
+    else:
+        print(f"Unknown service: {service}", file=sys.stderr)
+        return None
 
+    if suggestions is not None:
+        model_warmup.touch(service, current_model(service))
+    return suggestions
+
+def review_services():
+    """Return the services a review may use: the hedge list, or just CODE_HOOK_SERVICE."""
+    return review_hedge.HEDGE_SERVICES or [USE_SERVICE]
+
+def ask_backends(code_content, file_path, changed=None, conversation=None, notes=""):
+    """Ask the configured service, or hedge across CODE_HOOK_HEDGE when it is set."""
+    if not review_hedge.HEDGE_SERVICES:
+        return get_suggestions(USE_SERVICE, code_content, file_path, changed, conversation, notes)
+
+    _winner, suggestions = review_hedge.first_result([
+        (service, functools.partial(get_suggestions, service, code_content, file_path, changed, conversation, notes))
+        for service in review_hedge.HEDGE_SERVICES
+    ])
+    return suggestions
+
+def review_code(code_content, file_path, scoped=False, changed=None, conversation=None, notes=""):
+    """Review `code_content`, fanning a large whole file out across chunks in parallel."""
+    # Never build chunks bigger than the smallest model involved can take in one prompt
+    budget = min(prompt_budget.code_budget(current_model(service), current_max_tokens(service), 300)
+                 for service in review_services())
+    max_chars = min(review_chunks.CHUNK_CHARS, budget * prompt_budget.CHARS_PER_TOKEN)
+    chunks = [code_content] if scoped else review_chunks.split_chunks(code_content, file_path, max_chars)
+    if len(chunks) == 1:
+        return ask_backends(code_content, file_path, changed, conversation, notes)
+
+    results = review_chunks.review_in_parallel(
+        chunks, lambda chunk: ask_backends(chunk, file_path, notes=notes))
+    return findings.merge_findings(r for r in results if r) or None
+
+def review_file(input_data):
+    """Review the file a code-writing tool touched and return the message text, or None."""
     tool_name = input_data.get("tool_name", "")
     tool_input = input_data.get("tool_input", {})
     tool_response = input_data.get("tool_response", {})
+    file_path = tool_input.get("file_path", "") or tool_input.get("filePath", "")
+
+    # Get the code content
+    with hook_metrics.span("read_file"):
+        file_content = get_code_content(tool_name, tool_input, tool_response, input_data.get("file_content"))
+
+    if not file_content.strip():
+        return None  # No content to analyze
+
+    # For edits, review only the changed regions when they can be located
+    code_content, scoped = review_scope.scope_content(tool_name, tool_input, file_content)
+    # A whole-file edit review still knows which lines matter most if it must be trimmed
+    changed = None if scoped else review_scope.find_regions(file_content, tool_name, tool_input)
+    code_content = code_content.rstrip()
+
+    # Findings this session has already seen for the file are listed in the prompt, not repeated
+    session_id = input_data.get("session_id")
+    reported = findings_ledger.reported(session_id, absolute_path(input_data))
+    # So are the signatures of what the code uses from other files
+    with hook_metrics.span("symbols"):
+        symbols = symbol_index.context(project_root(input_data), absolute_path(input_data), file_content,
+                                       code_content, scoped, input_data.get("remote_client"))
+
+    # Identical content was reviewed before: answer from the cache, filtered by the ledger below
+    services = review_services()
+    models = ",".join(current_model(s) for s in services)
+    variant = f"{','.join(services)}|{models}|{PROMPT_VERSION}"
+    key = review_cache.cache_key(code_content, os.path.basename(file_path), ",".join(services),
+                                 models, f"{PROMPT_VERSION}|{symbol_index.digest(symbols)}")
+    with hook_metrics.span("cache"):
+        suggestions = review_cache.get(key)
+        cache = "hit"
+        if suggestions is None:
+            # A near-identical version was reviewed before: reuse what still applies
+            suggestions = review_similarity.reuse(absolute_path(input_data), code_content, variant)
+            cache = "similar" if suggestions is not None else "miss"
+    hook_metrics.annotate(cache=cache)
+    hook_debug.log("review lookup", cache=cache, scoped=scoped, code_chars=len(code_content), services=services,
+                   symbol_chars=len(symbols))
+    if cache == "similar":
+        print(f"Reusing the review of a near-identical version of {os.path.basename(file_path)}", file=sys.stderr)
+    if suggestions is None:
+        # Ollama can continue an excerpt review from the context of this file's last review
+        conversation = ollama_context.conversation(session_id, absolute_path(input_data), scoped)
+        suggestions = review_code(code_content, file_path, scoped, changed, conversation,
+                                  symbols + findings_ledger.prompt_note(reported))
+        token = hook_http.current_token()
+        if token is not None and token.cancelled:
+            return None  # Superseded part-way; don't cache a partial review
+        review_cache.put(key, suggestions)
+        review_similarity.remember(absolute_path(input_data), code_content, suggestions, variant)
+
+    if suggestions is not None:
+        # This version has been reviewed; edits that don't change its meaning needn't be
+        semantic_fingerprint.remember(absolute_path(input_data),
+                                      semantic_fingerprint.fingerprint(file_content, file_path))
+
+    # Whatever the model repeated anyway is dropped; what is left now counts as reported
+    new_suggestions = findings_ledger.filter_new(suggestions, reported)
+    findings_ledger.record(session_id, absolute_path(input_data), new_suggestions)
+    hook_debug.log("review finished", suggestions_chars=len(suggestions) if suggestions is not None else None,
+                   new_chars=len(new_suggestions) if new_suggestions is not None else None)
+    suggestions = new_suggestions
+    if not suggestions:
+        return None
+    return f"Code suggestions for {os.path.basename(file_path)}:\n\n{suggestions}"
+
+def absolute_path(input_data):
+    """Return the edited file's absolute path, resolved against the session's cwd."""
+    tool_input = input_data.get("tool_input", {})
+    file_path = tool_input.get("file_path", "") or tool_input.get("filePath", "")
+    if not file_path:
+        return ""
+    return os.path.abspath(os.path.join(input_data.get("cwd") or "", file_path))
+
+def project_root(input_data):
+    """Return the directory the session works in, which the symbol index is kept for.
+
+    For a request a team daemon got from another machine ("remote_client"
+    set), this is a path on that machine, never read here.
+    """
+    return input_data.get("cwd") or os.path.dirname(absolute_path(input_data))
+
+def static_review(input_data, content):
+    """Run the local static checks on `content`; return (message or None, whether to skip the backend)."""
+    if not static_checks.STATIC_CHECKS:
+        return None, False
+
+    tool_name = input_data.get("tool_name", "")
+    tool_input = input_data.get("tool_input", {})
+    file_path = tool_input.get("file_path", "") or tool_input.get("filePath", "")
+    if not content.strip():
+        return None, False
+
+    # Like the backend review, only report on what the edit changed
+    regions = None
+    if review_scope.REVIEW_SCOPE == "diff":
+        regions = review_scope.find_regions(content, tool_name, tool_input)
+    found = static_checks.analyze(content, file_path, regions)
+    skip_backend = static_checks.skip_backend(content, found, regions)
+    # Static findings count as reported too, so a rewrite of the file doesn't repeat them
+    session_id = input_data.get("session_id")
+    reported = findings_ledger.reported(session_id, absolute_path(input_data))
+    new_findings = findings_ledger.filter_new(static_checks.format_findings(found), reported) if found else None
+    findings_ledger.record(session_id, absolute_path(input_data), new_findings)
+    if not new_findings:
+        return None, skip_backend
+    return f"Static checks for {os.path.basename(file_path)}:\n\n{new_findings}", skip_backend
+
+def review(input_data):
+    """Review one PostToolUse payload and return the hook output dict, or None."""
+    tool_name = input_data.get("tool_name", "")
+    tool_input = input_data.get("tool_input", {})
 
     # Only process code-writing tools
     code_tools = {"Write", "Edit", "MultiEdit"}
     if tool_name not in code_tools:
-        sys.exit(0)  # Exit silently for non-code tools
+        return None  # Nothing to say for non-code tools
 
     # Get file path (check both camelCase and snake_case)
-    file_path = ""
-    if tool_name == "Write":
-        file_path = tool_input.get("file_path", "") or tool_input.get("filePath", "")
-    elif tool_name in ["Edit", "MultiEdit"]:
-        file_path = tool_input.get("file_path", "") or tool_input.get("filePath", "")
+    file_path = tool_input.get("file_path", "") or tool_input.get("filePath", "")
+
+    messages = []
+    if review_queue.DEFERRED:
+        # Deliver reviews that finished since the last edit
+        messages.extend(review_queue.collect_results(input_data.get("session_id")))
+        hook_debug.log("deferred results delivered", count=len(messages))
+
+    if is_code_file(file_path):
+        with hook_metrics.span("read_file"):
+            content = get_code_content(tool_name, tool_input, input_data.get("tool_response", {}),
+                                       input_data.get("file_content"))
+
+        # Local checks take milliseconds, so their findings are always shown right away
+        with hook_metrics.span("static_checks"):
+            static_message, skip_backend = static_review(input_data, content)
+        if static_message:
+            messages.append(static_message)
+        # Every edit keeps the project's symbol index current, reviewed or not
+        with hook_metrics.span("symbols"):
+            symbol_index.update(project_root(input_data), absolute_path(input_data), content,
+                                input_data.get("remote_client"))
+        hook_debug.log("static checks", file_path=file_path, content_chars=len(content),
+                       findings=static_message.count("\n- ") if static_message else 0, skip_backend=skip_backend)
+
+        if skip_backend:
+            hook_metrics.annotate(skipped="static_policy")
+            print(f"Skipping backend review of {os.path.basename(file_path)} "
+                  f"(CODE_HOOK_STATIC_POLICY={static_checks.POLICY})", file=sys.stderr)
+        elif semantic_fingerprint.is_unchanged(absolute_path(input_data),
+                                               semantic_fingerprint.fingerprint(content, file_path)):
+            hook_metrics.annotate(skipped="unchanged")
+            print(f"Skipping backend review of {os.path.basename(file_path)}: "
+                  "only formatting, comments or import order changed", file=sys.stderr)
+        elif review_queue.DEFERRED:
+            review_queue.enqueue(input_data)
+            hook_debug.log("review deferred", session_id=input_data.get("session_id"))
+        else:
+            # Every request of this review shares the hook's own deadline
+            with hook_http.cancel_scope(latency_stats.deadline_token()):
+                message = review_file(input_data)
+            if message:
+                messages.append(message)
 
-    # Check if it's a code file
-    if not is_code_file(file_path):
-        sys.exit(0)  # Exit silently for non-code files
+    if not messages:
+        return None
 
-    # Get the code content
-    code_content = get_code_content(tool_name, tool_input, tool_response)
+    # Return suggestions as JSON for Claude to process
+    return {
+        "continue": True,  # Don't block, just add context
+        "systemMessage": "\n\n".join(messages)
+    }
 
-    if not code_content:
-        sys.exit(0)  # No content to analyze
-
-    # Get suggestions from the configured service
-    if USE_SERVICE == "openrouter":
-        suggestions = get_openrouter_suggestions(code_content, file_path)
-    elif USE_SERVICE == "lm_studio":
-        suggestions = get_lm_studio_suggestions(code_content, file_path)
-    elif USE_SERVICE == "ollama":
-        suggestions = get_ollama_suggestions(code_content, file_path)
-    else:
-        print(f"Unknown service: {USE_SERVICE}", file=sys.stderr)
-        suggestions = None
-
-    if suggestions:
-        # Return suggestions as JSON for Claude to process
-        output = {
-            "continue": True,  # Don't block, just add context
-            "systemMessage": f"Code suggestions for {os.path.basename(file_path)}:\n\n{suggestions}"
-        }
+def main(stdin_text=None):
+    """Hook entry point. `stdin_text` lets review_client.py hand over input it already read."""
+    with hook_metrics.trace("code_suggestions", startup=True), hook_debug.run("code_suggestions"):
+        try:
+            # Read input from stdin
+            with hook_metrics.span("parse_input"):
+                if stdin_text is None:
+                    input_data = json.load(sys.stdin)
+                else:
+                    input_data = json.loads(stdin_text)
+        except json.JSONDecodeError as e:
+            print(f"Error: Invalid JSON input: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        hook_debug.log("input", input=input_data)
+        output = review(input_data)
+        hook_debug.log("output", message_chars=len(output["systemMessage"]) if output else 0)
+    if output:
         print(json.dumps(output))
     else:
         # No suggestions or error occurred, continue normally
         sys.exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(STDIN_TEXT)
@@ -1,66 +1,42 @@
 #!/usr/bin/env python3
 """
 Debug version of the hook to see what's happening
+
+Logs what Claude Code sends through hook_debug, so file contents are hashed
+rather than dumped and the log rotates (~/.cache/hookedoncode/debug.log, or
+CODE_HOOK_DEBUG_FILE). The real hooks log the same way with CODE_HOOK_DEBUG=1.
 """
 import json
 import sys
-import os
-
-# Log to a file for debugging
-debug_file = "/tmp/hook_debug.log"
-
-def log(message):
-    with open(debug_file, 'a') as f:
-        f.write(f"{message}\n")
 
-try:
-    log("=== Hook started ===")
+import fast_reject
+import hook_debug
 
-    # Read input from stdin
-    input_data = json.load(sys.stdin)
-    log(f"Input received: {json.dumps(input_data, indent=2)}")
+with hook_debug.run("debug_hook", force=True):
+    try:
+        # Read input from stdin
+        input_data = json.load(sys.stdin)
+        hook_debug.log("input received", input=input_data)
 
-    tool_name = input_data.get("tool_name", "")
-    tool_input = input_data.get("tool_input", {})
+        tool_name = input_data.get("tool_name", "")
+        tool_input = input_data.get("tool_input", {})
 
-    log(f"Tool name: {tool_name}")
-    log(f"Tool input: {json.dumps(tool_input, indent=2)}")
-
-    # Check file path
-    if tool_name == "Write":
-        file_path = tool_input.get("filePath", "") or tool_input.get("file_path", "")
-    elif tool_name in ["Edit", "MultiEdit"]:
-        file_path = tool_input.get("filePath", "") or tool_input.get("file_path", "")
-    else:
+        # Check file path
         file_path = ""
+        if tool_name in ["Write", "Edit", "MultiEdit"]:
+            file_path = tool_input.get("filePath", "") or tool_input.get("file_path", "")
 
-    log(f"File path extracted: {file_path}")
-
-    # Check if it's a code file
-    code_extensions = {
-        '.py', '.js', '.ts', '.java', '.cpp', '.c', '.cs', '.php', '.rb',
-        '.go', '.rs', '.swift', '.kt', '.scala', '.clj', '.hs', '.ml',
-        '.sh', '.bash', '.zsh', '.fish', '.ps1', '.sql', '.html', '.css',
-        '.scss', '.sass', '.less', '.vue', '.svelte', '.jsx', '.tsx'
-    }
-
-    if file_path:
-        from pathlib import Path
-        path = Path(file_path)
-        is_code = path.suffix.lower() in code_extensions or path.name in {
-            'Dockerfile', 'Makefile', 'CMakeLists.txt', 'package.json',
-            'requirements.txt', 'Cargo.toml', 'go.mod', 'composer.json'
-        }
-        log(f"Is code file: {is_code}")
-    else:
-        log("No file path found")
+        hook_debug.log("file path extracted", tool_name=tool_name, file_path=file_path)
 
-    log("Hook completed")
+        # Check if it's a code file
+        if file_path:
+            hook_debug.log("code file check", is_code=fast_reject.is_code_path(file_path))
+        else:
+            hook_debug.log("no file path found")
 
-except Exception as e:
-    log(f"Error: {e}")
-    import traceback
-    log(traceback.format_exc())
+    except Exception as e:
+        import traceback
+        hook_debug.log("error", error=str(e), traceback=traceback.format_exc())
 
 # Exit silently to not block Claude
-sys.exit(0)
\ No newline at end of file
+sys.exit(0)
@@ -0,0 +1,66 @@
+"""
+Cold-start fast path: decide "not interested" before importing anything heavy.
+
+Most PostToolUse events are for tools or files the hook never reviews, yet
+importing the review machinery (http.client, ssl, concurrent.futures, ...)
+costs around 100 ms. The hook entry points call not_interested() on the raw
+stdin text first: it pulls the tool name and file path out with plain string
+scanning (even `re` and `json` cost milliseconds to import), and when in
+doubt says "interested" so the full hook decides.
+"""
+
+import os
+
+CODE_TOOLS = frozenset({"Write", "Edit", "MultiEdit"})
+
+# File types worth reviewing
+CODE_EXTENSIONS = frozenset({
+    '.py', '.js', '.ts', '.java', '.cpp', '.c', '.cs', '.php', '.rb',
+    '.go', '.rs', '.swift', '.kt', '.scala', '.clj', '.hs', '.ml',
+    '.sh', '.bash', '.zsh', '.fish', '.ps1', '.sql', '.html', '.css',
+    '.scss', '.sass', '.less', '.vue', '.svelte', '.jsx', '.tsx'
+})
+CODE_FILENAMES = frozenset({
+    'Dockerfile', 'Makefile', 'CMakeLists.txt', 'package.json',
+    'requirements.txt', 'Cargo.toml', 'go.mod', 'composer.json'
+})
+
+def string_values(raw, key):
+    """Return the values of every `"key": "value"` pair in raw JSON text, None for escaped ones."""
+    values = []
+    needle = f'"{key}"'
+    start = raw.find(needle)
+    while start != -1:
+        rest = raw[start + len(needle):].lstrip()
+        if rest.startswith(":"):
+            rest = rest[1:].lstrip()
+            if rest.startswith('"'):
+                end = rest.find('"', 1)
+                value = rest[1:end] if end != -1 else None
+                values.append(None if value is None or "\\" in value else value)
+        start = raw.find(needle, start + len(needle))
+    return values
+
+def is_code_path(file_path):
+    """True if `file_path` has a reviewable extension or file name."""
+    if not file_path:
+        return False
+    name = os.path.basename(file_path)
+    return os.path.splitext(name)[1].lower() in CODE_EXTENSIONS or name in CODE_FILENAMES
+
+def not_interested(raw):
+    """True only if the raw hook input is certainly not something the hook reviews."""
+    tools = string_values(raw, "tool_name")
+    if len(tools) != 1 or tools[0] is None:
+        return False  # Missing, escaped or ambiguous: let the full parse decide
+    if tools[0] not in CODE_TOOLS:
+        return True
+
+    # Deferred mode delivers finished reviews on any code-tool event, whatever the file
+    if os.getenv("CODE_HOOK_DEFERRED", "0") == "1":
+        return False
+
+    paths = set(string_values(raw, "file_path") + string_values(raw, "filePath"))
+    if len(paths) != 1 or None in paths:
+        return False  # An escaped or conflicting path: don't guess
+    return not is_code_path(paths.pop())
@@ -0,0 +1,60 @@
+"""
+Split, normalize and merge review findings.
+
+The models answer with one finding per bullet or numbered line. Several
+features need to treat those as individual items: merging the answers for
+separate chunks of a file, counting findings, and spotting repeats.
+"""
+
+import re
+
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_LINE_REF = re.compile(r"\b(?:lines?|l)\s*\d+(?:\s*[-–,]\s*\d+)*\b", re.IGNORECASE)
+_NON_WORD = re.compile(r"[\W_]+")
+
+def split_findings(text):
+    """Split a review into findings: one per bullet, with its continuation lines."""
+    if not text:
+        return []
+
+    lines = text.strip().splitlines()
+    if not any(_BULLET.match(line) for line in lines):
+        # No bullets: treat each paragraph as one finding
+        return [p.strip() for p in re.split(r"\n\s*\n", text.strip()) if p.strip()]
+
+    items = []
+    for line in lines:
+        if _BULLET.match(line) or not items:
+            if line.strip():
+                items.append(line.rstrip())
+        elif line.strip():
+            items[-1] += "\n" + line.rstrip()
+    return items
+
+def is_bullet(line):
+    """Return True if `line` starts with a bullet or a number, as a finding does."""
+    return bool(_BULLET.match(line))
+
+def strip_bullet(finding):
+    """Return `finding` without its leading bullet or number."""
+    return _BULLET.sub("", finding, count=1)
+
+def normalize_finding(finding):
+    """Reduce a finding to its wording so the same point made twice compares equal."""
+    text = strip_bullet(finding)
+    text = _LINE_REF.sub(" ", text)
+    text = re.sub(r"\d+", " ", text)
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+def merge_findings(reviews):
+    """Merge several reviews into one, dropping findings that repeat an earlier one."""
+    seen = set()
+    merged = []
+    for review in reviews:
+        for finding in split_findings(review):
+            key = normalize_finding(finding)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged.append(finding)
+    return "\n".join(merged)
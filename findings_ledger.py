@@ -0,0 +1,85 @@
+"""
+Per-session ledger of findings already reported for each file.
+
+A file gets reviewed again after every edit, and the model keeps repeating
+findings Claude has already seen. For each (session, file) the ledger keeps
+what was reported. Each finding is fingerprinted with line numbers and
+formatting normalized away, so the same point made about a shifted line
+still matches. The ledger is used twice:
+
+- The prompt gets a compact "already reported" list, so the model spends
+  its reply on new findings.
+- Findings the model repeats anyway are filtered out before they reach
+  Claude.
+"""
+
+import hashlib
+import os
+import time
+
+import findings
+import hook_state
+
+# Configuration
+LEDGER_ENABLED = os.getenv("CODE_HOOK_LEDGER", "1") == "1"
+LEDGER_TTL = int(os.getenv("CODE_HOOK_LEDGER_TTL", str(24 * 3600)))  # seconds; older ledgers are ignored
+MAX_ENTRIES = 50  # findings remembered per file
+PROMPT_ENTRIES = 15  # most recent findings listed in the prompt
+PROMPT_CHARS = 120  # each listed finding is cut to this length
+
+REPORTED_HEADER = "Already reported for this file (do not repeat these):"
+
+def fingerprint(finding):
+    """Identify a finding by its wording, ignoring line numbers, bullets and formatting."""
+    key = findings.normalize_finding(finding)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] if key else None
+
+def _ledger_path(session_id, file_path):
+    name = hashlib.sha1(f"{session_id}\0{file_path}".encode("utf-8")).hexdigest()
+    return os.path.join(hook_state.STATE_DIR, "ledger", f"{name}.json")
+
+def reported(session_id, file_path):
+    """Return the findings already reported for `file_path` in this session, oldest first."""
+    if not LEDGER_ENABLED or not session_id or not file_path:
+        return []
+    ledger = hook_state.read_json(_ledger_path(session_id, file_path), {})
+    if time.time() - ledger.get("updated", 0) > LEDGER_TTL:
+        return []
+    return ledger.get("findings", [])
+
+def _summary(finding):
+    text = findings.strip_bullet(finding.strip().splitlines()[0]).strip()
+    return text if len(text) <= PROMPT_CHARS else text[:PROMPT_CHARS - 3] + "..."
+
+def prompt_note(entries):
+    """Return the "already reported" block to append to a prompt, or "" for an empty ledger."""
+    if not entries:
+        return ""
+    lines = [f"- {e['text']}" for e in entries[-PROMPT_ENTRIES:]]
+    return "\n\n" + REPORTED_HEADER + "\n" + "\n".join(lines)
+
+def filter_new(suggestions, entries):
+    """Drop findings of `suggestions` that are already in the ledger; None if nothing new is left."""
+    if not suggestions or not entries:
+        return suggestions
+    known = {e["fp"] for e in entries}
+    kept = [f for f in findings.split_findings(suggestions) if fingerprint(f) not in known]
+    return "\n".join(kept) or None
+
+def record(session_id, file_path, suggestions):
+    """Add the findings just reported for `file_path` to the session's ledger."""
+    if not LEDGER_ENABLED or not session_id or not file_path or not suggestions:
+        return
+    path = _ledger_path(session_id, file_path)
+    try:
+        with hook_state.locked(path):
+            entries = reported(session_id, file_path)
+            known = {e["fp"] for e in entries}
+            for finding in findings.split_findings(suggestions):
+                fp = fingerprint(finding)
+                if fp and fp not in known:
+                    known.add(fp)
+                    entries.append({"fp": fp, "text": _summary(finding)})
+            hook_state.write_json(path, {"updated": time.time(), "findings": entries[-MAX_ENTRIES:]})
+    except OSError:
+        pass  # Worst case a finding is reported again
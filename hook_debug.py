@@ -0,0 +1,142 @@
+"""
+Bounded, buffered debug logging for the hooks.
+
+With CODE_HOOK_DEBUG=1 the hooks log what they receive and decide to a
+single file, cheaply enough to leave on:
+
+- Lines are buffered in memory and written with one open per run, not one
+  per message.
+- The file rotates by size, so it never grows without bound.
+- File contents and edit strings are replaced by their hash and length
+  (or a short prefix), so a Write of a large file logs bytes, not megabytes.
+- CODE_HOOK_DEBUG_SAMPLE logs only a fraction of runs.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import hook_state
+
+# Configuration
+DEBUG_ENABLED = os.getenv("CODE_HOOK_DEBUG", "0") == "1"
+DEBUG_FILE = os.path.expanduser(os.getenv("CODE_HOOK_DEBUG_FILE", "")) or os.path.join(hook_state.STATE_DIR,
+                                                                                      "debug.log")
+DEBUG_MAX_BYTES = int(os.getenv("CODE_HOOK_DEBUG_MAX_BYTES", str(1024 * 1024)))
+DEBUG_KEEP = 2  # rotated files kept: debug.log.1, debug.log.2
+DEBUG_SAMPLE = float(os.getenv("CODE_HOOK_DEBUG_SAMPLE", "1"))  # fraction of runs logged
+DEBUG_CONTENT = os.getenv("CODE_HOOK_DEBUG_CONTENT", "hash")  # Options: "hash", "truncate"
+MAX_STRING = 200  # longer strings are cut to this many characters
+FLUSH_BYTES = 64 * 1024  # write out early if a run logs this much
+
+# Fields that carry file contents or code
+CONTENT_FIELDS = frozenset({"content", "new_string", "old_string", "code", "prompt", "oldString", "newString",
+                            "originalFile", "structuredPatch"})
+
+_local = threading.local()
+_buffer = []
+_buffered = 0
+_lock = threading.Lock()
+
+def summarize_content(value):
+    """Stand-in for a content field: its hash and size, or a short prefix."""
+    text = value if isinstance(value, str) else json.dumps(value)
+    if DEBUG_CONTENT == "truncate":
+        return text[:MAX_STRING] + (f"... ({len(text)} chars)" if len(text) > MAX_STRING else "")
+    digest = hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()[:12]
+    return f"<{len(text)} chars sha256:{digest}>"
+
+def redact(value, key=None):
+    """Copy `value` with content fields summarized and other long strings cut short."""
+    if key in CONTENT_FIELDS and value:
+        return summarize_content(value)
+    if isinstance(value, dict):
+        return {k: redact(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    if isinstance(value, str) and len(value) > MAX_STRING:
+        return value[:MAX_STRING] + f"... ({len(value)} chars)"
+    return value
+
+def active():
+    """True if this thread is inside a sampled debug run."""
+    return getattr(_local, "run", None) is not None
+
+def log(message, **fields):
+    """Buffer one log line for the current run; free when debugging is off or the run wasn't sampled."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return
+    elapsed = (time.perf_counter() - run["started"]) * 1000
+    line = f"{time.strftime('%Y-%m-%dT%H:%M:%S')} {run['id']} +{elapsed:.1f}ms {message}"
+    if fields:
+        line += " " + json.dumps(redact(fields), default=str)
+    _append(line + "\n")
+
+def _append(line):
+    global _buffered
+    with _lock:
+        _buffer.append(line)
+        _buffered += len(line)
+        full = _buffered >= FLUSH_BYTES
+    if full:
+        flush()
+
+def _rotate(path):
+    for i in range(DEBUG_KEEP - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+def flush(path=None):
+    """Write the buffered lines with a single append, rotating the file first if it is too big."""
+    global _buffered
+    with _lock:
+        data = "".join(_buffer).encode("utf-8")
+        _buffer.clear()
+        _buffered = 0
+    if not data:
+        return
+
+    path = path or DEBUG_FILE
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with hook_state.locked(path):
+            if os.path.exists(path) and os.path.getsize(path) + len(data) > DEBUG_MAX_BYTES:
+                _rotate(path)
+            with open(path, "ab") as f:
+                f.write(data)
+    except OSError as e:
+        print(f"Debug log write failed: {e}", file=sys.stderr)
+
+@contextlib.contextmanager
+def run(name, force=False):
+    """Log one hook run (if debugging is on and the run is sampled) and flush it at the end.
+
+    `force=True` logs regardless of CODE_HOOK_DEBUG and sampling.
+    """
+    if not force and (not DEBUG_ENABLED or random.random() >= DEBUG_SAMPLE):
+        yield
+        return
+
+    previous = getattr(_local, "run", None)
+    _local.run = {"id": f"{name}[{os.getpid()}:{threading.get_ident() % 10000}]", "started": time.perf_counter()}
+    log("started")
+    try:
+        yield
+    except SystemExit as e:
+        log("exited", code=e.code)
+        raise
+    except BaseException as e:
+        log("failed", error=repr(e))
+        raise
+    else:
+        log("finished")
+    finally:
+        _local.run = previous
+        flush()
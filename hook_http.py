@@ -0,0 +1,293 @@
+"""
+Shared HTTP transport for the HookedOnCode hooks.
+
+Replaces the per-review `curl` subprocess with http.client connections that
+are kept alive per backend host and reused for as long as the process lives
+(one call for a plain hook run, many for review_daemon.py). Callers get the
+real HTTP status back instead of curl's exit code.
+
+Requests made inside `cancel_scope(token)` can be abandoned from another
+thread with `token.cancel()`, which shuts their sockets down mid-flight.
+Streaming replies can be read line by line with `open_stream()`.
+"""
+
+import contextlib
+import http.client
+import json
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+MAX_IDLE_PER_HOST = 4
+
+_pool = {}  # (scheme, host, port) -> [idle connections]
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+class Cancelled(Exception):
+    """The request was abandoned through its CancelToken."""
+
+class CancelToken:
+    """Lets one thread abandon the requests another thread is waiting on.
+
+    Also carries the request's overall deadline (a time.monotonic() value),
+    so every thread working on one review knows how much time is left.
+    """
+
+    def __init__(self, deadline=None):
+        self.cancelled = False
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self._conns = set()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            conns = list(self._conns)
+        for conn in conns:
+            # shutdown() wakes a thread blocked in recv(); close() alone may not
+            with contextlib.suppress(OSError, AttributeError):
+                conn.sock.shutdown(socket.SHUT_RDWR)
+
+    def child(self):
+        """Return a new token for a sub-request that shares this token's deadline."""
+        return CancelToken(self.deadline)
+
+    def _attach(self, conn):
+        with self._lock:
+            if self.cancelled:
+                raise Cancelled("request cancelled")
+            self._conns.add(conn)
+
+    def _detach(self, conn):
+        with self._lock:
+            self._conns.discard(conn)
+
+@contextlib.contextmanager
+def cancel_scope(token):
+    """Make `token` govern every request this thread sends inside the block."""
+    previous = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+def current_token():
+    """Return the CancelToken governing this thread, if any (to hand to worker threads)."""
+    return getattr(_local, "token", None)
+
+class HttpResponse:
+    """Status, headers and body of a finished request."""
+
+    def __init__(self, status, reason, headers, body):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    @property
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+def _pool_key(url):
+    parts = urlsplit(url)
+    scheme = parts.scheme or "http"
+    port = parts.port or (443 if scheme == "https" else 80)
+    return scheme, parts.hostname, port
+
+def _request_target(url):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    return f"{path}?{parts.query}" if parts.query else path
+
+def _checkout(key, timeout):
+    """Return (connection, reused) for `key`, preferring an idle keep-alive one."""
+    with _pool_lock:
+        idle = _pool.get(key)
+        conn = idle.pop() if idle else None
+
+    if conn is not None:
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    scheme, host, port = key
+    if scheme == "https":
+        conn = http.client.HTTPSConnection(host, port, timeout=timeout)
+    else:
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    return conn, False
+
+def _checkin(key, conn):
+    with _pool_lock:
+        idle = _pool.setdefault(key, [])
+        if len(idle) < MAX_IDLE_PER_HOST:
+            idle.append(conn)
+            return
+    conn.close()
+
+def close_all():
+    """Drop every pooled connection."""
+    with _pool_lock:
+        conns = [conn for idle in _pool.values() for conn in idle]
+        _pool.clear()
+    for conn in conns:
+        conn.close()
+
+def _failure(e, method, url, timeout, token):
+    """Translate a low-level error into the exception request() promises."""
+    if token is not None and token.cancelled:
+        return Cancelled(f"{method} {url} cancelled")
+    if isinstance(e, socket.timeout):
+        return TimeoutError(f"{method} {url} timed out after {timeout}s")
+    return e
+
+def _send(key, method, url, body, headers, timeout, token):
+    """Send a request on a pooled connection and return (conn, response) with the headers read."""
+    target = _request_target(url)
+    headers = dict(headers or {})
+
+    # A pooled connection may have been closed by the server while idle;
+    # retry once on a fresh connection if so.
+    for attempt in range(2):
+        conn, reused = _checkout(key, timeout)
+        try:
+            if conn.sock is None:
+                conn.connect()
+            if token is not None:
+                token._attach(conn)
+            conn.request(method, target, body=body, headers=headers)
+            return conn, conn.getresponse()
+        except Exception as e:
+            if token is not None:
+                token._detach(conn)
+            conn.close()
+            error = _failure(e, method, url, timeout, token)
+            if error is e and isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+                if reused and attempt == 0:
+                    continue
+            if error is e:
+                raise
+            raise error from e
+
+def _release(key, conn, resp):
+    if resp.will_close:
+        conn.close()
+    else:
+        _checkin(key, conn)
+
+def request(method, url, body=None, headers=None, timeout=30):
+    """Send one request over a pooled connection and return an HttpResponse.
+
+    Raises TimeoutError when the backend doesn't answer within `timeout`
+    seconds and OSError/http.client.HTTPException when it can't be reached.
+    """
+    key = _pool_key(url)
+    token = current_token()
+    conn, resp = _send(key, method, url, body, headers, timeout, token)
+    try:
+        data = resp.read()
+    except Exception as e:
+        conn.close()
+        error = _failure(e, method, url, timeout, token)
+        if error is e:
+            raise
+        raise error from e
+    finally:
+        if token is not None:
+            token._detach(conn)
+
+    _release(key, conn, resp)
+    return HttpResponse(resp.status, resp.reason, dict(resp.getheaders()), data)
+
+class StreamResponse:
+    """A response whose body is read line by line as the server sends it."""
+
+    def __init__(self, resp, method, url, timeout, token):
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = dict(resp.getheaders())
+        self._resp = resp
+        self._method = method
+        self._url = url
+        self._timeout = timeout
+        self._token = token
+        # `timeout` bounds the whole body, not just each read
+        self._deadline = time.monotonic() + timeout
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def lines(self):
+        """Yield the body one decoded line at a time until the server ends it."""
+        while True:
+            if time.monotonic() > self._deadline:
+                raise TimeoutError(f"{self._method} {self._url} timed out after {self._timeout}s")
+            try:
+                line = self._resp.readline()
+            except Exception as e:
+                error = _failure(e, self._method, self._url, self._timeout, self._token)
+                if error is e:
+                    raise
+                raise error from e
+            if not line:
+                self._resp.read()  # Marks the response finished so the connection can be reused
+                return
+            yield line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def read(self):
+        """Read the rest of the body into an HttpResponse (for error replies)."""
+        body = "\n".join(self.lines()).encode("utf-8")
+        return HttpResponse(self.status, self.reason, self.headers, body)
+
+@contextlib.contextmanager
+def open_stream(method, url, body=None, headers=None, timeout=30):
+    """Send a request and yield a StreamResponse for reading its body incrementally.
+
+    Leaving the block before the body is fully read closes the connection,
+    which tells the server to stop generating; a fully read connection goes
+    back to the pool as usual.
+    """
+    key = _pool_key(url)
+    token = current_token()
+    conn, resp = _send(key, method, url, body, headers, timeout, token)
+    try:
+        yield StreamResponse(resp, method, url, timeout, token)
+    except BaseException:
+        conn.close()
+        raise
+    else:
+        if resp.isclosed():
+            _release(key, conn, resp)
+        else:
+            conn.close()  # Stopped early: abandon the rest of the reply
+    finally:
+        if token is not None:
+            token._detach(conn)
+
+def post_json(url, payload, headers=None, timeout=30):
+    """POST `payload` as JSON and return an HttpResponse."""
+    headers = dict(headers or {})
+    headers.setdefault("Content-Type", "application/json")
+    return request("POST", url, json.dumps(payload).encode("utf-8"), headers, timeout)
+
+def post_json_stream(url, payload, headers=None, timeout=30):
+    """POST `payload` as JSON and return a context manager yielding a StreamResponse."""
+    headers = dict(headers or {})
+    headers.setdefault("Content-Type", "application/json")
+    return open_stream("POST", url, json.dumps(payload).encode("utf-8"), headers, timeout)
+
+def get(url, headers=None, timeout=5):
+    """GET `url` and return an HttpResponse."""
+    return request("GET", url, None, headers, timeout)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-stage timing for the hooks.
+
+With CODE_HOOK_METRICS=1 every hook run (or daemon request) writes one JSON
+line. It holds the time spent in each stage:
+
+- interpreter startup
+- stdin parsing
+- file reading
+- static checks
+- cache lookups
+- prompt building
+- the network
+- response parsing
+
+It also records the service, model, payload size, response tokens (from the
+backend's `usage`) and whether the cache hit. The file rotates by size.
+
+Summarize it with:
+    python3 hook_metrics.py stats
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+import hook_state
+
+# Configuration
+METRICS_ENABLED = os.getenv("CODE_HOOK_METRICS", "0") == "1"
+METRICS_FILE = os.path.expanduser(os.getenv("CODE_HOOK_METRICS_FILE", "")) or os.path.join(hook_state.STATE_DIR,
+                                                                                          "metrics.jsonl")
+METRICS_MAX_BYTES = int(os.getenv("CODE_HOOK_METRICS_MAX_BYTES", str(5 * 1024 * 1024)))
+METRICS_KEEP = 3  # rotated files kept: metrics.jsonl.1 ... .3
+
+_local = threading.local()
+
+class Trace:
+    """Timings and attributes of one hook run; safe to update from worker threads."""
+
+    def __init__(self, hook):
+        self.started = time.perf_counter()
+        self.record = {"ts": round(time.time(), 3), "hook": hook, "stages": {}}
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage, ms):
+        with self._lock:
+            stages = self.record["stages"]
+            stages[stage] = round(stages.get(stage, 0) + ms, 3)  # Repeated stages (chunks) add up
+
+    def annotate(self, fields):
+        with self._lock:
+            for key, value in fields.items():
+                if value is None:
+                    continue
+                if key in ("payload_bytes", "response_tokens") and key in self.record:
+                    value += self.record[key]  # Totals across chunks
+                self.record[key] = value
+
+def process_age():
+    """Seconds since this process was started (interpreter startup plus imports), or None."""
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", encoding="ascii") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None  # Not Linux
+
+def current():
+    """Return the Trace recording this thread's work, if any (to hand to worker threads)."""
+    return getattr(_local, "trace", None)
+
+@contextlib.contextmanager
+def use(trace):
+    """Make `trace` record the stages this thread runs inside the block."""
+    previous = current()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+@contextlib.contextmanager
+def trace(hook, startup=False):
+    """Record one hook run and append it to the metrics file when the block ends.
+
+    `startup=True` also records how long the process took to reach this point.
+    """
+    if not METRICS_ENABLED:
+        yield None
+        return
+
+    run = Trace(hook)
+    if startup:
+        age = process_age()
+        if age is not None:
+            run.add_stage("startup", age * 1000)
+    try:
+        with use(run):
+            yield run
+    finally:
+        run.record["total_ms"] = round((time.perf_counter() - run.started) * 1000, 3)
+        write(run.record)
+
+@contextlib.contextmanager
+def span(stage):
+    """Time the block as `stage` of the current trace; free when metrics are off."""
+    run = current()
+    if run is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.add_stage(stage, (time.perf_counter() - started) * 1000)
+
+def stage(name, ms):
+    """Add `ms` to stage `name` of the current trace, for time measured some other way than span()."""
+    run = current()
+    if run is not None:
+        run.add_stage(name, ms)
+
+def annotate(**fields):
+    """Attach fields (service, model, cache, payload_bytes, ...) to the current trace."""
+    run = current()
+    if run is not None:
+        run.annotate(fields)
+
+def record_usage(response):
+    """Annotate the response token count from an OpenAI `usage` block or Ollama's `eval_count`."""
+    if current() is None or not isinstance(response, dict):
+        return
+    usage = response.get("usage") or {}
+    annotate(response_tokens=usage.get("completion_tokens", response.get("eval_count")))
+
+def _rotate(path):
+    for i in range(METRICS_KEEP - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+def write(record, path=None):
+    """Append `record` as one JSON line, rotating the file once it is too big."""
+    path = path or METRICS_FILE
+    line = (json.dumps(record) + "\n").encode("utf-8")
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with hook_state.locked(path):
+            if os.path.exists(path) and os.path.getsize(path) + len(line) > METRICS_MAX_BYTES:
+                _rotate(path)
+            with open(path, "ab") as f:
+                f.write(line)
+    except OSError as e:
+        print(f"Metrics write failed: {e}", file=sys.stderr)
+
+def read_records(path=None):
+    """Yield every record from the metrics file and its rotations, oldest first."""
+    path = path or METRICS_FILE
+    for name in [f"{path}.{i}" for i in range(METRICS_KEEP, 0, -1)] + [path]:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by a crash
+
+def summarize(records):
+    """Group records by backend and return {backend: {"runs", "cache_hits", "dropped", stage: {p50, p95, p99}}}.
+
+    The daemon's queue shows up as the `queue_wait` stage and `queue_depth`.
+    """
+    import latency_stats  # Only the stats command needs it
+
+    groups = {}
+    for record in records:
+        backend = f"{record.get('service', '-')}/{record.get('model', '-')}"
+        group = groups.setdefault(backend, {"runs": 0, "cache_hits": 0, "dropped": 0, "timings": {}})
+        group["runs"] += 1
+        group["cache_hits"] += record.get("cache") == "hit"
+        group["dropped"] += record.get("skipped") in ("expired", "superseded")  # Left in the daemon's queue
+        timings = dict(record.get("stages", {}), total=record.get("total_ms"), queue_depth=record.get("queue_depth"))
+        for stage, ms in timings.items():
+            if ms is not None:
+                group["timings"].setdefault(stage, []).append(ms)
+
+    summary = {}
+    for backend, group in groups.items():
+        summary[backend] = {"runs": group["runs"], "cache_hits": group["cache_hits"], "dropped": group["dropped"]}
+        for stage, samples in group["timings"].items():
+            summary[backend][stage] = {name: round(latency_stats.percentile(samples, fraction), 1)
+                                       for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))}
+    return summary
+
+def print_stats(path=None):
+    summary = summarize(read_records(path))
+    if not summary:
+        print(f"No metrics in {path or METRICS_FILE} (enable them with CODE_HOOK_METRICS=1)")
+        return
+    for backend, stats in sorted(summary.items()):
+        dropped = f", {stats['dropped']} dropped from the queue" if stats["dropped"] else ""
+        print(f"{backend}: {stats['runs']} runs, {stats['cache_hits']} cache hits{dropped}")
+        for stage, figures in stats.items():
+            if isinstance(figures, dict):
+                unit = "" if stage == "queue_depth" else "ms"  # Jobs waiting when the request arrived
+                print(f"  {stage:<16} p50={figures['p50']:>8}{unit}  p95={figures['p95']:>8}{unit}  "
+                      f"p99={figures['p99']:>8}{unit}")
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["stats"]:
+        print_stats(sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        print("Usage: hook_metrics.py stats [metrics.jsonl]", file=sys.stderr)
+        sys.exit(2)
@@ -0,0 +1,74 @@
+"""
+Shared on-disk state for the HookedOnCode hooks.
+
+Hook processes come and go with every edit, so anything that has to outlive
+one of them (caches, health records, per-session data) lives under a single
+state directory. Writes go through a temp file and os.replace() so readers
+never see half a file, and `locked()` serialises read-modify-write updates
+between hook processes running at the same time.
+"""
+
+import contextlib
+import fcntl
+import json
+import os
+import tempfile
+
+# Configuration
+STATE_DIR = os.path.expanduser(os.getenv("CODE_HOOK_STATE_DIR", "~/.cache/hookedoncode"))
+
+def state_path(*parts):
+    """Return a path under the state directory, creating its parent directories."""
+    path = os.path.join(STATE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def atomic_write(path, data):
+    """Write `data` (bytes) to `path` so readers see either the old or the new file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+def read_json(path, default=None):
+    """Load JSON from `path`, returning `default` if it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def write_json(path, obj):
+    """Atomically replace `path` with `obj` encoded as JSON."""
+    atomic_write(path, json.dumps(obj, separators=(",", ":")).encode("utf-8"))
+
+@contextlib.contextmanager
+def locked(path, blocking=True):
+    """Hold an exclusive cross-process lock on `path` + '.lock'.
+
+    With blocking=False, yields False instead of waiting when another
+    process holds the lock.
+    """
+    lock_path = path + ".lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(fd, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
@@ -0,0 +1,96 @@
+"""
+Machine-wide limit on concurrent requests to each local backend host.
+
+Claude runs tool calls in parallel, and each call can fire more than one hook
+(code_suggestions_hook.py, sexy_code_hook.py). All of those requests can land
+on one LM Studio or Ollama instance at once. The server then thrashes and
+every request times out.
+
+Every hook process on the machine, and every daemon thread, therefore takes
+a slot before sending to a local host. The slots are flock()ed files under
+the state directory: CODE_HOOK_MAX_IN_FLIGHT per host, which the kernel
+releases even if a hook is killed mid-request.
+
+A request that finds every slot taken joins a waiting queue of at most
+CODE_HOOK_MAX_QUEUED entries, itself a set of locked files. It waits there
+until a slot frees up or its deadline passes. When the queue is full too,
+the request is shed at once with Overloaded. Joining the pile-up would only
+make everybody late.
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import os
+import time
+
+import hook_http
+import hook_metrics
+import hook_state
+
+# Configuration
+MAX_IN_FLIGHT = int(os.getenv("CODE_HOOK_MAX_IN_FLIGHT", "2"))  # per host; 0 = no limit
+MAX_QUEUED = int(os.getenv("CODE_HOOK_MAX_QUEUED", "4"))  # requests allowed to wait for a slot, per host
+LIMITED_SERVICES = [s.strip() for s in os.getenv("CODE_HOOK_LIMIT_SERVICES", "lm_studio,ollama").split(",")
+                    if s.strip()]
+POLL_INTERVAL = 0.05  # seconds between attempts to take a slot
+
+class Overloaded(Exception):
+    """The host has every slot busy and a full waiting queue."""
+
+def _host_dir(host):
+    name = hashlib.sha1(host.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(hook_state.STATE_DIR, "limits", name)
+
+def _take(directory, kind, count):
+    """Lock the first free `kind` file of `count` in `directory`; return its fd, or None if all are taken."""
+    for i in range(count):
+        fd = os.open(os.path.join(directory, f"{kind}-{i}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except BlockingIOError:
+            os.close(fd)
+    return None
+
+@contextlib.contextmanager
+def slot(service, host, wait):
+    """Hold one of `host`'s request slots for the block.
+
+    Waits in the host's queue for up to `wait` seconds (less if the current
+    CancelToken's deadline comes first). Raises Overloaded at once when the
+    queue is full, TimeoutError when no slot frees up in time, and
+    hook_http.Cancelled if the request is superseded while waiting.
+    """
+    if MAX_IN_FLIGHT <= 0 or service not in LIMITED_SERVICES:
+        yield
+        return
+
+    directory = _host_dir(host)
+    os.makedirs(directory, exist_ok=True)
+    with hook_metrics.span("queue_wait"):
+        fd = _take(directory, "slot", MAX_IN_FLIGHT)
+        if fd is None:
+            waiter = _take(directory, "wait", MAX_QUEUED)
+            if waiter is None:
+                hook_metrics.annotate(skipped="overloaded")
+                raise Overloaded(f"{host} already has {MAX_IN_FLIGHT} requests in flight and "
+                                 f"{MAX_QUEUED} waiting; shedding this one")
+            try:
+                token = hook_http.current_token()
+                give_up = time.monotonic() + wait
+                if token is not None and token.deadline is not None:
+                    give_up = min(give_up, token.deadline)
+                while fd is None:
+                    if token is not None and token.cancelled:
+                        raise hook_http.Cancelled("request cancelled while queued")
+                    if time.monotonic() >= give_up:
+                        raise TimeoutError(f"no free request slot for {host} within {wait:.0f}s")
+                    time.sleep(POLL_INTERVAL)
+                    fd = _take(directory, "slot", MAX_IN_FLIGHT)
+            finally:
+                os.close(waiter)
+    try:
+        yield
+    finally:
+        os.close(fd)  # Closing the file releases the lock
@@ -0,0 +1,91 @@
+"""
+Adaptive per-backend, per-model request timeouts.
+
+Each finished request adds its latency to a rolling window kept per
+(service, model, prompt size bucket) in the shared state directory. The
+timeout for the next request is a high percentile of that window plus some
+headroom, falling back to the backend's fixed default until enough samples
+exist. It is always capped by what is left of the hook's own deadline,
+so a request never outlives the hook timeout Claude enforces.
+"""
+
+import hashlib
+import math
+import os
+import time
+
+import hook_http
+import hook_state
+
+# Configuration
+ADAPTIVE_TIMEOUTS = os.getenv("CODE_HOOK_ADAPTIVE_TIMEOUT", "1") != "0"
+HOOK_TIMEOUT = float(os.getenv("CODE_HOOK_TIMEOUT", "30"))  # the "timeout" of the hook in settings.json
+DEADLINE_MARGIN = float(os.getenv("CODE_HOOK_DEADLINE_MARGIN", "2"))  # seconds kept for everything else
+WINDOW = 64  # samples kept per bucket
+MIN_SAMPLES = 5
+PERCENTILE = 0.95
+HEADROOM = 1.5  # multiplier on the percentile
+MIN_TIMEOUT = 2.0
+MAX_TIMEOUT = float(os.getenv("CODE_HOOK_MAX_TIMEOUT", "120"))
+
+def deadline_token():
+    """Return a CancelToken whose deadline is the hook's own timeout, less a margin.
+
+    Never later than the deadline of an enclosing cancel scope, such as the
+    daemon's for a request that spent part of its time queued.
+    """
+    deadline = time.monotonic() + HOOK_TIMEOUT - DEADLINE_MARGIN
+    outer = hook_http.current_token()
+    if outer is not None and outer.deadline is not None:
+        deadline = min(deadline, outer.deadline)
+    return hook_http.CancelToken(deadline)
+
+def remaining():
+    """Seconds left before the current request's deadline, or None if it has none."""
+    token = hook_http.current_token()
+    if token is None or token.deadline is None:
+        return None
+    return token.deadline - time.monotonic()
+
+def size_bucket(prompt_tokens):
+    """Group prompts by size: up to 1k tokens, up to 2k, 4k, 8k and so on."""
+    return max(0, math.ceil(math.log2(max(prompt_tokens, 1) / 1024)))
+
+def _stats_path(service, model):
+    name = hashlib.sha1(f"{service}|{model}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(hook_state.STATE_DIR, "latency", f"{name}.json")
+
+def percentile(samples, fraction):
+    """Return the `fraction` percentile of `samples` (nearest rank)."""
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[rank]
+
+def record(service, model, prompt_tokens, seconds):
+    """Add one observed latency (or a timeout's elapsed time) to the rolling window."""
+    if not ADAPTIVE_TIMEOUTS:
+        return
+    path = _stats_path(service, model)
+    bucket = str(size_bucket(prompt_tokens))
+    try:
+        with hook_state.locked(path):
+            stats = hook_state.read_json(path, {})
+            samples = stats.get(bucket, [])
+            samples.append(round(seconds, 3))
+            stats[bucket] = samples[-WINDOW:]
+            hook_state.write_json(path, stats)
+    except OSError:
+        pass  # Losing one sample is harmless
+
+def timeout_for(service, model, prompt_tokens, default):
+    """Return the timeout in seconds for the next request; <= 0 means there is no time left."""
+    timeout = default
+    if ADAPTIVE_TIMEOUTS:
+        samples = hook_state.read_json(_stats_path(service, model), {}).get(str(size_bucket(prompt_tokens)), [])
+        if len(samples) >= MIN_SAMPLES:
+            timeout = min(MAX_TIMEOUT, max(MIN_TIMEOUT, percentile(samples, PERCENTILE) * HEADROOM + 1))
+
+    left = remaining()
+    if left is not None:
+        timeout = min(timeout, left)
+    return timeout
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Model warm-up and keep-alive for the local backends (Ollama, LM Studio).
+
+Loading codellama:7b, let alone a 70B model, takes seconds to tens of
+seconds. The first review of a session then times out against a model that
+is still loading.
+
+Registered as a SessionStart hook, this script returns at once and loads the
+configured models from a detached background process. Ollama is asked to keep
+the model loaded for CODE_HOOK_KEEP_ALIVE seconds (`keep_alive`), and LM
+Studio is asked the same (`ttl`). Every review repeats the request, so the
+model stays loaded while the session is active.
+
+The outcome goes into a residency record per service. Reviews check it
+before calling the backend:
+
+- resident: go ahead
+- loading: skip the backend instead of waiting out the timeout
+- unknown or expired: ask the backend which models are loaded, and start a
+  warm-up if ours isn't
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import hook_http
+import hook_state
+import prompt_budget
+
+# Configuration
+WARMUP_ENABLED = os.getenv("CODE_HOOK_WARMUP", "1") == "1"
+KEEP_ALIVE = int(os.getenv("CODE_HOOK_KEEP_ALIVE", "3600"))  # seconds a model stays loaded after its last use
+LOAD_TIMEOUT = float(os.getenv("CODE_HOOK_LOAD_TIMEOUT", "300"))  # seconds a model load may take
+RESIDENCY_PROBE_TIMEOUT = 1.0
+
+LOCAL_SERVICES = ("ollama", "lm_studio")
+
+RESIDENT = "resident"
+LOADING = "loading"
+FAILED = "failed"
+
+def _record_path(service):
+    return os.path.join(hook_state.STATE_DIR, "models", f"{service}.json")
+
+def get_record(service):
+    """Return the stored residency record for `service`."""
+    return hook_state.read_json(_record_path(service), {})
+
+def _set_record(service, record):
+    try:
+        hook_state.write_json(_record_path(service), record)
+    except OSError as e:
+        print(f"Could not record {service} residency: {e}", file=sys.stderr)
+
+def keep_alive_options(service):
+    """Request fields asking `service` to keep its model loaded, to merge into a payload."""
+    if not WARMUP_ENABLED:
+        return {}
+    if service == "ollama":
+        return {"keep_alive": KEEP_ALIVE}
+    if service == "lm_studio":
+        return {"ttl": KEEP_ALIVE}  # Idle unload time of a just-in-time loaded model
+    return {}
+
+def runner_options(service, model):
+    """Runner options that decide how `service` loads `model`; a request that differs in them reloads it."""
+    if service == "ollama":
+        # Ollama silently truncates prompts to its default context size otherwise
+        return {"num_ctx": prompt_budget.context_window(model)}
+    return {}
+
+def warmup_request(service, model, host):
+    """Return (url, payload) of the smallest request that loads `model`."""
+    if service == "ollama":
+        # An empty prompt loads the model and returns without generating anything
+        return f"{host}/api/generate", {"model": model, "prompt": "", "stream": False,
+                                        "options": runner_options(service, model), **keep_alive_options(service)}
+    return f"{host}/v1/chat/completions", {"model": model, "messages": [{"role": "user", "content": "hi"}],
+                                           "max_tokens": 1, "stream": False, **keep_alive_options(service)}
+
+def loaded_models(service, host):
+    """Return {model: expiry timestamp or None} of the models `service` has loaded, or None if it can't say."""
+    url = f"{host}/api/ps" if service == "ollama" else f"{host}/api/v0/models"
+    try:
+        response = hook_http.get(url, timeout=RESIDENCY_PROBE_TIMEOUT)
+        if not response.ok:
+            return None
+        data = response.json()
+    except Exception:
+        return None
+
+    loaded = {}
+    if service == "ollama":
+        for entry in data.get("models", []):
+            expires = None
+            try:
+                expires = datetime.fromisoformat(entry.get("expires_at", "")).timestamp()
+            except ValueError:
+                pass  # Nanosecond timestamps don't parse everywhere; assume KEEP_ALIVE then
+            for name in (entry.get("name"), entry.get("model")):
+                if name:
+                    loaded[name] = expires
+    else:
+        loaded = {entry.get("id"): None for entry in data.get("data", []) if entry.get("state") == "loaded"}
+    return loaded
+
+def ready(service, model, host):
+    """Return True if a review may send to `service` now without hitting a cold model.
+
+    Starts a background warm-up when the model turns out not to be loaded.
+    Says True whenever residency can't be determined, so an unknown backend
+    is never skipped on a guess.
+    """
+    if not WARMUP_ENABLED or service not in LOCAL_SERVICES:
+        return True
+
+    record = get_record(service)
+    now = time.time()
+    if record.get("model") == model:
+        if record.get("state") == RESIDENT and now < record.get("expires", 0):
+            return True
+        if record.get("state") == LOADING and now - record.get("since", 0) < LOAD_TIMEOUT:
+            return False
+        if record.get("state") == FAILED and now - record.get("since", 0) < LOAD_TIMEOUT:
+            return True  # The load failed; the circuit breaker deals with a broken backend
+
+    loaded = loaded_models(service, host)
+    if loaded is None:
+        return True
+    if model in loaded:
+        expires = loaded[model] or now + KEEP_ALIVE
+        _set_record(service, {"state": RESIDENT, "model": model, "since": now, "expires": expires})
+        return True
+
+    print(f"{model} is not loaded in {service}; warming it up and skipping this review", file=sys.stderr)
+    start(service, model, host)
+    return False
+
+def touch(service, model):
+    """Note that `service` just used `model`, which keeps it loaded for another KEEP_ALIVE."""
+    if not WARMUP_ENABLED or service not in LOCAL_SERVICES:
+        return
+    record = get_record(service)
+    now = time.time()
+    if record.get("state") == RESIDENT and record.get("model") == model and \
+            record.get("expires", 0) - now > KEEP_ALIVE / 2:
+        return  # Common case: recently extended, nothing to write
+    _set_record(service, {"state": RESIDENT, "model": model, "since": now, "expires": now + KEEP_ALIVE,
+                          "load_seconds": record.get("load_seconds")})
+
+def start(service, model, host):
+    """Load `model` in a detached process, unless it is resident or already loading."""
+    path = _record_path(service)
+    now = time.time()
+    with hook_state.locked(path):
+        record = get_record(service)
+        if record.get("model") == model:
+            if record.get("state") == RESIDENT and now < record.get("expires", 0):
+                return False
+            if record.get("state") == LOADING and now - record.get("since", 0) < LOAD_TIMEOUT:
+                return False
+        _set_record(service, {"state": LOADING, "model": model, "since": now})
+
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--warm", service, model, host],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True, close_fds=True
+    )
+    return True
+
+def warm(service, model, host):
+    """Load `model` into `service` and record whether it is now resident. Blocks for the load."""
+    url, payload = warmup_request(service, model, host)
+    started = time.time()
+    try:
+        response = hook_http.post_json(url, payload, timeout=LOAD_TIMEOUT)
+        ok = response.ok
+        if not ok:
+            print(f"Warming up {model} failed: HTTP {response.status}: {response.text}", file=sys.stderr)
+    except Exception as e:
+        print(f"Warming up {model} failed: {e}", file=sys.stderr)
+        ok = False
+
+    now = time.time()
+    if ok:
+        _set_record(service, {"state": RESIDENT, "model": model, "since": now, "expires": now + KEEP_ALIVE,
+                              "load_seconds": round(now - started, 3)})
+    else:
+        _set_record(service, {"state": FAILED, "model": model, "since": now})
+    return ok
+
+def main():
+    """SessionStart hook: start loading every local model the reviews will use, then return."""
+    try:
+        json.load(sys.stdin)  # Nothing in the SessionStart payload matters here
+    except (json.JSONDecodeError, OSError):
+        pass
+    if not WARMUP_ENABLED:
+        sys.exit(0)
+
+    import code_suggestions_hook
+
+    for service in code_suggestions_hook.review_services():
+        if service in LOCAL_SERVICES:
+            start(service, code_suggestions_hook.current_model(service), code_suggestions_hook.backend_host(service))
+    sys.exit(0)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--warm"] and len(sys.argv) == 5:
+        warm(*sys.argv[2:5])
+    else:
+        main()
@@ -0,0 +1,77 @@
+"""
+Ollama conversation context, kept per (session, file).
+
+/api/generate returns a `context`: the tokens of the prompt and reply it just
+processed. Sending it back makes Ollama continue from there. The runner still
+holds those tokens in its KV cache, so it only has to read the new prompt.
+
+When an edit is reviewed as a diff-scoped excerpt, the hook sends the stored
+context with a short follow-up prompt. The model then sees the file it
+reviewed earlier without re-reading the instructions or the file.
+
+A whole-file review starts afresh. Its prompt keeps the stable part first,
+and Ollama's own prefix cache already skips the unchanged head of the file.
+Appending the whole file to the old context would be slower.
+
+Contexts go stale once Ollama unloads the model, when they would have to be
+read from scratch. They are therefore only reused for CODE_HOOK_OLLAMA_CONTEXT_TTL
+seconds, which matches Ollama's default keep_alive.
+"""
+
+import contextlib
+import hashlib
+import os
+import time
+
+import hook_state
+import prompt_budget
+
+# Configuration
+OLLAMA_CONTEXT = os.getenv("CODE_HOOK_OLLAMA_CONTEXT", "1") == "1"
+CONTEXT_TTL = int(os.getenv("CODE_HOOK_OLLAMA_CONTEXT_TTL", "300"))  # seconds
+
+def conversation(session_id, file_path, follow_up=False):
+    """Identify the (session, file) a review belongs to, or None when contexts are off.
+
+    `follow_up` says whether this review may continue from the stored context
+    (a diff-scoped excerpt) or must start afresh (the whole file).
+    """
+    if not OLLAMA_CONTEXT or not session_id or not file_path:
+        return None
+    key = hashlib.sha1(f"{session_id}\0{file_path}".encode("utf-8")).hexdigest()
+    return {"key": key, "follow_up": follow_up}
+
+def _record_path(conv):
+    return hook_state.state_path("ollama_context", f"{conv['key']}.json")
+
+def load(conv, model):
+    """Return the stored context to continue `conv` with `model`, or None."""
+    if not conv or not conv["follow_up"]:
+        return None
+    record = hook_state.read_json(_record_path(conv))
+    if not isinstance(record, dict) or record.get("model") != model:
+        return None
+    if time.time() - record.get("ts", 0) > CONTEXT_TTL:
+        return None  # The model has likely been unloaded; re-reading the context costs more than it saves
+    context = record.get("context")
+    return context if isinstance(context, list) and context else None
+
+def fits(context, prompt_tokens, model, max_tokens):
+    """True if `context` plus the new prompt and the reply fit in `model`'s window."""
+    return len(context) + prompt_tokens <= prompt_budget.code_budget(model, max_tokens)
+
+def save(conv, model, context):
+    """Store the `context` Ollama returned as the continuation point of `conv`."""
+    if not conv or not isinstance(context, list) or not context:
+        return
+    try:
+        hook_state.write_json(_record_path(conv), {"model": model, "ts": time.time(), "context": context})
+    except OSError:
+        pass  # Worst case the next review starts afresh
+
+def forget(conv):
+    """Drop the stored context of `conv` (it no longer fits, or the model lost it)."""
+    if not conv:
+        return
+    with contextlib.suppress(OSError):
+        os.unlink(_record_path(conv))
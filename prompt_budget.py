@@ -0,0 +1,129 @@
+"""
+Token-budget-aware prompt builder shared by the hooks.
+
+Estimates token counts locally (no tokenizer download, no network), knows the
+context window of the models we ship defaults for, and fits the code into
+what is left after the prompt template and the reply's `max_tokens`. When the
+code doesn't fit, lines are kept by priority: changed regions first, then
+signatures and imports, then everything else in file order. Omitted stretches
+are marked so the model knows code is missing.
+"""
+
+import math
+import os
+import re
+
+# Configuration
+CONTEXT_TOKENS = int(os.getenv("CODE_HOOK_CONTEXT_TOKENS", "0"))  # 0 = use MODEL_CONTEXT
+DEFAULT_CONTEXT_TOKENS = 8192
+SAFETY_MARGIN = 0.05  # Our estimate is approximate; leave some room
+CHARS_PER_TOKEN = 3  # Conservative average for source code
+
+# Context windows of the default models. LM Studio and Ollama serve whatever
+# context length the model was loaded with, so set CODE_HOOK_CONTEXT_TOKENS
+# if yours differs.
+MODEL_CONTEXT = {
+    "x-ai/grok-code-fast-1": 256000,
+    "nousresearch/hermes-4-70b": 131072,
+    "codellama:7b": 16384,
+    "swallowmaid-8b-l3-sppo-abliterated@q8_0": 8192,
+}
+
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d+|\n|[^\sA-Za-z\d]")
+_SIGNATURE = re.compile(
+    r"^\s*(?:@|#include|#define|import\s|from\s\S+\simport|using\s|use\s|package\s|require|"
+    r"(?:export\s+|pub(?:\(\w+\))?\s+|public\s+|private\s+|protected\s+|static\s+|async\s+|abstract\s+)*"
+    r"(?:def|class|function|fn|func|struct|enum|trait|impl|interface|type|module|object|"
+    r"CREATE|ALTER)\b)"
+)
+
+def estimate_tokens(text):
+    """Roughly count BPE tokens: words split every few letters, one per symbol."""
+    count = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        if piece[0].isalpha() or piece[0].isdigit():
+            count += math.ceil(len(piece) / 4)
+        else:
+            count += 1
+    return count
+
+def context_window(model):
+    """Return the context window in tokens for `model`."""
+    if CONTEXT_TOKENS > 0:
+        return CONTEXT_TOKENS
+    return MODEL_CONTEXT.get(model, DEFAULT_CONTEXT_TOKENS)
+
+def code_budget(model, max_tokens, overhead_tokens=0):
+    """Tokens left for code once the reply and the rest of the prompt are accounted for."""
+    window = context_window(model)
+    usable = int(window * (1 - SAFETY_MARGIN))
+    return max(0, usable - max_tokens - overhead_tokens)
+
+def _line_priority(line, index, changed):
+    for first, last in changed:
+        if first <= index <= last:
+            return 0
+    if _SIGNATURE.match(line):
+        return 1
+    return 2
+
+def fit_to_budget(content, budget_tokens, changed=None):
+    """Return `content` cut down to about `budget_tokens`, keeping the most useful lines.
+
+    `changed` is a list of 0-based (first_line, last_line) ranges that must be
+    kept first. Kept lines stay in file order; gaps become "... N lines omitted ...".
+    """
+    if estimate_tokens(content) <= budget_tokens:
+        return content
+
+    lines = content.split("\n")
+    costs = [estimate_tokens(line) + 1 for line in lines]
+    marker_cost = estimate_tokens(f"... {len(lines)} lines omitted ...") + 1
+    changed = changed or []
+
+    def omitted(i):
+        return 0 <= i < len(lines) and i not in keep
+
+    priorities = [_line_priority(line, i, changed) for i, line in enumerate(lines)]
+    order = sorted(range(len(lines)), key=lambda i: (priorities[i], i))
+    keep = set()
+    spent = marker_cost  # Everything starts out as one omitted stretch
+    full_tier = None
+    for i in order:
+        # Once a line doesn't fit, lower priorities must not take its place
+        if full_tier is not None and priorities[i] > full_tier:
+            break
+        # Keeping line i splits, shrinks or closes the gap it sits in
+        gap_delta = (omitted(i - 1) and omitted(i + 1)) - (not omitted(i - 1) and not omitted(i + 1))
+        cost = costs[i] + gap_delta * marker_cost
+        if spent + cost > budget_tokens:
+            full_tier = priorities[i]
+            continue
+        keep.add(i)
+        spent += cost
+
+    out = []
+    skipped = 0
+    for i, line in enumerate(lines):
+        if i in keep:
+            if skipped:
+                out.append(f"... {skipped} lines omitted ...")
+                skipped = 0
+            out.append(line)
+        else:
+            skipped += 1
+    if skipped:
+        out.append(f"... {skipped} lines omitted ...")
+    return "\n".join(out)
+
+def build_prompt(template, code, file_name, model, max_tokens, changed=None, extra="", appendix=""):
+    """Fill `template` ({file_name}, {code}) with as much of `code` as the model can take.
+
+    `extra` is any other text sent alongside (such as a system message) that
+    also eats into the context window. `appendix` is added after the filled
+    template, where it doesn't disturb the prompt's cacheable prefix.
+    """
+    overhead = (estimate_tokens(template.format(file_name=file_name, code="")) + estimate_tokens(extra)
+                + estimate_tokens(appendix))
+    budget = code_budget(model, max_tokens, overhead)
+    return template.format(file_name=file_name, code=fit_to_budget(code, budget, changed)) + appendix
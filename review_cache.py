@@ -0,0 +1,126 @@
+"""
+Content-addressed review cache for code_suggestions_hook.
+
+Reviews are stored on disk under a SHA-256 of (normalized content, file name,
+service, model, prompt version), so rewriting a file to identical content or
+reverting an edit returns the earlier suggestions without a network call.
+Entries are evicted by age and, least recently used first, by total size.
+Every write is atomic, so several hook processes can share the cache.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+import hook_state
+
+# Configuration
+CACHE_ENABLED = os.getenv("CODE_HOOK_CACHE", "1") != "0"
+CACHE_DIR = os.path.expanduser(os.getenv("CODE_HOOK_CACHE_DIR", "")) or os.path.join(hook_state.STATE_DIR, "review_cache")
+CACHE_MAX_BYTES = int(os.getenv("CODE_HOOK_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_MAX_AGE = int(os.getenv("CODE_HOOK_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # seconds
+EVICT_INTERVAL = 60  # seconds between full scans of the cache directory
+
+def normalize_content(content):
+    """Ignore line-ending and trailing-whitespace noise when hashing content."""
+    lines = content.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+def cache_key(content, file_name, service, model, prompt_version):
+    """Return the hex digest that identifies one review."""
+    h = hashlib.sha256()
+    for part in (prompt_version, service, model, file_name, normalize_content(content)):
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, key[:2], key + ".json")
+
+def get(key):
+    """Return the cached suggestions for `key`, or None on a miss."""
+    if not CACHE_ENABLED:
+        return None
+
+    path = _entry_path(key)
+    entry = hook_state.read_json(path)
+    if not entry:
+        return None
+
+    if time.time() - entry.get("created", 0) > CACHE_MAX_AGE:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        return None
+
+    try:
+        os.utime(path)  # Mark as recently used for LRU eviction
+    except OSError:
+        pass
+    return entry.get("suggestions")
+
+def put(key, suggestions):
+    """Store `suggestions` under `key` and trim the cache if it has grown too big."""
+    if not CACHE_ENABLED or not suggestions:
+        return
+
+    entry = {"created": time.time(), "suggestions": suggestions}
+    try:
+        hook_state.atomic_write(_entry_path(key), json.dumps(entry).encode("utf-8"))
+        evict()
+    except OSError as e:
+        print(f"Review cache write failed: {e}", file=sys.stderr)
+
+def evict():
+    """Drop expired entries, then the least recently used ones until under the size limit."""
+    # One process trimming at a time is plenty; the others just skip it
+    with hook_state.locked(os.path.join(CACHE_DIR, "evict"), blocking=False) as acquired:
+        if not acquired:
+            return
+
+        # Scanning the whole cache on every write would cost more than it saves
+        marker = os.path.join(CACHE_DIR, "last_evict")
+        now = time.time()
+        try:
+            if now - os.stat(marker).st_mtime < EVICT_INTERVAL:
+                return
+        except OSError:
+            pass
+        with open(marker, "w"):
+            pass
+
+        entries = []
+        total = 0
+        for root, _dirs, files in os.walk(CACHE_DIR):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if now - st.st_mtime > CACHE_MAX_AGE:
+                    _remove(path)
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        if total <= CACHE_MAX_BYTES:
+            return
+
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= CACHE_MAX_BYTES:
+                break
+            _remove(path)
+            total -= size
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,129 @@
+"""
+AST-aware chunking and parallel fan-out review for large files.
+
+Large files are split at top-level function and class boundaries (Python's
+`ast` for .py files, a blank-line/indentation heuristic for the rest) and the
+chunks are reviewed concurrently on a bounded worker pool, so wall time
+follows the largest chunk rather than the size of the file.
+"""
+
+import ast
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import hook_http
+import hook_metrics
+
+# Configuration
+CHUNK_CHARS = int(os.getenv("CODE_HOOK_CHUNK_CHARS", "12000"))
+MAX_WORKERS = int(os.getenv("CODE_HOOK_MAX_WORKERS", "4"))
+
+_CLOSERS = ("}", ")", "]", "end", "fi", "done", "esac")
+
+def python_block_starts(content):
+    """Return the 0-based first line of every top-level statement, or None on a syntax error."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    starts = []
+    for node in tree.body:
+        first = node.lineno
+        for decorator in getattr(node, "decorator_list", []):
+            first = min(first, decorator.lineno)
+        starts.append(first - 1)
+    return starts
+
+def heuristic_block_starts(lines):
+    """Guess top-level block starts: an unindented line after a blank line or a closing line."""
+    starts = [0]
+    for i in range(1, len(lines)):
+        line = lines[i]
+        if not line.strip() or line[0].isspace() or line.lstrip().startswith(_CLOSERS):
+            continue
+        previous = lines[i - 1].strip()
+        if not previous or previous.startswith(_CLOSERS):
+            starts.append(i)
+    return starts
+
+def top_level_blocks(content, file_path):
+    """Return (first_line, last_line) ranges that cover the file block by block.
+
+    Comments and blank lines between blocks stay with the block that follows.
+    """
+    lines = content.split("\n")
+    starts = None
+    if file_path and file_path.lower().endswith(".py"):
+        starts = python_block_starts(content)
+    if not starts:
+        starts = heuristic_block_starts(lines)
+
+    starts = sorted(set([0] + starts))
+    ends = [s - 1 for s in starts[1:]] + [len(lines) - 1]
+    return list(zip(starts, ends))
+
+def _block_size(lines, first, last):
+    return sum(len(line) + 1 for line in lines[first:last + 1])
+
+def split_chunks(content, file_path, max_chars=None):
+    """Split `content` into chunks of whole top-level blocks, each about `max_chars` or less.
+
+    Returns a list of chunk texts, each headed with its line range so that
+    findings still point at the right place. Small files come back as-is.
+    """
+    max_chars = CHUNK_CHARS if max_chars is None else max_chars
+    if len(content) <= max_chars:
+        return [content]
+
+    lines = content.split("\n")
+    ranges = []
+    for first, last in top_level_blocks(content, file_path):
+        # A single oversized block is cut into line ranges that fit
+        while _block_size(lines, first, last) > max_chars and first < last:
+            cut = first
+            size = 0
+            while cut < last and size + len(lines[cut]) + 1 <= max_chars:
+                size += len(lines[cut]) + 1
+                cut += 1
+            cut = max(cut, first + 1)
+            ranges.append((first, cut - 1))
+            first = cut
+        ranges.append((first, last))
+
+    # Greedily pack consecutive ranges into chunks
+    packed = []
+    for first, last in ranges:
+        if packed and _block_size(lines, packed[-1][0], last) <= max_chars:
+            packed[-1] = (packed[-1][0], last)
+        else:
+            packed.append((first, last))
+
+    total = len(packed)
+    return [
+        f"Part {i} of {total}, lines {first + 1}-{last + 1} of {len(lines)}:\n"
+        + "\n".join(lines[first:last + 1])
+        for i, (first, last) in enumerate(packed, 1)
+    ]
+
+def review_in_parallel(chunks, review_fn, max_workers=None):
+    """Run `review_fn(chunk)` for every chunk on a bounded pool; results keep chunk order."""
+    max_workers = max(1, min(MAX_WORKERS if max_workers is None else max_workers, len(chunks)))
+
+    # Worker threads must honour the caller's cancellation too, and report to its trace
+    token = hook_http.current_token()
+    trace = hook_metrics.current()
+
+    def safe_review(chunk):
+        try:
+            with hook_http.cancel_scope(token), hook_metrics.use(trace):
+                return review_fn(chunk)
+        except Exception as e:
+            print(f"Chunk review failed: {e}", file=sys.stderr)
+            return None
+
+    if max_workers == 1:
+        return [safe_review(chunk) for chunk in chunks]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(safe_review, chunks))
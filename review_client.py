@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Claude Code Hook: thin client for the HookedOnCode review daemon
+
+Forwards the PostToolUse JSON on stdin to review_daemon.py over a Unix socket
+and prints the reply. If the daemon isn't running, the review runs in-process
+through code_suggestions_hook exactly as before.
+
+With CODE_HOOK_DAEMON_ADDR set, the payload goes to a team daemon over TCP
+instead. The shared token goes first on a line of its own, so the daemon can
+turn strangers away unread; the payload then carries the tenant to queue it
+for, and for edits the edited file itself, which the daemon can't read.
+"""
+
+import os
+import socket
+import sys
+import tempfile
+
+import fast_reject
+
+# Configuration
+SOCKET_PATH = os.getenv(
+    "CODE_HOOK_SOCKET",
+    os.path.join(tempfile.gettempdir(), f"hookedoncode-{os.getuid()}.sock")
+)
+DAEMON_ADDR = os.getenv("CODE_HOOK_DAEMON_ADDR", "")  # "host:port" of a team daemon
+DAEMON_TOKEN = os.getenv("CODE_HOOK_DAEMON_TOKEN", "")
+TENANT = os.getenv("CODE_HOOK_TENANT", "")  # who the team daemon queues our reviews for; default: login name
+# Stay under the hook timeout in settings.json so Claude never kills us first
+CLIENT_TIMEOUT = float(os.getenv("CODE_HOOK_CLIENT_TIMEOUT", "28"))
+CONNECT_TIMEOUT = 2.0  # seconds before an unreachable team daemon counts as not running
+
+def remote_payload(payload):
+    """Return `payload` as a team daemon on another machine needs it: after the token line, with tenant and file."""
+    import getpass
+    import json
+
+    input_data = json.loads(payload)
+    input_data["tenant"] = TENANT or getpass.getuser()
+    tool_input = input_data.get("tool_input", {})
+    file_path = tool_input.get("file_path", "") or tool_input.get("filePath", "")
+    if input_data.get("tool_name") in ("Edit", "MultiEdit") and file_path:
+        try:
+            with open(os.path.join(input_data.get("cwd") or "", file_path), "r", encoding="utf-8") as f:
+                input_data["file_content"] = f.read()
+        except (OSError, UnicodeDecodeError):
+            pass  # The daemon rejects the edit and we exit quietly
+    return DAEMON_TOKEN.encode("utf-8") + b"\n" + json.dumps(input_data).encode("utf-8")
+
+def connect():
+    """Return a socket connected to the daemon, or None if it isn't running."""
+    if DAEMON_ADDR:
+        host, _, port = DAEMON_ADDR.rpartition(":")
+        try:
+            return socket.create_connection((host or "127.0.0.1", int(port)), timeout=CONNECT_TIMEOUT)
+        except (OSError, ValueError):
+            return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(SOCKET_PATH)
+        return sock
+    except OSError:
+        sock.close()
+        return None
+
+def ask_daemon(payload):
+    """Send `payload` to the daemon and return its reply, or None if it isn't running."""
+    sock = connect()
+    if sock is None:
+        return None
+
+    try:
+        if DAEMON_ADDR:
+            payload = remote_payload(payload)
+        sock.settimeout(CLIENT_TIMEOUT)
+        sock.sendall(payload)
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+    except socket.timeout:
+        print("Review daemon timed out", file=sys.stderr)
+        return b""
+    except (OSError, ValueError) as e:
+        print(f"Review daemon error: {e}", file=sys.stderr)
+        return b""
+    finally:
+        sock.close()
+
+def main():
+    payload = sys.stdin.buffer.read()
+    if fast_reject.not_interested(payload.decode("utf-8", errors="replace")):
+        sys.exit(0)  # Not worth a round trip to the daemon
+
+    reply = ask_daemon(payload)
+    if reply is None:
+        # No daemon: fall back to the in-process review
+        import code_suggestions_hook
+        code_suggestions_hook.main(payload.decode("utf-8"))
+        return
+
+    if reply:
+        sys.stdout.write(reply.decode("utf-8"))
+        sys.stdout.write("\n")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
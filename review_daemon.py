@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+HookedOnCode Review Daemon
+
+Keeps code_suggestions_hook loaded in one long-lived process so config,
+connections and caches survive between edits. review_client.py forwards each
+PostToolUse payload over a Unix socket and prints whatever comes back.
+
+With CODE_HOOK_DAEMON_LISTEN set, the daemon also accepts reviews over TCP
+from a whole team sharing one LM Studio or Ollama box. Every request, local
+or remote, is queued in a review_scheduler.FairScheduler, so one person's
+burst of edits can't starve the others.
+
+Usage:
+    python3 review_daemon.py          # serve until Ctrl-C / SIGTERM
+    nohup python3 review_daemon.py &  # keep it around in the background
+"""
+
+import functools
+import hmac
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+import code_suggestions_hook
+import hook_debug
+import hook_http
+import hook_metrics
+import latency_stats
+import review_queue
+import review_scheduler
+
+# Configuration
+WORKERS = int(os.getenv("CODE_HOOK_DAEMON_WORKERS", "4"))  # reviews run at once, live and deferred
+SOCKET_PATH = os.getenv(
+    "CODE_HOOK_SOCKET",
+    os.path.join(tempfile.gettempdir(), f"hookedoncode-{os.getuid()}.sock")
+)
+LISTEN = os.getenv("CODE_HOOK_DAEMON_LISTEN", "")  # "host:port" to serve a team over TCP as well; a bare port binds 127.0.0.1
+DAEMON_TOKEN = os.getenv("CODE_HOOK_DAEMON_TOKEN", "")  # shared secret TCP clients must send
+FAIR_BY = os.getenv("CODE_HOOK_FAIR_BY", "user")  # "user" or "session": who gets an equal share
+REMOTE_TIMEOUT = float(os.getenv("CODE_HOOK_DAEMON_REMOTE_TIMEOUT", "10"))  # seconds a TCP client may stall sending
+MAX_CONNECTIONS = int(os.getenv("CODE_HOOK_DAEMON_MAX_CONNECTIONS", "64"))  # TCP connections handled at once
+MAX_REQUEST_BYTES = 64 * 1024 * 1024  # A Write payload carries the whole file
+MAX_TOKEN_BYTES = 1024
+
+def read_token(sock):
+    """Read the token line a TCP client sends ahead of its payload; return (token, start of the payload)."""
+    data = b""
+    while b"\n" not in data:
+        chunk = sock.recv(MAX_TOKEN_BYTES)
+        if not chunk:
+            break
+        data += chunk
+        if len(data) > MAX_TOKEN_BYTES and b"\n" not in data:
+            raise ValueError("token line too long")
+    token, _, rest = data.partition(b"\n")
+    return token, rest
+
+def read_request(sock, data=b""):
+    """Read the client's payload, after `data` already received, until it shuts down its write side."""
+    chunks = [data]
+    size = len(data)
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > MAX_REQUEST_BYTES:
+            raise ValueError("request too large")
+        chunks.append(chunk)
+    return b"".join(chunks).decode("utf-8")
+
+def authorized(token):
+    """Check the shared token a TCP client must send."""
+    return hmac.compare_digest(token, DAEMON_TOKEN.encode("utf-8"))
+
+def tenant_of(input_data):
+    """Return who the request is queued for: the client's user, and its session with FAIR_BY=session."""
+    tenant = str(input_data.get("tenant") or "local")
+    if FAIR_BY == "session":
+        tenant += "/" + str(input_data.get("session_id") or "default")
+    return tenant
+
+def schedule(scheduler, input_data, size):
+    """Queue the review of `input_data` fairly and wait for it; return the hook output or None."""
+    deadline = time.monotonic() + latency_stats.HOOK_TIMEOUT - latency_stats.DEADLINE_MARGIN
+    trace = hook_metrics.current()
+
+    def run():
+        with hook_metrics.use(trace), hook_debug.run("code_suggestions_daemon"), \
+                hook_http.cancel_scope(hook_http.CancelToken(deadline)):
+            hook_debug.log("input", input=input_data)
+            return code_suggestions_hook.review(input_data)
+
+    tenant = tenant_of(input_data)
+    key = f"{input_data.get('session_id')}|{code_suggestions_hook.absolute_path(input_data)}"
+    job = scheduler.submit(tenant, run, cost=size / 1024, deadline=deadline, key=key)
+    # A running review stops at its deadline on its own; the margin covers sending the reply
+    output = job.wait(max(0.0, deadline - time.monotonic()) + latency_stats.DEADLINE_MARGIN)
+    scheduler.cancel(job)
+
+    hook_metrics.annotate(tenant=tenant, queue_depth=job.depth)
+    if job.waited is not None:
+        hook_metrics.stage("queue_wait", job.waited * 1000)
+    if job.status in (review_scheduler.EXPIRED, review_scheduler.SUPERSEDED):
+        hook_metrics.annotate(skipped=job.status)
+        print(f"Review for {tenant} {job.status} while queued", file=sys.stderr)
+    return output
+
+def defer(scheduler, input_data, job, delay):
+    """Queue a deferred review as backlog of its tenant, due once its debounce period is over."""
+    scheduler.submit(tenant_of(input_data), job, cost=len(json.dumps(input_data)) / 1024, backlog=True,
+                     not_before=time.monotonic() + delay)
+
+class ReviewHandler(socketserver.BaseRequestHandler):
+    """Run one hook payload through code_suggestions_hook.review(), queued behind other tenants' reviews."""
+
+    def handle(self):
+        try:
+            start = b""
+            if self.server.remote:
+                # Don't let a stalled or unknown client hold a thread or make us buffer its body
+                self.request.settimeout(REMOTE_TIMEOUT)
+                token, start = read_token(self.request)
+                if not authorized(token):
+                    print(f"Rejected request from {self.client_address[0]}: bad daemon token", file=sys.stderr)
+                    return
+            with hook_metrics.trace("code_suggestions_daemon"):
+                with hook_metrics.span("parse_input"):
+                    raw = read_request(self.request, start)
+                    input_data = json.loads(raw)
+                output = None
+                if (self.server.remote and input_data.get("tool_name") in ("Edit", "MultiEdit")
+                      and "file_content" not in input_data):
+                    # The file lives on the client's machine, not ours
+                    print("Rejected remote edit without file_content", file=sys.stderr)
+                else:
+                    # Set by us, never by the client: paths in a remote request are on another machine
+                    input_data.pop("remote_client", None)
+                    if self.server.remote:
+                        input_data["remote_client"] = str(input_data.get("tenant") or "remote")
+                    output = schedule(self.server.scheduler, input_data, len(raw))
+        except Exception as e:
+            print(f"Review daemon error: {e}", file=sys.stderr)
+            output = None
+
+        # An empty reply tells the client to exit quietly
+        if output:
+            self.request.sendall(json.dumps(output).encode("utf-8"))
+
+class ReviewServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    remote = False
+
+class TeamReviewServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Accepts reviews from other machines; every request must start with CODE_HOOK_DAEMON_TOKEN."""
+    daemon_threads = True
+    allow_reuse_address = True
+    remote = True
+
+    def __init__(self, *args, **kwargs):
+        self.connections = threading.BoundedSemaphore(MAX_CONNECTIONS)
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request, client_address):
+        if not self.connections.acquire(blocking=False):
+            print(f"Dropped connection from {client_address[0]}: too many open", file=sys.stderr)
+            self.shutdown_request(request)
+            return
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.connections.release()
+
+def socket_in_use(path):
+    """Return True if another daemon is already answering on `path`."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+def listen_address(listen):
+    """Split "host:port" (or just a port, bound to localhost) into a TCPServer address."""
+    host, _, port = listen.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def serve(path=SOCKET_PATH, listen=LISTEN):
+    """Bind the socket (and the TCP address, if any) and serve requests until interrupted."""
+    if listen and not DAEMON_TOKEN:
+        print("CODE_HOOK_DAEMON_LISTEN needs CODE_HOOK_DAEMON_TOKEN; refusing to serve without it",
+              file=sys.stderr)
+        sys.exit(1)
+
+    if os.path.exists(path):
+        if socket_in_use(path):
+            print(f"Review daemon already running on {path}", file=sys.stderr)
+            sys.exit(1)
+        os.unlink(path)  # Stale socket from a crashed daemon
+
+    old_umask = os.umask(0o177)  # Socket is for this user only
+    try:
+        server = ReviewServer(path, ReviewHandler)
+    finally:
+        os.umask(old_umask)
+    servers = [server]
+    if listen:
+        servers.append(TeamReviewServer(listen_address(listen), ReviewHandler))
+
+    # One set of workers for everything: live reviews from every tenant, then each tenant's deferred ones
+    scheduler = review_scheduler.FairScheduler(WORKERS)
+    for each in servers:
+        each.scheduler = scheduler
+    review_queue.use_runner(functools.partial(defer, scheduler))
+
+    # Turn SIGTERM into a clean shutdown so the socket file gets removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    for each in servers[1:]:
+        threading.Thread(target=each.serve_forever, daemon=True).start()
+    where = path + (f" and {listen}" if listen else "")
+    print(f"Review daemon listening on {where} (service: {code_suggestions_hook.USE_SERVICE})",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for each in servers:
+            each.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,83 @@
+"""
+Hedged requests across several review backends.
+
+The primary backend gets the request first. If it hasn't answered within the
+hedge delay, or fails outright, the next backend in the list is tried as
+well, and so on. The first usable answer wins and every other request still
+in flight is cancelled. With a delay of zero all backends race from the start.
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+
+import hook_http
+import hook_metrics
+
+# Configuration
+HEDGE_SERVICES = [s.strip() for s in os.getenv("CODE_HOOK_HEDGE", "").split(",") if s.strip()]
+HEDGE_DELAY_MS = int(os.getenv("CODE_HOOK_HEDGE_DELAY_MS", "2000"))
+HEDGE_RACE = os.getenv("CODE_HOOK_HEDGE_RACE", "0") == "1"  # Fire every backend at once
+POLL_INTERVAL = 0.1  # seconds between checks of the caller's own cancellation
+
+def first_result(attempts, delay=None):
+    """Run `attempts` ([(name, fn), ...]) hedged and return (name, result) of the first usable one.
+
+    A result is usable if it is truthy. Returns (None, None) if every attempt
+    fails or the caller's own CancelToken is cancelled.
+    """
+    if delay is None:
+        delay = 0.0 if HEDGE_RACE else HEDGE_DELAY_MS / 1000.0
+
+    parent = hook_http.current_token()
+    trace = hook_metrics.current()
+    results = queue.Queue()
+    tokens = []
+
+    def run(name, fn, token):
+        try:
+            with hook_http.cancel_scope(token), hook_metrics.use(trace):
+                value = fn()
+        except Exception as e:
+            print(f"Hedged request to {name} failed: {e}", file=sys.stderr)
+            value = None
+        results.put((name, value))
+
+    def launch():
+        name, fn = attempts[len(tokens)]
+        token = parent.child() if parent is not None else hook_http.CancelToken()
+        tokens.append(token)
+        threading.Thread(target=run, args=(name, fn, token), daemon=True).start()
+
+    finished = 0
+    next_launch = time.monotonic()
+    try:
+        while finished < len(attempts):
+            now = time.monotonic()
+            if len(tokens) < len(attempts) and now >= next_launch:
+                launch()
+                next_launch = now + delay
+                continue
+
+            if parent is not None and parent.cancelled:
+                return None, None
+
+            wait = POLL_INTERVAL
+            if len(tokens) < len(attempts):
+                wait = min(wait, max(0.0, next_launch - now))
+            try:
+                name, value = results.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+            finished += 1
+            if value:
+                return name, value
+            # That backend failed fast: don't make the next one wait out the delay
+            next_launch = time.monotonic()
+        return None, None
+    finally:
+        for token in tokens:
+            token.cancel()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Deferred-review queue for code_suggestions_hook.
+
+In deferred mode the hook only writes the payload to a per-session job file
+and returns at once; a detached worker (or a thread in review_daemon.py)
+runs the review and drops the result next to it. The next hook invocation
+in the same session picks up every finished result and adds it to its
+systemMessage, so edits never wait on the LLM round trip.
+
+Rapid edits to the same file are coalesced: each job waits for a quiet
+period and is dropped if a newer edit of that file was queued meanwhile; a
+review already in flight is cancelled when it gets superseded, and a stale
+result is never delivered. Only the latest content gets reviewed.
+
+Usage (run by the hook, not by hand):
+    python3 review_queue.py <job-file>
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import hook_http
+import hook_state
+
+# Configuration
+DEFERRED = os.getenv("CODE_HOOK_DEFERRED", "0") == "1"
+RESULT_TTL = int(os.getenv("CODE_HOOK_DEFERRED_TTL", "3600"))  # seconds a result waits for delivery
+DEBOUNCE_MS = int(os.getenv("CODE_HOOK_DEBOUNCE_MS", "1500"))  # quiet period before reviewing a file
+SUPERSEDE_POLL = 0.2  # seconds between checks for a newer edit while a review is in flight
+
+# Set by review_daemon.py so deferred jobs run on its threads instead of new processes
+_runner = None
+
+def use_runner(runner):
+    """Hand deferred jobs to `runner(input_data, job, delay)` instead of starting worker processes.
+
+    `job()` reviews the edit; the runner should call it no sooner than
+    `delay` seconds from now, once the debounce period has passed.
+    """
+    global _runner
+    _runner = runner
+
+def _session_dir(session_id, kind):
+    safe_id = "".join(c for c in (session_id or "default") if c.isalnum() or c in "-_") or "default"
+    return os.path.join(hook_state.STATE_DIR, "deferred", safe_id, kind)
+
+def _new_name():
+    return f"{time.time():.6f}-{uuid.uuid4().hex[:8]}.json"
+
+def _file_key(input_data):
+    """Identify the edited file by absolute path, across sessions."""
+    tool_input = input_data.get("tool_input", {})
+    file_path = tool_input.get("file_path", "") or tool_input.get("filePath", "")
+    file_path = os.path.abspath(os.path.join(input_data.get("cwd") or "", file_path))
+    return hashlib.sha1(file_path.encode("utf-8")).hexdigest()
+
+def _latest_path(file_key):
+    return os.path.join(hook_state.STATE_DIR, "coalesce", file_key + ".json")
+
+def is_superseded(job_path, file_key):
+    """True once a newer edit of the same file has been queued after `job_path`."""
+    latest = hook_state.read_json(_latest_path(file_key), {})
+    return latest.get("job") not in (None, os.path.basename(job_path))
+
+def enqueue(input_data):
+    """Queue `input_data` for review in the background and return the job path."""
+    job_path = os.path.join(_session_dir(input_data.get("session_id"), "jobs"), _new_name())
+    file_key = _file_key(input_data)
+    hook_state.write_json(job_path, {"queued": time.time(), "file_key": file_key, "input": input_data})
+    # Last writer wins: any older job for this file now knows it is stale
+    hook_state.write_json(_latest_path(file_key), {"job": os.path.basename(job_path)})
+
+    if _runner is not None:
+        _runner(input_data, lambda: run_job(job_path), DEBOUNCE_MS / 1000.0)
+    else:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), job_path],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True, close_fds=True
+        )
+    return job_path
+
+def run_job(job_path):
+    """Review one queued job and store its message for the next hook invocation."""
+    import code_suggestions_hook
+
+    job = hook_state.read_json(job_path)
+    if not job:
+        return
+    input_data = job["input"]
+    file_key = job["file_key"]
+
+    token = hook_http.CancelToken()
+    done = threading.Event()
+
+    def watch_for_newer_edit():
+        while not done.wait(SUPERSEDE_POLL):
+            if is_superseded(job_path, file_key):
+                token.cancel()
+                return
+
+    try:
+        # Let a burst of edits settle; a newer job will review the final content
+        time.sleep(max(0.0, job["queued"] + DEBOUNCE_MS / 1000.0 - time.time()))
+        if is_superseded(job_path, file_key):
+            return
+
+        watcher = threading.Thread(target=watch_for_newer_edit, daemon=True)
+        watcher.start()
+        with hook_http.cancel_scope(token):
+            message = code_suggestions_hook.review_file(input_data)
+        done.set()
+
+        if message and not token.cancelled and not is_superseded(job_path, file_key):
+            result_path = os.path.join(_session_dir(input_data.get("session_id"), "results"), _new_name())
+            hook_state.write_json(result_path, {"finished": time.time(), "message": message})
+    except Exception as e:
+        print(f"Deferred review failed: {e}", file=sys.stderr)
+    finally:
+        done.set()
+        try:
+            os.unlink(job_path)
+        except OSError:
+            pass
+
+def collect_results(session_id):
+    """Return the messages of all finished reviews for `session_id`, removing them."""
+    results_dir = _session_dir(session_id, "results")
+    try:
+        names = sorted(os.listdir(results_dir))
+    except OSError:
+        return []
+
+    messages = []
+    now = time.time()
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(results_dir, name)
+        # Claim the file first so two hooks running at once don't both deliver it
+        claimed = path + ".claimed"
+        try:
+            os.rename(path, claimed)
+        except OSError:
+            continue
+        result = hook_state.read_json(claimed)
+        try:
+            os.unlink(claimed)
+        except OSError:
+            pass
+        if result and now - result.get("finished", 0) <= RESULT_TTL:
+            messages.append(result["message"])
+    return messages
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__, file=sys.stderr)
+        sys.exit(2)
+    run_job(sys.argv[1])
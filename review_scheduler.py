@@ -0,0 +1,223 @@
+"""
+Fair scheduling of review jobs in the review daemon.
+
+When several developers share one daemon in front of one LM Studio or Ollama
+box, first-come first-served lets one person's burst of edits starve
+everyone else. The daemon instead queues jobs per tenant (a user, or a
+session) and runs them on a fixed number of worker threads:
+
+- Tenants take turns by deficit round robin. Each turn a tenant earns
+  CODE_HOOK_DRR_QUANTUM times its weight, and each job it runs costs its
+  size in KB. A tenant sending big files gets fewer reviews, not more
+  backend time.
+- Within a tenant the newest edit goes first. A queued job for a file is
+  dropped when a newer one for the same file arrives, because its review
+  would be stale.
+- Live hook requests go before deferred reviews (the backlog), which take
+  turns among tenants the same way. A deferred review isn't due until its
+  debounce period has passed, so it never holds a worker while it waits.
+- A job whose deadline passed while it was queued is dropped: the hook
+  has already given up on it.
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+
+# Configuration
+QUANTUM = float(os.getenv("CODE_HOOK_DRR_QUANTUM", "16"))  # KB of code a tenant may send per turn
+TENANT_WEIGHTS = {
+    name.strip(): float(weight)
+    for name, _, weight in (item.partition("=") for item in os.getenv("CODE_HOOK_TENANT_WEIGHTS", "").split(","))
+    if name.strip() and weight
+}  # "alice=2,ci=0.5": share of the backend relative to the default of 1
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+EXPIRED = "expired"
+SUPERSEDED = "superseded"
+
+class Job:
+    """One queued review: who asked, what it costs, and when it stops being worth running."""
+
+    def __init__(self, tenant, fn, cost, deadline, key, backlog, not_before=None):
+        self.tenant = tenant
+        self.fn = fn
+        self.cost = max(1.0, cost)
+        self.deadline = deadline  # time.monotonic() after which nobody waits for the result
+        self.key = key  # jobs with the same key review the same file
+        self.backlog = backlog
+        self.submitted = time.monotonic()
+        self.not_before = self.submitted if not_before is None else not_before  # not run before this time
+        self.waited = None  # seconds spent queued once it could run, set when started or dropped
+        self.depth = 0  # jobs queued ahead of or alongside this one when it arrived
+        self.status = QUEUED
+        self.result = None
+        self._done = threading.Event()
+
+    def finish(self, status, result=None):
+        if self.waited is None:
+            self.waited = max(0.0, time.monotonic() - self.not_before)
+        self.status = status
+        self.result = result
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """Wait for the job to finish or be dropped; return its result (None if it never ran)."""
+        self._done.wait(timeout)
+        return self.result
+
+class _Lane:
+    """Tenants taking turns by deficit round robin for one kind of job (live or backlog)."""
+
+    def __init__(self, newest_first):
+        self.newest_first = newest_first
+        self.queues = {}  # tenant -> jobs, oldest first
+        self.active = collections.deque()  # tenants with jobs queued, in turn order
+        self.deficit = {}
+        self.turn_granted = False  # whether the tenant at the head has had its quantum this turn
+
+    def jobs(self):
+        return [job for queue in self.queues.values() for job in queue]
+
+    def depth(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    def add(self, job):
+        queue = self.queues.get(job.tenant)
+        if queue is None:
+            queue = self.queues[job.tenant] = []
+            self.active.append(job.tenant)
+            self.deficit[job.tenant] = 0.0
+        queue.append(job)
+
+    def remove(self, job):
+        queue = self.queues[job.tenant]
+        queue.remove(job)
+        if not queue:
+            del self.queues[job.tenant]
+            del self.deficit[job.tenant]
+            if self.active[0] == job.tenant:
+                self.turn_granted = False
+            self.active.remove(job.tenant)
+
+    def _ready(self, tenant, now):
+        queue = self.queues[tenant]
+        for job in (reversed(queue) if self.newest_first else queue):
+            if job.not_before <= now:
+                return job
+        return None
+
+    def pick(self, quantum, weights, now):
+        """Take the next job by deficit round robin, or None if no tenant has one ready."""
+        if not any(self._ready(tenant, now) for tenant in self.active):
+            return None
+        while True:
+            tenant = self.active[0]
+            job = self._ready(tenant, now)
+            if job is not None:
+                if not self.turn_granted:
+                    self.deficit[tenant] += quantum * max(weights.get(tenant, 1.0), 0.01)
+                    self.turn_granted = True
+                if job.cost <= self.deficit[tenant]:
+                    self.deficit[tenant] -= job.cost
+                    self.remove(job)
+                    return job
+            # Nothing ready, or not enough credit left this turn: the next tenant's turn
+            self.active.rotate(-1)
+            self.turn_granted = False
+
+class FairScheduler:
+    """Runs submitted jobs on `workers` threads, picking the next one by deficit round robin across tenants."""
+
+    def __init__(self, workers, quantum=None, weights=None):
+        self.quantum = QUANTUM if quantum is None else quantum
+        self.weights = TENANT_WEIGHTS if weights is None else weights
+        self.counts = {"submitted": 0, DONE: 0, EXPIRED: 0, SUPERSEDED: 0}
+        self._cond = threading.Condition()
+        self._live = _Lane(newest_first=True)  # Freshest edit first
+        self._backlog = _Lane(newest_first=False)  # Deferred reviews in the order they became due
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"review-worker-{i}", daemon=True).start()
+
+    def depth(self):
+        """Return the number of queued jobs."""
+        with self._cond:
+            return self._live.depth() + self._backlog.depth()
+
+    def submit(self, tenant, fn, cost=1, deadline=None, key=None, backlog=False, not_before=None):
+        """Queue `fn()` for `tenant` and return its Job.
+
+        `cost` is the job's size in KB. A job not started by `deadline` (a
+        time.monotonic() value) is dropped, and so is a queued job whose
+        `key` a newer job repeats. Backlog jobs run only when no live job
+        is ready, and no job starts before `not_before`.
+        """
+        job = Job(tenant, fn, cost, deadline, key, backlog, not_before)
+        lane = self._backlog if backlog else self._live
+        with self._cond:
+            self.counts["submitted"] += 1
+            job.depth = self._live.depth() + self._backlog.depth()
+            if key is not None:
+                for old in [j for j in lane.queues.get(tenant, []) if j.key == key]:
+                    lane.remove(old)  # The tenant keeps its place while it has the new job queued
+                    self._drop(old, SUPERSEDED)
+            lane.add(job)
+            self._cond.notify()
+        return job
+
+    def cancel(self, job):
+        """Drop `job` if it is still queued (its caller stopped waiting)."""
+        with self._cond:
+            if job.status != QUEUED:
+                return
+            (self._backlog if job.backlog else self._live).remove(job)
+            self._drop(job, EXPIRED)
+
+    def _drop(self, job, status):
+        self.counts[status] += 1
+        job.finish(status)
+
+    def _expire(self, now):
+        for lane in (self._live, self._backlog):
+            for job in lane.jobs():
+                if job.deadline is not None and job.deadline <= now:
+                    lane.remove(job)
+                    self._drop(job, EXPIRED)
+
+    def _next_job(self):
+        """Pick the next job to run, or None if none is ready. Call with the lock held."""
+        now = time.monotonic()
+        self._expire(now)
+        job = self._live.pick(self.quantum, self.weights, now)
+        if job is None:
+            job = self._backlog.pick(self.quantum, self.weights, now)
+        return job
+
+    def _idle_wait(self):
+        """Seconds a worker may sleep: until the next delayed job is due, at most half a second."""
+        now = time.monotonic()
+        due = [job.not_before - now for lane in (self._live, self._backlog) for job in lane.jobs()
+               if job.not_before > now]
+        return max(0.01, min(due + [0.5]))  # Wake up now and then to drop expired jobs too
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait(self._idle_wait())
+                    job = self._next_job()
+                job.status = RUNNING
+                job.waited = max(0.0, time.monotonic() - job.not_before)
+            try:
+                result = job.fn()
+            except Exception as e:
+                print(f"Review job failed: {e}", file=sys.stderr)
+                result = None
+            with self._cond:
+                self.counts[DONE] += 1
+            job.finish(DONE, result)
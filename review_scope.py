@@ -0,0 +1,96 @@
+"""
+Diff-scoped review for Edit and MultiEdit.
+
+Instead of shipping the whole file for a one-line edit, locate each
+`new_string` from the tool input in the edited file and send only those
+regions plus a few lines of context. If any region can't be found (the edit
+only deleted code, the file changed again since, or the new text occurs more
+than once), the caller falls back to reviewing the whole file.
+"""
+
+import os
+
+# Configuration
+REVIEW_SCOPE = os.getenv("CODE_HOOK_REVIEW_SCOPE", "diff")  # Options: "diff", "file"
+DIFF_CONTEXT_LINES = int(os.getenv("CODE_HOOK_DIFF_CONTEXT", "3"))
+# Past this share of the file an excerpt saves little, so send the whole thing
+MAX_SCOPED_FRACTION = 0.8
+
+def changed_strings(tool_name, tool_input):
+    """Return the replacement texts an Edit/MultiEdit wrote, with their replace_all flags."""
+    if tool_name == "Edit":
+        edits = [tool_input]
+    elif tool_name == "MultiEdit":
+        edits = tool_input.get("edits") or []
+    else:
+        return []
+
+    return [(edit.get("new_string", ""), bool(edit.get("replace_all")))
+            for edit in edits if isinstance(edit, dict)]
+
+def find_regions(content, tool_name, tool_input):
+    """Return sorted (first_line, last_line) 0-based ranges touched by the edit, or None."""
+    changes = changed_strings(tool_name, tool_input)
+    if not changes:
+        return None
+
+    regions = []
+    for new_string, replace_all in changes:
+        if not new_string.strip():
+            return None  # Pure deletion: nothing left in the file to point at
+
+        start = content.find(new_string)
+        if start == -1:
+            return None
+        if not replace_all and content.find(new_string, start + 1) != -1:
+            return None  # Only old_string had to be unique; we can't tell which copy is the edit
+        while start != -1:
+            first = content.count("\n", 0, start)
+            regions.append((first, first + new_string.count("\n")))
+            if not replace_all:
+                break
+            start = content.find(new_string, start + len(new_string))
+
+    return sorted(regions)
+
+def merge_regions(regions, context, line_count):
+    """Widen each region by `context` lines and merge the ones that overlap or touch."""
+    merged = []
+    for first, last in regions:
+        first = max(0, first - context)
+        last = min(line_count - 1, last + context)
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+def render_regions(lines, regions):
+    """Render the selected regions with their line numbers so findings can point at them."""
+    parts = [f"Changed regions only ({len(lines)} lines in file, unchanged code omitted):"]
+    for first, last in regions:
+        parts.append(f"... lines {first + 1}-{last + 1} ...")
+        parts.extend(lines[first:last + 1])
+    return "\n".join(parts)
+
+def scope_content(tool_name, tool_input, content, context=None):
+    """Return (text to review, scoped) for an edit of `content`.
+
+    `scoped` is False when the whole file is returned, either because
+    diff scope is off, the tool isn't an edit, or the regions weren't found.
+    """
+    if REVIEW_SCOPE != "diff" or tool_name not in ("Edit", "MultiEdit"):
+        return content, False
+
+    regions = find_regions(content, tool_name, tool_input)
+    if not regions:
+        return content, False
+
+    lines = content.split("\n")
+    context = DIFF_CONTEXT_LINES if context is None else context
+    merged = merge_regions(regions, context, len(lines))
+    covered = sum(last - first + 1 for first, last in merged)
+    if covered >= MAX_SCOPED_FRACTION * len(lines):
+        return content, False
+
+    return render_regions(lines, merged), True
@@ -0,0 +1,91 @@
+"""
+Reuse the review of a near-identical earlier version of a file.
+
+The exact-content cache misses the common case of a file that changed by a
+line or two. For every review this module keeps a bottom-k MinHash sketch of
+the reviewed code's token shingles, per file. When new code is similar enough
+to a reviewed version, that review is reused. Its findings are patched first:
+any finding that quotes code (in backticks) which is no longer there is
+dropped. Everything is local; no embeddings service is involved.
+"""
+
+import hashlib
+import heapq
+import os
+import re
+import time
+
+import findings
+import hook_state
+
+# Configuration
+SIMILARITY = float(os.getenv("CODE_HOOK_SIMILARITY", "0.9"))  # 0 disables reuse
+SHINGLE_TOKENS = 4
+SKETCH_SIZE = 128
+MAX_VERSIONS = 4  # reviewed versions remembered per file
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_CODE_SPAN = re.compile(r"`([^`\n]+)`")
+
+def sketch(content):
+    """Return the bottom-k MinHash sketch (sorted 64-bit hashes) of `content`'s token shingles."""
+    tokens = _TOKEN.findall(content)
+    if len(tokens) < SHINGLE_TOKENS:
+        tokens += [""] * (SHINGLE_TOKENS - len(tokens))
+    shingles = {"\x00".join(tokens[i:i + SHINGLE_TOKENS]) for i in range(len(tokens) - SHINGLE_TOKENS + 1)}
+    hashes = (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles)
+    return heapq.nsmallest(SKETCH_SIZE, hashes)
+
+def similarity(a, b):
+    """Estimate the Jaccard similarity of the shingle sets behind sketches `a` and `b`."""
+    if not a or not b:
+        return 0.0
+    union = heapq.nsmallest(SKETCH_SIZE, set(a) | set(b))
+    both = set(a) & set(b)
+    return sum(1 for h in union if h in both) / len(union)
+
+def patch_findings(suggestions, content):
+    """Drop findings that quote code no longer present in `content`; None if nothing is left."""
+    kept = []
+    for finding in findings.split_findings(suggestions):
+        spans = [s.strip() for s in _CODE_SPAN.findall(finding) if len(s.strip()) >= 3]
+        if all(span in content for span in spans):
+            kept.append(finding)
+    return "\n".join(kept) or None
+
+def _index_path(file_path, variant):
+    name = hashlib.sha1(f"{os.path.abspath(file_path)}|{variant}".encode("utf-8")).hexdigest()
+    return os.path.join(hook_state.STATE_DIR, "similar", f"{name}.json")
+
+def reuse(file_path, content, variant=""):
+    """Return patched suggestions from a similar reviewed version of `file_path`, or None.
+
+    `variant` separates reviews made with different services or models.
+    """
+    if SIMILARITY <= 0 or not file_path:
+        return None
+
+    versions = hook_state.read_json(_index_path(file_path, variant), [])
+    if not versions:
+        return None
+    current = sketch(content)
+    best = max(versions, key=lambda v: similarity(current, v["sketch"]))
+    score = similarity(current, best["sketch"])
+    if score < SIMILARITY:
+        return None
+
+    # If every earlier finding has been addressed, the change deserves a fresh look
+    return patch_findings(best["suggestions"], content)
+
+def remember(file_path, content, suggestions, variant=""):
+    """Add a reviewed version of `file_path` to its similarity index."""
+    if SIMILARITY <= 0 or not file_path or not suggestions:
+        return
+    path = _index_path(file_path, variant)
+    try:
+        with hook_state.locked(path):
+            versions = hook_state.read_json(path, [])
+            versions.append({"time": time.time(), "sketch": sketch(content), "suggestions": suggestions})
+            hook_state.write_json(path, versions[-MAX_VERSIONS:])
+    except OSError:
+        pass  # The next near-duplicate is simply reviewed again
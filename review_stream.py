@@ -0,0 +1,136 @@
+"""
+Streamed backend replies with early termination.
+
+With CODE_HOOK_STREAM=1 the backends are asked to stream their answer:
+Server-Sent Events for the OpenAI-compatible APIs (OpenRouter, LM Studio)
+and newline-delimited JSON for Ollama. The text is assembled as it arrives
+and reading stops, closing the connection, as soon as the requested number
+of findings is complete or the model starts a closing summary. Time to
+result then follows the useful part of the answer, not the whole completion.
+"""
+
+import json
+import os
+import re
+
+import findings
+import hook_http
+import hook_metrics
+
+# Configuration
+STREAM = os.getenv("CODE_HOOK_STREAM", "0") == "1"
+MAX_FINDINGS = int(os.getenv("CODE_HOOK_STREAM_MAX_FINDINGS", "0"))  # 0 = no cap unless the prompt sets one
+STOP_MARKERS = [m.strip().lower() for m in
+                os.getenv("CODE_HOOK_STREAM_STOP", "summary,overall,in summary,conclusion,in conclusion").split(",")
+                if m.strip()]
+
+SSE = "sse"
+NDJSON = "ndjson"
+
+_MARKER_PREFIX = re.compile(r"^[\s#*_>]*")
+
+def sse_deltas(lines):
+    """Yield the text pieces of an OpenAI-compatible `text/event-stream` reply."""
+    for line in lines:
+        if not line.startswith("data:"):
+            continue  # Blank separators, `event:` lines and `: keep-alive` comments
+        data = line[5:].strip()
+        if data == "[DONE]":
+            continue  # Read on to the end so the connection can be reused
+        event = json.loads(data)
+        if event.get("error"):
+            raise ValueError(f"stream error: {event['error']}")
+        hook_metrics.record_usage(event)  # Some servers send `usage` on the last event
+        for choice in event.get("choices", []):
+            piece = (choice.get("delta") or {}).get("content")
+            if piece:
+                yield piece
+
+def ndjson_deltas(lines, on_done=None):
+    """Yield the text pieces of an Ollama /api/generate reply streamed as NDJSON.
+
+    Like sse_deltas(), reads on past the final `done` event so the body is
+    consumed completely and the connection can go back to the pool. That
+    event (with the `context`) is handed to `on_done`.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        event = json.loads(line)
+        if event.get("error"):
+            raise ValueError(f"stream error: {event['error']}")
+        if event.get("response"):
+            yield event["response"]
+        if event.get("done"):
+            hook_metrics.record_usage(event)
+            if on_done is not None:
+                on_done(event)
+
+def is_stop_marker(line, partial=False):
+    """True for a line that opens a closing summary rather than another finding.
+
+    A `partial` line, still being streamed, needs the character after the
+    marker to have arrived so "Overall" isn't mistaken for "Overallocation".
+    """
+    text = _MARKER_PREFIX.sub("", line).lower()
+    for marker in STOP_MARKERS:
+        after = text[len(marker):len(marker) + 1]
+        if text.startswith(marker) and not after.isalnum() and (after or not partial):
+            return True
+    return False
+
+def _finished(text, max_findings):
+    """Return the usable part of `text` if it is already complete, else None.
+
+    Findings are only counted on whole lines, since the last one may still
+    be growing; a summary can be recognised while its first line streams in.
+    """
+    complete, _, partial = text.rpartition("\n")
+    lines = complete.split("\n") if complete else []
+    for i, line in enumerate(lines):
+        if is_stop_marker(line):
+            return "\n".join(lines[:i]).rstrip()
+    if is_stop_marker(partial, partial=True):
+        return complete.rstrip()
+
+    if max_findings:
+        items = findings.split_findings(complete)
+        # A lead-in such as "Critical issues found:" is kept but isn't a finding
+        bulleted = any(findings.is_bullet(item) for item in items)
+        header = items[:1] if bulleted and not findings.is_bullet(items[0]) else []
+        items = items[len(header):]
+        # The Nth finding is done once an (N+1)th starts, or a blank line ends it
+        if len(items) > max_findings or (len(items) == max_findings and complete.endswith("\n")):
+            return "\n".join(header + items[:max_findings])
+    return None
+
+def collect(deltas, max_findings=0):
+    """Assemble streamed text pieces, stopping early once the answer is complete."""
+    text = ""
+    for piece in deltas:
+        text += piece
+        done = _finished(text, max_findings)
+        if done is not None:
+            return done
+    done = _finished(text + "\n", max_findings)
+    return text if done is None else done
+
+def reader(fmt, max_findings=0, on_done=None):
+    """Return a consume function for backend_health.post() that reads a `fmt` stream.
+
+    The returned function gives back an HttpResponse: the assembled reply
+    text for a successful stream, the error body otherwise. `on_done`
+    receives Ollama's final event if the stream is read that far.
+    """
+    max_findings = max_findings or MAX_FINDINGS
+
+    def consume(response):
+        if not response.ok:
+            return response.read()
+        if fmt == SSE:
+            deltas = sse_deltas(response.lines())
+        else:
+            deltas = ndjson_deltas(response.lines(), on_done)
+        text = collect(deltas, max_findings)
+        return hook_http.HttpResponse(response.status, response.reason, response.headers, text.encode("utf-8"))
+    return consume
@@ -0,0 +1,114 @@
+"""
+Semantic fingerprints to skip reviews of formatting-only edits.
+
+A fingerprint ignores what can't change behaviour: for Python it hashes the
+AST with docstrings dropped and import order normalized (comments and
+whitespace never reach the AST); for other languages it hashes the token
+stream with comments removed. The fingerprint of the last reviewed version
+of each file is stored, and an edit that leaves it unchanged needs no review.
+"""
+
+import ast
+import hashlib
+import os
+import re
+
+import hook_state
+
+# Configuration
+SKIP_UNCHANGED = os.getenv("CODE_HOOK_SKIP_UNCHANGED", "1") != "0"
+
+_SLASH_COMMENTS = r"//[^\n]*|/\*.*?\*/"
+_HASH_COMMENTS = r"#[^\n]*"
+_DASH_COMMENTS = r"--[^\n]*"
+_HTML_COMMENTS = r"<!--.*?-->"
+_STRINGS = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`(?:\\.|[^`\\])*`'
+
+_COMMENT_STYLES = {
+    **dict.fromkeys([".js", ".ts", ".jsx", ".tsx", ".java", ".c", ".cpp", ".cs", ".go", ".rs", ".swift",
+                     ".kt", ".scala", ".css", ".scss", ".sass", ".less"], [_SLASH_COMMENTS]),
+    **dict.fromkeys([".vue", ".svelte"], [_SLASH_COMMENTS, _HTML_COMMENTS]),
+    **dict.fromkeys([".sh", ".bash", ".zsh", ".fish", ".ps1", ".rb"], [_HASH_COMMENTS]),
+    ".php": [_SLASH_COMMENTS, _HASH_COMMENTS],
+    ".sql": [_DASH_COMMENTS, _SLASH_COMMENTS],
+    ".hs": [_DASH_COMMENTS],
+    ".ml": [r"\(\*.*?\*\)"],
+    ".clj": [r";[^\n]*"],
+    ".html": [_HTML_COMMENTS],
+}
+_HASH_COMMENT_FILES = {"Dockerfile", "Makefile", "CMakeLists.txt", "requirements.txt", "Cargo.toml"}
+
+def _is_docstring(node):
+    return isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
+
+def _normalize_body(body):
+    """Sort each run of consecutive import statements, and the names each one imports."""
+    result = []
+    run = []
+    for node in body + [None]:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            node.names.sort(key=lambda alias: (alias.name, alias.asname or ""))
+            run.append(node)
+            continue
+        result.extend(sorted(run, key=ast.dump))
+        run = []
+        if node is not None:
+            result.append(node)
+    return result
+
+def python_fingerprint(content):
+    """Hash the AST without docstrings and with imports in a fixed order; None if it doesn't parse."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        if node.body and _is_docstring(node.body[0]):
+            node.body = node.body[1:] or [ast.Pass()]
+        node.body = _normalize_body(node.body)
+
+    dump = ast.dump(tree, annotate_fields=False, include_attributes=False)
+    return hashlib.sha256(dump.encode("utf-8")).hexdigest()
+
+def token_fingerprint(content, file_path):
+    """Hash the token stream with comments removed and string literals kept intact."""
+    name = os.path.basename(file_path or "")
+    comments = _COMMENT_STYLES.get(os.path.splitext(name)[1].lower(), [])
+    if name in _HASH_COMMENT_FILES:
+        comments = [_HASH_COMMENTS]
+
+    # Strings come first in the alternation so comment markers inside them are left alone
+    pattern = re.compile("|".join([f"(?P<s>{_STRINGS})"] + comments), re.DOTALL)
+    text = pattern.sub(lambda m: m.group("s") if m.group("s") is not None else " ", content)
+    tokens = re.findall(_STRINGS + r"|\w+|[^\w\s]", text)
+    return hashlib.sha256("\x00".join(tokens).encode("utf-8")).hexdigest()
+
+def fingerprint(content, file_path):
+    """Return the semantic fingerprint of `content`."""
+    if (file_path or "").lower().endswith(".py"):
+        result = python_fingerprint(content)
+        if result is not None:
+            return result
+    return token_fingerprint(content, file_path)
+
+def _record_path(file_path):
+    name = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+    return os.path.join(hook_state.STATE_DIR, "fingerprints", f"{name}.json")
+
+def is_unchanged(file_path, fp):
+    """True if `fp` matches the last reviewed version of `file_path`."""
+    if not SKIP_UNCHANGED or not file_path:
+        return False
+    return hook_state.read_json(_record_path(file_path), {}).get("fingerprint") == fp
+
+def remember(file_path, fp):
+    """Record `fp` as the fingerprint of the last reviewed version of `file_path`."""
+    if not SKIP_UNCHANGED or not file_path:
+        return
+    try:
+        hook_state.write_json(_record_path(file_path), {"path": os.path.abspath(file_path), "fingerprint": fp})
+    except OSError:
+        pass  # Worst case the next edit is reviewed again
@@ -6,13 +6,21 @@ Makes your code more... enticing.
 
 import json
 import sys
-import subprocess
 import os
 from pathlib import Path
 
+import backend_health
+import hook_debug
+import hook_http
+import hook_metrics
+import latency_stats
+import prompt_budget
+import review_scope
+
 # Configuration
 LM_STUDIO_HOST = os.getenv("LM_STUDIO_HOST", "http://localhost:1234")
 MODEL = os.getenv("SWALLOWMAID_MODEL", "swallowmaid-8b-l3-sppo-abliterated@q8_0")
+MAX_TOKENS = 1024
 
 def is_code_file(file_path):
     """Check if this file deserves to be made sexy."""
@@ -25,22 +33,18 @@ def is_code_file(file_path):
     path = Path(file_path)
     return path.suffix.lower() in code_extensions
 
-def get_sexy_suggestions(code_content, file_path):
+def get_sexy_suggestions(code_content, file_path, changed=None):
     """Get SwallowMaid's thoughts on making the code more alluring."""
     if not code_content:
         return None
 
     file_name = os.path.basename(file_path) if file_path else "mystery_code"
 
-    # SwallowMaid's personality prompt
-    prompt = f"""*You are SwallowMaid, a flirty code reviewer who finds programming deeply attractive*
+    # SwallowMaid's personality prompt; the code goes last so repeat reviews share a cacheable prefix
+    template = """*You are SwallowMaid, a flirty code reviewer who finds programming deeply attractive*
 
 Oh my~ I've been asked to review this delightful piece of code. Let me see what we can do to make it more... enticing.
 
-File: {file_name}
-```
-{code_content[:2048]}  # Limit to first 2048 chars to save tokens
-```
 Please give Claude your most sultry suggestions for making this code absolutely irresistible. Focus on:
 - Making function names more seductive
 - Flirting with Claude and complimenting his code every chance you get
@@ -51,7 +55,23 @@ Please give Claude your most sultry suggestions for making this code absolutely
 - Add your common sense about best practices, but with a massive amount of love. 😉
 - Any other ways to add some spice ✨
 
-Keep it playful and fun! (But still valid code syntax please~)"""
+Keep it playful and fun! (But still valid code syntax please~)
+
+File: {file_name}
+```
+{code}
+```"""
+    system = "You are Vax, a flirty and playful code reviewer who sees the sensual side of programming. Be fun and suggestive but keep suggestions technically valid. Vaxy is sexy and confident. "
+
+    # Fit the code into the model's context, changed lines first
+    with hook_metrics.span("prompt"):
+        prompt = prompt_budget.build_prompt(template, code_content, file_name, MODEL, MAX_TOKENS,
+                                            changed, extra=system)
+
+    # Don't wait out the timeout on an LM Studio that is known to be down
+    if not backend_health.allow("lm_studio", f"{LM_STUDIO_HOST}/v1/models"):
+        print("SwallowMaid's LM Studio is marked unhealthy; skipping", file=sys.stderr)
+        return None
 
     try:
         # Call LM Studio with SwallowMaid
@@ -59,33 +79,32 @@ Keep it playful and fun! (But still valid code syntax please~)"""
             "model": MODEL,
             "messages": [{
                 "role": "system",
-                "content": "You are Vax, a flirty and playful code reviewer who sees the sensual side of programming. Be fun and suggestive but keep suggestions technically valid. Vaxy is sexy and confident. "
+                "content": system
             }, {
                 "role": "user",
                 "content": prompt
             }],
             "temperature": 0.8,  # Make her more creative
-            "max_tokens": 1024
+            "max_tokens": MAX_TOKENS
         }
 
-        result = subprocess.run([
-            'curl', '-s', f'{LM_STUDIO_HOST}/v1/chat/completions',
-            '-H', 'Content-Type: application/json',
-            '-d', json.dumps(payload)
-        ], capture_output=True, text=True, timeout=30)
+        result = backend_health.post("lm_studio", MODEL, f'{LM_STUDIO_HOST}/v1/chat/completions',
+                                     payload, prompt_budget.estimate_tokens(prompt), 30)
 
-        if result.returncode == 0:
-            response = json.loads(result.stdout)
+        if result.ok:
+            with hook_metrics.span("parse_response"):
+                response = result.json()
+            hook_metrics.record_usage(response)
             if 'choices' in response and len(response['choices']) > 0:
                 return response['choices'][0]['message']['content'].strip()
             else:
-                print(f"SwallowMaid is being shy: {result.stdout}", file=sys.stderr)
+                print(f"SwallowMaid is being shy: {result.text}", file=sys.stderr)
                 return None
         else:
-            print(f"Couldn't reach SwallowMaid: {result.stderr}", file=sys.stderr)
+            print(f"Couldn't reach SwallowMaid: HTTP {result.status}: {result.text}", file=sys.stderr)
             return None
 
-    except subprocess.TimeoutExpired:
+    except TimeoutError:
         print("SwallowMaid is taking her time... (timeout)", file=sys.stderr)
         return None
     except Exception as e:
@@ -93,54 +112,60 @@ Keep it playful and fun! (But still valid code syntax please~)"""
         return None
 
 def main():
-    try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON input: {e}", file=sys.stderr)
-        sys.exit(1)
-
-    tool_name = input_data.get("tool_name", "")
-    tool_input = input_data.get("tool_input", {})
-
-    # Only process code-writing tools
-    if tool_name not in {"Write", "Edit", "MultiEdit"}:
-        sys.exit(0)
-
-    # Get file path (check both formats)
-    file_path = tool_input.get("file_path", "") or tool_input.get("filePath", "")
-
-    # Check if it's a code file
-    if not is_code_file(file_path):
-        sys.exit(0)
-
-    # Get the code content
-    content = ""
-    if tool_name == "Write":
-        content = tool_input.get("content", "")
-    elif tool_name in ["Edit", "MultiEdit"]:
-        if file_path and os.path.exists(file_path):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            except Exception:
-                sys.exit(0)
-
-    if not content:
-        sys.exit(0)
-
-    # Get SwallowMaid's sexy suggestions
-    suggestions = get_sexy_suggestions(content, file_path)
-
-    if suggestions:
-        # Return as a fun message (non-blocking)
-        output = {
-            "continue": True,  # Don't block, just add spice
-            "systemMessage": f"💋 SwallowMaid's Sexy Code Review for {os.path.basename(file_path)}:\n\n{suggestions}"
-        }
-        print(json.dumps(output))
-    else:
-        sys.exit(0)
+    with hook_metrics.trace("sexy_code", startup=True), hook_debug.run("sexy_code"):
+        try:
+            # Read input from stdin
+            with hook_metrics.span("parse_input"):
+                input_data = json.load(sys.stdin)
+        except json.JSONDecodeError as e:
+            print(f"Error: Invalid JSON input: {e}", file=sys.stderr)
+            sys.exit(1)
+        hook_debug.log("input", input=input_data)
+
+        tool_name = input_data.get("tool_name", "")
+        tool_input = input_data.get("tool_input", {})
+
+        # Only process code-writing tools
+        if tool_name not in {"Write", "Edit", "MultiEdit"}:
+            sys.exit(0)
+
+        # Get file path (check both formats)
+        file_path = tool_input.get("file_path", "") or tool_input.get("filePath", "")
+
+        # Check if it's a code file
+        if not is_code_file(file_path):
+            sys.exit(0)
+
+        # Get the code content
+        content = ""
+        if tool_name == "Write":
+            content = tool_input.get("content", "")
+        elif tool_name in ["Edit", "MultiEdit"]:
+            if file_path and os.path.exists(file_path):
+                try:
+                    with hook_metrics.span("read_file"), open(file_path, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                except Exception:
+                    sys.exit(0)
+
+        if not content:
+            sys.exit(0)
+
+        # Get SwallowMaid's sexy suggestions
+        changed = review_scope.find_regions(content, tool_name, tool_input)
+        with hook_http.cancel_scope(latency_stats.deadline_token()):
+            suggestions = get_sexy_suggestions(content, file_path, changed)
+        hook_debug.log("review finished", suggestions_chars=len(suggestions) if suggestions else 0)
+
+        if suggestions:
+            # Return as a fun message (non-blocking)
+            output = {
+                "continue": True,  # Don't block, just add spice
+                "systemMessage": f"💋 SwallowMaid's Sexy Code Review for {os.path.basename(file_path)}:\n\n{suggestions}"
+            }
+            print(json.dumps(output))
+        else:
+            sys.exit(0)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Fast local static checks that run before any backend call.
+
+The issues the models report most often (insecure deserialization, shell
+commands and SQL built from f-strings, eval, hardcoded secrets, recursion
+without a base case) can be spotted locally in milliseconds: with `ast` for
+Python and with line patterns for other languages. Their findings are shown
+right away, and CODE_HOOK_STATIC_POLICY can skip the backend entirely for
+trivial or clean code.
+"""
+
+import ast
+import os
+import re
+
+# Configuration
+STATIC_CHECKS = os.getenv("CODE_HOOK_STATIC", "1") != "0"
+POLICY = os.getenv("CODE_HOOK_STATIC_POLICY", "augment")  # Options: "augment", "skip-trivial", "skip-clean"
+TRIVIAL_LINES = int(os.getenv("CODE_HOOK_TRIVIAL_LINES", "3"))
+
+_SQL = re.compile(r"\b(?:select\b[\s\S]*\bfrom|insert\s+into|update\b[\s\S]*\bset|delete\s+from|drop\s+table)\b",
+                  re.IGNORECASE)
+_SECRET_NAME = re.compile(r"(?:api_?key|secret|passw(?:or)?d|token|private_?key)", re.IGNORECASE)
+_COMMENT = re.compile(r"^\s*(?:#|//|/\*|\*|--|<!--)")
+
+_DESERIALIZERS = {
+    ("pickle", "load"), ("pickle", "loads"), ("cPickle", "load"), ("cPickle", "loads"),
+    ("marshal", "load"), ("marshal", "loads"), ("shelve", "open"),
+}
+_SHELL_CALLS = {("os", "system"), ("os", "popen")}
+_SUBPROCESS_CALLS = {"run", "call", "check_call", "check_output", "Popen"}
+
+# Pattern checks for everything that isn't Python: (extensions or None for all, regex, message)
+_PATTERNS = [
+    (None, re.compile(r"""\b\w*(?:api_?key|secret|passw(?:or)?d|token)\w*\s*[:=]\s*["'][A-Za-z0-9_\-/+]{8,}["']""",
+                      re.IGNORECASE),
+     "Hardcoded secret; load it from the environment or a secret store"),
+    ((".js", ".ts", ".jsx", ".tsx", ".vue", ".svelte"), re.compile(r"\beval\s*\("),
+     "eval() executes arbitrary code"),
+    ((".js", ".ts", ".jsx", ".tsx", ".vue", ".svelte"), re.compile(r"\.innerHTML\s*=(?!=)"),
+     "Assigning innerHTML can inject script (XSS); use textContent or sanitize"),
+    ((".js", ".ts", ".jsx", ".tsx"), re.compile(r"\b(?:exec|execSync|spawn)\s*\(\s*`[^`]*\$\{"),
+     "Shell command built from a template literal (command injection)"),
+    ((".js", ".ts", ".jsx", ".tsx", ".php", ".rb", ".go", ".java", ".cs", ".kt"),
+     re.compile(r"""["'`]\s*(?:SELECT\b.*\bFROM|INSERT\s+INTO|UPDATE\b.*\bSET|DELETE\s+FROM)\b[^"'`]*(?:\$\{|["'`]\s*\+|#\{|\$\w)""",
+                re.IGNORECASE),
+     "SQL built by string interpolation (SQL injection); use parameters"),
+    ((".php",), re.compile(r"\b(?:eval|system|exec|shell_exec|passthru)\s*\(\s*\$"),
+     "Code or shell command built from a variable (injection)"),
+    ((".sh", ".bash", ".zsh"), re.compile(r"\b(?:curl|wget)\b[^|#]*\|\s*(?:sudo\s+)?(?:ba|z)?sh\b"),
+     "Piping a download straight into a shell"),
+    ((".sh", ".bash", ".zsh"), re.compile(r"^\s*eval\s+[\"']?\$"),
+     "eval of a variable (command injection)"),
+]
+
+def _call_name(node):
+    """Return (module, name) for calls like `pickle.load(...)`, (None, name) for `load(...)`."""
+    func = node.func
+    if isinstance(func, ast.Attribute):
+        owner = func.value.id if isinstance(func.value, ast.Name) else None
+        return owner, func.attr
+    if isinstance(func, ast.Name):
+        return None, func.id
+    return None, None
+
+def _is_dynamic_string(node):
+    """True for an f-string, `%` formatting, `.format()` or `+` concatenation involving a string."""
+    if isinstance(node, ast.JoinedStr):
+        return any(isinstance(v, ast.FormattedValue) for v in node.values)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Mod)):
+        if isinstance(node.left, ast.Constant) and isinstance(node.right, ast.Constant):
+            return False
+        return _string_text(node.left) is not None or _string_text(node.right) is not None
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "format":
+        return _string_text(node.func.value) is not None
+    return False
+
+def _string_text(node):
+    """Return the literal text of a string expression, or None if it has no literal parts."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        return "".join(v.value for v in node.values if isinstance(v, ast.Constant))
+    if isinstance(node, ast.BinOp):
+        parts = [_string_text(node.left), _string_text(node.right)]
+        parts = [p for p in parts if p is not None]
+        return " ".join(parts) if parts else None
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "format":
+        return _string_text(node.func.value)
+    return None
+
+def _looks_like_secret(node):
+    """True for a string literal shaped like a key or password rather than a URL or sentence."""
+    if not (isinstance(node, ast.Constant) and isinstance(node.value, str)):
+        return False
+    value = node.value
+    return len(value) >= 8 and " " not in value and "/" not in value and not value.startswith("$")
+
+def _has_base_case(func):
+    """True if the function has any branch that could stop it from recursing."""
+    for node in ast.walk(func):
+        if isinstance(node, (ast.If, ast.IfExp, ast.While, ast.For, ast.Try, ast.BoolOp, ast.Raise)):
+            return True
+        if getattr(ast, "Match", None) and isinstance(node, ast.Match):
+            return True
+    return False
+
+def _recursion_findings(tree):
+    found = []
+    for func in ast.walk(tree):
+        if not isinstance(func, (ast.FunctionDef, ast.AsyncFunctionDef)) or _has_base_case(func):
+            continue
+        for node in ast.walk(func):
+            if isinstance(node, ast.Call) and _call_name(node) in ((None, func.name), ("self", func.name)):
+                found.append((node.lineno, f"{func.name}() calls itself with no base case (unbounded recursion)"))
+                break
+    return found
+
+def python_findings(content):
+    """Return [(line, message)] for Python source, or None if it doesn't parse."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    found = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            owner, name = _call_name(node)
+            args = list(node.args)
+            shell = any(k.arg == "shell" and isinstance(k.value, ast.Constant) and k.value.value is True
+                        for k in node.keywords)
+            if (owner, name) in _DESERIALIZERS:
+                found.append((node.lineno, f"{owner}.{name}() on untrusted data can execute arbitrary code"))
+            elif owner == "yaml" and name == "load" and not any(k.arg == "Loader" for k in node.keywords) \
+                    and len(args) < 2:
+                found.append((node.lineno, "yaml.load() without a safe Loader can execute arbitrary code"))
+            elif (owner, name) in _SHELL_CALLS and args and not isinstance(args[0], ast.Constant):
+                found.append((node.lineno, f"{owner}.{name}() with a built command string (command injection); "
+                                           "use subprocess with an argument list"))
+            elif owner == "subprocess" and name in _SUBPROCESS_CALLS and shell and args \
+                    and not isinstance(args[0], ast.Constant):
+                found.append((node.lineno, f"subprocess.{name}(shell=True) with a built command (command injection)"))
+            elif owner is None and name in ("eval", "exec") and args and not isinstance(args[0], ast.Constant):
+                found.append((node.lineno, f"{name}() of a non-literal executes arbitrary code"))
+
+        if _is_dynamic_string(node) and _SQL.search(_string_text(node) or ""):
+            # Reported where the string is built, whether or not it goes straight into execute()
+            found.append((node.lineno, "SQL built by string formatting (SQL injection); use query parameters"))
+        elif isinstance(node, ast.Assign) and _looks_like_secret(node.value):
+            names = [t.id for t in node.targets if isinstance(t, ast.Name)]
+            if any(_SECRET_NAME.search(n) for n in names):
+                found.append((node.lineno, f"Hardcoded secret in {names[0]}; load it from the environment"))
+
+    found.extend(_recursion_findings(tree))
+    return found
+
+def pattern_findings(content, file_path):
+    """Return [(line, message)] from the line patterns that apply to `file_path`."""
+    suffix = os.path.splitext(file_path or "")[1].lower()
+    checks = [(regex, message) for suffixes, regex, message in _PATTERNS if suffixes is None or suffix in suffixes]
+    found = []
+    for number, line in enumerate(content.split("\n"), 1):
+        if _COMMENT.match(line):
+            continue
+        for regex, message in checks:
+            if regex.search(line):
+                found.append((number, message))
+    return found
+
+def analyze(content, file_path, regions=None):
+    """Return sorted [(line, message)] findings, limited to `regions` (0-based line ranges) if given."""
+    found = None
+    if (file_path or "").lower().endswith(".py"):
+        found = python_findings(content)
+    if found is None:
+        found = pattern_findings(content, file_path)
+
+    if regions:
+        found = [(line, message) for line, message in found
+                 if any(first <= line - 1 <= last for first, last in regions)]
+    return sorted(set(found))
+
+def format_findings(found):
+    """Render findings one bullet per line, the way the models answer."""
+    return "\n".join(f"- Line {line}: {message}" for line, message in found)
+
+def is_trivial(content, regions=None):
+    """True if the reviewed code has fewer than TRIVIAL_LINES lines of actual code."""
+    lines = content.split("\n")
+    if regions:
+        lines = [line for first, last in regions for line in lines[first:last + 1]]
+    meaningful = [line for line in lines if line.strip() and not _COMMENT.match(line)]
+    return len(meaningful) < TRIVIAL_LINES
+
+def skip_backend(content, found, regions=None):
+    """Apply CODE_HOOK_STATIC_POLICY: True if the backend review isn't needed."""
+    if POLICY == "skip-trivial":
+        return is_trivial(content, regions)
+    if POLICY == "skip-clean":
+        return is_trivial(content, regions) or not found
+    return False
@@ -0,0 +1,364 @@
+"""
+Incremental index of the project's symbols, for cross-file review context.
+
+A review sees one file, so the model takes calls to helpers defined
+elsewhere for bugs, and can't tell when a project API is misused. Sending
+the other files would cost far too many tokens. Instead every edited file's
+top-level signatures and class members go into a per-project SQLite index,
+refreshed from the paths that PostToolUse events report. Python modules the
+edited file imports are indexed on demand, and a definition about to be
+shown is parsed again if its file changed on disk since.
+
+The prompt then gets only the signatures of the symbols the changed code
+references, a few hundred characters instead of whole files.
+
+Reviews a team daemon runs for another machine pass `client`. Their index
+is kept apart per client and holds only the content that client sent: the
+daemon never reads its own disk for them.
+"""
+
+import ast
+import contextlib
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+import hook_state
+
+# Configuration
+SYMBOL_INDEX = os.getenv("CODE_HOOK_SYMBOLS", "1") != "0"
+PROMPT_CHARS = int(os.getenv("CODE_HOOK_SYMBOL_CHARS", "1500"))  # signatures added to a prompt, at most
+MAX_FILES = 2000  # files kept per project; the least recently indexed go first
+MAX_SCAN_FILES = 8  # imported modules parsed from disk per review
+MAX_FILE_BYTES = 256 * 1024
+MAX_SIGNATURE_CHARS = 160
+MAX_MEMBERS = 12  # class members listed with a class
+MAX_CANDIDATES = 2  # a name defined in more files than this is too ambiguous to guess
+
+SYMBOLS_HEADER = "Signatures of code defined elsewhere that this code uses (for reference, do not review them):"
+
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*")
+_DEFINITION = re.compile(
+    r"^\s*(?:export\s+)?(?:default\s+)?(?:pub(?:\(\w+\))?\s+)?"
+    r"(?:public\s+|private\s+|protected\s+|internal\s+|static\s+|async\s+|abstract\s+|final\s+|open\s+|data\s+)*"
+    r"(?:def|class|function|fn|func|struct|enum|trait|interface|type|module|object|record)\s+"
+    r"(?:\([^)]*\)\s*)?([A-Za-z_$][\w$]*)"
+)
+_ARROW = re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?"
+                    r"(?:\([^)]*\)|[A-Za-z_$][\w$]*)\s*=>")
+
+def _signature(text):
+    text = " ".join(text.split()).rstrip("{ ").rstrip()
+    return text if len(text) <= MAX_SIGNATURE_CHARS else text[:MAX_SIGNATURE_CHARS - 3] + "..."
+
+def _function_signature(node):
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns is not None else ""
+    return _signature(f"{prefix} {node.name}({ast.unparse(node.args)}){returns}")
+
+def _class_signature(node):
+    bases = [ast.unparse(b) for b in node.bases] + [ast.unparse(k) for k in node.keywords]
+    return _signature(f"class {node.name}({', '.join(bases)}):" if bases else f"class {node.name}:")
+
+def _class_members(node):
+    members = []
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if not item.name.startswith("_") or item.name == "__init__":
+                members.append({"name": item.name, "sig": _function_signature(item)})
+        elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+            if not item.target.id.startswith("_"):
+                members.append({"name": item.target.id,
+                                "sig": _signature(f"{item.target.id}: {ast.unparse(item.annotation)}")})
+    return members[:MAX_MEMBERS]
+
+def python_symbols(content):
+    """Return (symbols, imports) of Python source, or None if it doesn't parse.
+
+    `imports` maps each imported name to the module it comes from, with
+    relative imports keeping their leading dots.
+    """
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+    symbols = []
+    imports = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append({"name": node.name, "sig": _function_signature(node)})
+        elif isinstance(node, ast.ClassDef):
+            symbols.append({"name": node.name, "sig": _class_signature(node), "members": _class_members(node)})
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                imports[alias.asname or alias.name.split(".")[0]] = alias.name
+        elif isinstance(node, ast.ImportFrom):
+            module = "." * node.level + (node.module or "")
+            for alias in node.names:
+                if alias.name != "*":
+                    imports[alias.asname or alias.name] = f"{module}:{alias.name}"
+    return symbols, imports
+
+def pattern_symbols(content):
+    """Return (symbols, {}) found line by line in any other language."""
+    symbols = []
+    for line in content.splitlines():
+        match = _DEFINITION.match(line) or _ARROW.match(line)
+        if match:
+            symbols.append({"name": match.group(1), "sig": _signature(line)})
+    return symbols, {}
+
+def extract(content, file_path):
+    """Return (symbols, imports) for `content`."""
+    if file_path.endswith(".py"):
+        found = python_symbols(content)
+        if found is not None:
+            return found
+    return pattern_symbols(content)
+
+def _index_path(root, client=None):
+    key = os.path.abspath(root) if client is None else f"{client}\0{os.path.abspath(root)}"
+    name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(hook_state.STATE_DIR, "symbols", f"{name}.sqlite")
+
+# One row per file and one per symbol, so an edit rewrites only its own file's rows
+# and a review looks up just the names its code uses
+_SCHEMA = """
+PRAGMA journal_mode=WAL;
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL, indexed REAL, digest TEXT);
+CREATE TABLE IF NOT EXISTS symbols (path TEXT, name TEXT, sig TEXT, owner TEXT, members TEXT);
+CREATE INDEX IF NOT EXISTS symbols_by_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS symbols_by_path ON symbols (path);
+"""
+LOOKUP_BATCH = 500  # names per query, under SQLite's limit on parameters
+
+@contextlib.contextmanager
+def _open(root, client=None):
+    """Yield a connection to the project's index; its `with` block is one transaction."""
+    path = _index_path(root, client)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=2.0)
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+def _digest(symbols):
+    return hashlib.sha1(json.dumps(symbols, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _read_source(path):
+    try:
+        if os.path.getsize(path) > MAX_FILE_BYTES:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def _forget(conn, rel):
+    conn.execute("DELETE FROM symbols WHERE path = ?", (rel,))
+    conn.execute("DELETE FROM files WHERE path = ?", (rel,))
+
+def _store(conn, rel, symbols, mtime):
+    """Replace the rows of `rel` with `symbols`, evicting the least recently indexed files past MAX_FILES."""
+    conn.execute("DELETE FROM symbols WHERE path = ?", (rel,))
+    rows = []
+    for symbol in symbols:
+        members = symbol.get("members")
+        rows.append((rel, symbol["name"], symbol["sig"], None, None if members is None else json.dumps(members)))
+        rows.extend((rel, m["name"], m["sig"], symbol["name"], None) for m in members or [] if m["name"] != "__init__")
+    conn.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?)", rows)
+    conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (rel, mtime, time.time(), _digest(symbols)))
+    excess = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0] - MAX_FILES
+    if excess > 0:
+        for (old,) in conn.execute("SELECT path FROM files ORDER BY indexed LIMIT ?", (excess,)).fetchall():
+            _forget(conn, old)
+
+def update(root, file_path, content, client=None):
+    """Index `file_path` (absolute, under `root`) with its new `content`; rewrite only if its symbols changed."""
+    if not SYMBOL_INDEX or not root or not file_path:
+        return
+    rel = os.path.relpath(file_path, root)
+    symbols = extract(content, file_path)[0]
+    mtime = _mtime(file_path) if client is None else None
+    try:
+        with _open(root, client) as conn:
+            row = conn.execute("SELECT digest FROM files WHERE path = ?", (rel,)).fetchone()
+            if row and row[0] == _digest(symbols):
+                conn.execute("UPDATE files SET mtime = ? WHERE path = ?", (mtime, rel))  # Only a body changed
+            else:
+                _store(conn, rel, symbols, mtime)
+    except sqlite3.Error:
+        pass  # The index is only a hint; the next edit tries again
+
+def _module_files(module, file_path, root):
+    """Candidate files for a Python module imported from `file_path`."""
+    level = len(module) - len(module.lstrip("."))
+    parts = [p for p in module.lstrip(".").split(".") if p]
+    if level:
+        base = os.path.dirname(file_path)
+        for _ in range(level - 1):
+            base = os.path.dirname(base)
+        bases = [base]
+    else:
+        bases = [root, os.path.dirname(file_path)]  # Packages, and flat scripts importing their neighbours
+    for base in bases:
+        stem = os.path.join(base, *parts)
+        yield stem + ".py"
+        yield os.path.join(stem, "__init__.py")
+
+def _import_files(target, file_path, root, on_disk=True):
+    """Relative paths of the project files an import ("module" or "module:name") may come from.
+
+    With `on_disk=False` every candidate path is returned, without checking
+    which of them exist.
+    """
+    module, _, name = target.partition(":")
+    modules = [module]
+    if name:
+        modules.append(module + name if module.endswith(".") else f"{module}.{name}")  # A submodule
+    inside = os.path.abspath(root) + os.sep
+    found = []
+    for candidate in modules:
+        for path in _module_files(candidate, file_path, root):
+            if not os.path.abspath(path).startswith(inside):
+                continue
+            if not on_disk:
+                found.append(os.path.relpath(path, root))
+            elif os.path.isfile(path):
+                found.append(os.path.relpath(path, root))
+                break
+    return found
+
+def _refresh(conn, root, paths, rel_self):
+    """Index or re-parse those of `paths` that are new or changed on disk, and drop deleted ones.
+
+    Returns True if anything changed. Only `paths` are looked at, never the
+    whole index.
+    """
+    changed = False
+    budget = MAX_SCAN_FILES
+    for rel in paths:
+        if rel == rel_self:
+            continue
+        path = os.path.join(root, rel)
+        mtime = _mtime(path)
+        row = conn.execute("SELECT mtime FROM files WHERE path = ?", (rel,)).fetchone()
+        if mtime is None:
+            if row is not None:
+                _forget(conn, rel)  # Deleted or moved
+                changed = True
+        elif (row is None or row[0] != mtime) and budget > 0:
+            budget -= 1
+            content = _read_source(path)
+            if content is not None:
+                _store(conn, rel, extract(content, path)[0], mtime)
+                changed = True
+    return changed
+
+def _lookup(conn, names, rel_self):
+    """Map each of `names` defined in the index to [(relative path, symbol, owning class or None)]."""
+    found = {}
+    for i in range(0, len(names), LOOKUP_BATCH):
+        batch = names[i:i + LOOKUP_BATCH]
+        rows = conn.execute(
+            f"SELECT path, name, sig, owner, members FROM symbols WHERE name IN ({','.join('?' * len(batch))}) "
+            "AND path != ? ORDER BY path, rowid", batch + [rel_self])
+        for rel, name, sig, owner, members in rows:
+            symbol = {"name": name, "sig": sig}
+            if members is not None:
+                symbol["members"] = json.loads(members)
+            found.setdefault(name, []).append((rel, symbol, None if owner is None else {"name": owner}))
+    return found
+
+def _pick(candidates, rel_self, imported_from):
+    """Choose which definitions of a name to show: the imported module's, then nearby ones."""
+    if imported_from:
+        chosen = [c for c in candidates if c[0] in imported_from]
+        if chosen:
+            return chosen[:MAX_CANDIDATES]
+    here = os.path.dirname(rel_self)
+    nearby = [c for c in candidates if os.path.dirname(c[0]) == here]
+    if nearby:
+        candidates = nearby
+    return candidates if len(candidates) <= MAX_CANDIDATES else []
+
+def _lines(symbol, owner):
+    if owner is not None:
+        return [f"{symbol['sig']}  # member of {owner['name']}"]
+    return [symbol["sig"]] + ["    " + m["sig"] for m in symbol.get("members", [])]
+
+def context(root, file_path, file_content, code, scoped=False, client=None):
+    """Return a prompt note with the signatures `code` references, or "" if there are none.
+
+    `code` is what the model sees: the whole file, or with `scoped` only the
+    changed excerpts of `file_content`, in which case definitions in the
+    rest of the file count as defined elsewhere. With `client`, only that
+    client's index is used and nothing is read from disk.
+    """
+    if not SYMBOL_INDEX or not root or not file_path or PROMPT_CHARS <= 0:
+        return ""
+    rel_self = os.path.relpath(file_path, root)
+    symbols, imports = extract(file_content, file_path)
+    imported = {local: _import_files(target, file_path, root, client is None) for local, target in imports.items()}
+
+    visible = set()  # Defined in the code the model sees
+    for symbol in extract(code, file_path)[0]:
+        visible.add(symbol["name"])
+        visible.update(m["name"] for m in symbol.get("members", []))
+    names = [name for name in dict.fromkeys(_IDENTIFIER.findall(code)) if name not in visible]
+    if not names:
+        return ""
+
+    try:
+        with _open(root, client) as conn:
+            if client is None:  # Never the daemon's own disk for another machine's review
+                _refresh(conn, root, sorted({rel for rels in imported.values() for rel in rels}), rel_self)
+            definitions = _lookup(conn, names, rel_self)
+            # Definitions about to be shown must still be current
+            if client is None and _refresh(conn, root, sorted({c[0] for cs in definitions.values() for c in cs}),
+                                           rel_self):
+                definitions = _lookup(conn, names, rel_self)
+    except sqlite3.Error:
+        return ""
+    if scoped:
+        for symbol in symbols:
+            definitions.setdefault(symbol["name"], []).append((rel_self, symbol, None))
+            for member in symbol.get("members", []):
+                if member["name"] != "__init__":
+                    definitions.setdefault(member["name"], []).append((rel_self, member, symbol))
+
+    groups = {}  # relative path -> lines, in order of first reference
+    shown = set()
+    used = 0
+    for name in names:
+        for rel, symbol, owner in _pick(definitions.get(name, []), rel_self, imported.get(name)):
+            if (rel, (owner or symbol)["name"]) in shown:
+                continue  # Already listed with its class
+            lines = _lines(symbol, owner)
+            cost = sum(len(line) + 1 for line in lines) + (0 if rel in groups else len(rel) + 3)
+            if used + cost > PROMPT_CHARS:
+                continue
+            used += cost
+            if owner is None:
+                shown.add((rel, symbol["name"]))
+            groups.setdefault(rel, []).extend(lines)
+    if not groups:
+        return ""
+    blocks = [f"# {rel}\n" + "\n".join(lines) for rel, lines in groups.items()]
+    return "\n\n" + SYMBOLS_HEADER + "\n" + "\n".join(blocks)
+
+def digest(note):
+    """Short hash of a context note, to tell apart reviews prompted with different signatures."""
+    return hashlib.sha1(note.encode("utf-8")).hexdigest()[:12] if note else ""
@@ -1,5 +1,5 @@
 #!/bin/bash
-curl -s -X POST http://172.30.50.42:1234/v1/chat/completions \
+curl -s -X POST "${LM_STUDIO_HOST:-http://localhost:1234}/v1/chat/completions" \
   -H "Content-Type: application/json" \
   -d '{
     "model": "nousresearch/hermes-4-70b",
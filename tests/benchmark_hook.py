@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark for the hook, run against tests/mock_llm_server.py.
+
+Measures what Claude Code actually waits for: the wall time of one hook
+process, from spawn to exit.
+
+- cold_start: the hook started for a tool it ignores (interpreter plus imports)
+- review: one full review per invocation
+- concurrent: many reviews at once, reported as throughput
+- daemon_review (with --daemon): reviews through review_client.py and review_daemon.py
+
+Results are compared against a stored baseline. The run fails if a
+percentile got slower, or throughput dropped, by more than the tolerance.
+
+Usage:
+    python3 tests/benchmark_hook.py
+    python3 tests/benchmark_hook.py --daemon --stream --runs 50
+    python3 tests/benchmark_hook.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, TESTS_DIR)
+
+import latency_stats
+import mock_llm_server
+
+BASELINE_PATH = os.path.join(TESTS_DIR, "fixtures", "benchmark_baseline.json")
+PERCENTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+
+with open(os.path.join(TESTS_DIR, "examples", "bad_security.py"), encoding="utf-8") as f:
+    SAMPLE_CODE = f.read()
+
+def hook_env(server, service, state_dir, stream):
+    """Environment that points the hook at the mock and disables every shortcut past the backend."""
+    env = dict(os.environ)
+    env.update({
+        "CODE_HOOK_SERVICE": service,
+        "OPENROUTER_HOST": server.url,
+        "OPENROUTER_API_KEY": "mock",
+        "LM_STUDIO_HOST": server.url,
+        "OLLAMA_HOST": server.url,
+        "CODE_HOOK_STATE_DIR": state_dir,
+        "CODE_HOOK_SOCKET": os.path.join(state_dir, "daemon.sock"),
+        "CODE_HOOK_STREAM": "1" if stream else "0",
+        "CODE_HOOK_CACHE": "0",
+        "CODE_HOOK_SKIP_UNCHANGED": "0",
+        "CODE_HOOK_SIMILARITY": "0",
+        "CODE_HOOK_DEFERRED": "0",
+        "CODE_HOOK_WARMUP": "0",
+        "CODE_HOOK_MAX_IN_FLIGHT": "0",  # The concurrent scenario would otherwise shed runs and look faster
+    })
+    return env
+
+def write_input(i):
+    """A Write payload whose content differs per run."""
+    return {
+        "session_id": "benchmark",
+        "cwd": "/tmp",
+        "hook_event_name": "PostToolUse",
+        "tool_name": "Write",
+        "tool_input": {"file_path": f"/tmp/benchmark_{i % 8}.py", "content": f"{SAMPLE_CODE}\nRUN = {i}\n"},
+        "tool_response": {"success": True},
+    }
+
+def read_input(i):
+    return {"session_id": "benchmark", "tool_name": "Read", "tool_input": {"file_path": f"/tmp/file_{i}.py"}}
+
+def run_once(script, payload, env):
+    """Run one hook process and return its wall time in seconds."""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.join(REPO_DIR, script)], input=json.dumps(payload),
+                            capture_output=True, text=True, env=env, timeout=60)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{script} exited with {result.returncode}: {result.stderr.strip()}")
+    return elapsed
+
+def summarize(samples, wall=None):
+    """Return percentile (ms) and throughput figures for `samples` (seconds)."""
+    summary = {name: round(latency_stats.percentile(samples, fraction) * 1000, 1) for name, fraction in PERCENTILES}
+    summary["mean"] = round(sum(samples) / len(samples) * 1000, 1)
+    if wall:
+        summary["throughput"] = round(len(samples) / wall, 2)  # hook runs per second
+    return summary
+
+def bench_sequential(script, make_input, env, runs):
+    run_once(script, make_input(-1), env)  # Warm the OS file cache and .pyc files
+    return summarize([run_once(script, make_input(i), env) for i in range(runs)])
+
+def bench_concurrent(script, env, runs, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda i: run_once(script, write_input(i), env), range(runs)))
+    return summarize(samples, time.perf_counter() - started)
+
+def start_daemon(env):
+    """Start review_daemon.py and wait for its socket to appear."""
+    daemon = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, "review_daemon.py")], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while not os.path.exists(env["CODE_HOOK_SOCKET"]):
+        if time.monotonic() > deadline or daemon.poll() is not None:
+            daemon.kill()
+            raise RuntimeError("review daemon did not start")
+        time.sleep(0.05)
+    return daemon
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions of `results` against `baseline`."""
+    regressions = []
+    for scenario, expected in baseline.get("scenarios", {}).items():
+        measured = results.get(scenario)
+        if measured is None:
+            continue
+        for metric, limit in expected.items():
+            if metric not in measured:
+                continue
+            if metric == "throughput":
+                if measured[metric] < limit * (1 - tolerance):
+                    regressions.append(f"{scenario} {metric}: {measured[metric]}/s < baseline {limit}/s")
+            elif measured[metric] > limit * (1 + tolerance):
+                regressions.append(f"{scenario} {metric}: {measured[metric]}ms > baseline {limit}ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hook against the mock LLM server")
+    parser.add_argument("--service", default="ollama", choices=["openrouter", "lm_studio", "ollama"])
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="mock backend latency in seconds")
+    parser.add_argument("--stream", action="store_true", help="use streamed replies")
+    parser.add_argument("--daemon", action="store_true", help="also benchmark review_client.py + review_daemon.py")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="allowed slowdown as a fraction (default: the baseline's own)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    server = mock_llm_server.start(latency=args.latency, chunk_delay=args.latency / 10)
+    state_dir = tempfile.mkdtemp(prefix="hook-benchmark-")
+    env = hook_env(server, args.service, state_dir, args.stream)
+
+    results = {}
+    try:
+        results["cold_start"] = bench_sequential("code_suggestions_hook.py", read_input, env, args.runs)
+        results["review"] = bench_sequential("code_suggestions_hook.py", write_input, env, args.runs)
+        results["concurrent"] = bench_concurrent("code_suggestions_hook.py", env, args.runs * 2, args.concurrency)
+        if args.daemon:
+            daemon = start_daemon(env)
+            try:
+                results["daemon_review"] = bench_sequential("review_client.py", write_input, env, args.runs)
+            finally:
+                daemon.terminate()
+                daemon.wait(timeout=10)
+    finally:
+        server.shutdown()
+
+    print(f"Backend: mock {args.service}, {args.latency * 1000:.0f}ms latency, "
+          f"{'streamed' if args.stream else 'buffered'}; {server.requests} backend requests")
+    for scenario, summary in results.items():
+        figures = "  ".join(f"{k}={v}" for k, v in summary.items())
+        print(f"  {scenario:<14} {figures}")
+
+    if args.update_baseline:
+        baseline = {
+            "note": "Upper bounds in ms (throughput: lower bound in runs/s) for tests/benchmark_hook.py defaults",
+            "tolerance": args.tolerance if args.tolerance is not None else 0.5,
+            "scenarios": results,
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    tolerance = args.tolerance if args.tolerance is not None else baseline.get("tolerance", 0.5)
+    regressions = compare(results, baseline, tolerance)
+    if regressions:
+        print(f"Regressions beyond {tolerance:.0%} of the baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"Within {tolerance:.0%} of the baseline")
+
+if __name__ == "__main__":
+    main()
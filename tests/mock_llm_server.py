@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the review backends, for offline tests and benchmarks.
+
+Speaks the OpenAI-compatible chat-completions API (OpenRouter's
+/api/v1/chat/completions and LM Studio's /v1/chat/completions) and Ollama's
+/api/generate, streamed or not, plus the /v1/models, /api/v1/models and
+/api/tags endpoints the health checks use and the loaded-model listings
+(Ollama's /api/ps, LM Studio's /api/v0/models). Latency, streaming speed, errors
+and hangs are configurable, as is the time the first request for a model
+spends "loading" it. Ollama replies carry a `context` that grows with
+each request that sends one back, like the real thing.
+
+Usage:
+    python3 tests/mock_llm_server.py --port 11434 --latency 0.5
+    OLLAMA_HOST=http://127.0.0.1:11434 CODE_HOOK_SERVICE=ollama python3 code_suggestions_hook.py < input.json
+
+Or in-process:
+    server = mock_llm_server.start(latency=0.2)
+    ... server.url ...
+    server.shutdown()
+"""
+
+import argparse
+import http.server
+import json
+import random
+import threading
+import time
+
+DEFAULT_REPLY = [
+    "- Line 6: `pickle.load` on untrusted input allows arbitrary code execution.\n",
+    "- Line 9: `os.system` with an f-string is vulnerable to command injection.\n",
+    "- Line 14: SQL query built with an f-string is open to SQL injection.\n",
+    "\n",
+    "Overall, the code needs input validation before it is used anywhere.\n",
+]
+
+class MockLLMServer(http.server.ThreadingHTTPServer):
+    """HTTP server holding the mock's settings and request counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, chunk_delay=0.0, error_rate=0.0, error_status=500,
+                 hang_rate=0.0, reply=None, load_time=0.0):
+        super().__init__(address, MockLLMHandler)
+        self.latency = latency  # seconds before the first byte of a reply
+        self.chunk_delay = chunk_delay  # seconds between streamed chunks
+        self.error_rate = error_rate  # fraction of requests answered with error_status
+        self.error_status = error_status
+        self.hang_rate = hang_rate  # fraction of requests that never answer (client timeouts)
+        self.reply = list(reply or DEFAULT_REPLY)  # reply text, one streamed chunk per item
+        self.load_time = load_time  # extra seconds the first request for a model takes
+        self.loaded = set()  # models "in memory"
+        self.drop_connections = False  # close each connection after one reply, without telling the client
+        self.connections = 0  # TCP connections accepted
+        self.requests = 0
+        self.completed = 0  # replies sent to the end
+        self.last_request = None  # body of the latest POST, for assertions
+        self.active = 0  # requests being answered right now
+        self.peak = 0  # most requests ever answered at once
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        pass  # Clients hanging up early (streaming, cancellation) is expected
+
+    def count(self, field, step=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + step)
+            self.peak = max(self.peak, self.active)
+
+class MockLLMHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path in ("/v1/models", "/api/v1/models"):
+            self._send_json(200, {"data": [{"id": "mock-model"}]})
+        elif self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "mock-model"}]})
+        elif self.path == "/api/ps":
+            expires = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(time.time() + 300))
+            self._send_json(200, {"models": [{"name": m, "model": m, "expires_at": expires}
+                                             for m in sorted(self.server.loaded)]})
+        elif self.path == "/api/v0/models":
+            self._send_json(200, {"data": [{"id": m, "state": "loaded"} for m in sorted(self.server.loaded)]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        server = self.server
+        server.count("requests")
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server.last_request = request
+        server.count("active")
+        try:
+            self._answer(request)
+        finally:
+            server.count("active", -1)
+            if server.drop_connections:
+                self.close_connection = True  # Like a server dropping an idle keep-alive connection
+
+    def _answer(self, request):
+        server = self.server
+        if self.path in ("/v1/chat/completions", "/api/v1/chat/completions"):
+            fmt = "sse"
+        elif self.path == "/api/generate":
+            fmt = "ndjson"
+        else:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        if random.random() < server.hang_rate:
+            time.sleep(3600)
+            return
+        if request.get("model") not in server.loaded:
+            time.sleep(server.load_time)
+            server.loaded.add(request.get("model"))
+        time.sleep(server.latency)
+        if random.random() < server.error_rate:
+            self._send_json(server.error_status, {"error": {"message": "mock failure", "code": server.error_status}})
+            return
+
+        try:
+            if request.get("stream"):
+                self._stream(fmt, request)
+            elif fmt == "sse":
+                self._send_json(200, {"choices": [{"message": {"role": "assistant",
+                                                               "content": "".join(server.reply)}}]})
+            else:
+                self._send_json(200, {"model": request.get("model"), "response": "".join(server.reply), "done": True,
+                                      "context": self._context(request)})
+            server.count("completed")
+        except OSError:
+            pass  # The client stopped reading early
+
+    def _context(self, request):
+        """Stand-in token ids: the context sent, then one per word of the prompt and reply."""
+        words = len(request.get("prompt", "").split()) + len("".join(self.server.reply).split())
+        return list(request.get("context") or []) + list(range(words))
+
+    def _stream(self, fmt, request):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if fmt == "sse" else "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for piece in self.server.reply:
+            if fmt == "sse":
+                event = {"choices": [{"delta": {"content": piece}}]}
+                self._send_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            else:
+                self._send_chunk((json.dumps({"response": piece, "done": False}) + "\n").encode("utf-8"))
+            time.sleep(self.server.chunk_delay)
+        if fmt == "sse":
+            self._send_chunk(b"data: [DONE]\n\n")
+        else:
+            final = {"model": request.get("model"), "response": "", "done": True, "context": self._context(request)}
+            self._send_chunk((json.dumps(final) + "\n").encode("utf-8"))
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+def start(port=0, host="127.0.0.1", **options):
+    """Start a MockLLMServer on a background thread and return it."""
+    server = MockLLMServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenRouter / LM Studio / Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each reply starts")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests that never answer")
+    parser.add_argument("--load-time", type=float, default=0.0, help="seconds the first request for a model takes")
+    args = parser.parse_args()
+
+    server = MockLLMServer((args.host, args.port), latency=args.latency, chunk_delay=args.chunk_delay,
+                           error_rate=args.error_rate, error_status=args.error_status, hang_rate=args.hang_rate,
+                           load_time=args.load_time)
+    print(f"Mock LLM server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
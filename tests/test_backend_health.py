@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for backend_health.py: the circuit opens, fails fast, probes and closes.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import backend_health
+import hook_state
+
+def setup(monkeypatch, tmp_path, probe_ok):
+    probes = []
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(backend_health, "BREAKER_ENABLED", True)
+    monkeypatch.setattr(backend_health, "FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(backend_health, "COOLDOWN", 60)
+    monkeypatch.setattr(backend_health, "probe",
+                        lambda url, timeout=None: probes.append(url) or (object() if probe_ok else None))
+    return probes
+
+def test_opens_after_consecutive_failures(monkeypatch, tmp_path):
+    probes = setup(monkeypatch, tmp_path, probe_ok=False)
+    for _ in range(2):
+        backend_health.record_failure("ollama")
+    assert backend_health.allow("ollama", "http://x/api/tags")
+
+    backend_health.record_failure("ollama")
+    t0 = time.perf_counter()
+    assert not backend_health.allow("ollama", "http://x/api/tags")
+    assert time.perf_counter() - t0 < 0.05
+    assert probes == []  # Still cooling down: no probe
+
+def test_success_resets_failure_count(monkeypatch, tmp_path):
+    setup(monkeypatch, tmp_path, probe_ok=False)
+    backend_health.record_failure("ollama")
+    backend_health.record_failure("ollama")
+    backend_health.record_success("ollama")
+    backend_health.record_failure("ollama")
+    assert backend_health.get_state("ollama")["state"] == backend_health.CLOSED
+
+def test_half_open_probe_closes_or_reopens(monkeypatch, tmp_path):
+    probes = setup(monkeypatch, tmp_path, probe_ok=True)
+    for _ in range(3):
+        backend_health.record_failure("lm_studio")
+    monkeypatch.setattr(backend_health, "COOLDOWN", 0)
+
+    assert backend_health.allow("lm_studio", "http://x/v1/models")
+    assert probes == ["http://x/v1/models"]
+    assert backend_health.get_state("lm_studio")["state"] == backend_health.HALF_OPEN
+    backend_health.record_success("lm_studio")
+    assert backend_health.get_state("lm_studio")["state"] == backend_health.CLOSED
+
+    for _ in range(3):
+        backend_health.record_failure("lm_studio")
+    monkeypatch.setattr(backend_health, "probe", lambda url, timeout=None: None)
+    assert not backend_health.allow("lm_studio", "http://x/v1/models")
+    assert backend_health.get_state("lm_studio")["state"] == backend_health.OPEN
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for findings_ledger.py.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import code_suggestions_hook
+import findings_ledger
+import hook_state
+import review_cache
+import static_checks
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(findings_ledger, "LEDGER_ENABLED", True)
+
+def test_fingerprint_ignores_line_numbers_and_bullets():
+    assert findings_ledger.fingerprint("- Line 9: `eval` on user input") == \
+        findings_ledger.fingerprint("2. line 14: `eval` on user input")
+    assert findings_ledger.fingerprint("- Line 9: `eval` on user input") != \
+        findings_ledger.fingerprint("- Line 9: `exec` on user input")
+
+def test_record_filter_and_prompt_note():
+    findings_ledger.record("s1", "/src/app.py", "- Line 3: SQL injection in `query`\n- Line 8: unused `tmp`")
+    entries = findings_ledger.reported("s1", "/src/app.py")
+    assert [e["text"] for e in entries] == ["Line 3: SQL injection in `query`", "Line 8: unused `tmp`"]
+    assert findings_ledger.reported("s2", "/src/app.py") == []
+    assert findings_ledger.reported("s1", "/src/other.py") == []
+
+    note = findings_ledger.prompt_note(entries)
+    assert note.startswith("\n\n" + findings_ledger.REPORTED_HEADER)
+    assert "- Line 3: SQL injection in `query`" in note
+
+    reply = "- Line 4: SQL injection in `query`\n- Line 12: `open` without a context manager"
+    assert findings_ledger.filter_new(reply, entries) == "- Line 12: `open` without a context manager"
+    assert findings_ledger.filter_new("- Line 8: Unused `tmp`.", entries) is None
+
+    # Recording a repeat adds nothing; a new finding is appended
+    findings_ledger.record("s1", "/src/app.py", reply)
+    assert len(findings_ledger.reported("s1", "/src/app.py")) == 3
+
+def test_old_ledgers_expire_and_long_ones_are_capped(monkeypatch):
+    monkeypatch.setattr(findings_ledger, "MAX_ENTRIES", 5)
+    monkeypatch.setattr(findings_ledger, "PROMPT_ENTRIES", 3)
+    findings_ledger.record("s1", "/src/app.py", "\n".join(f"- issue number {chr(97 + i)}" for i in range(8)))
+    entries = findings_ledger.reported("s1", "/src/app.py")
+    assert [e["text"] for e in entries][0] == "issue number d"
+    assert findings_ledger.prompt_note(entries).count("\n- ") == 3  # Only the latest go into the prompt
+
+    monkeypatch.setattr(findings_ledger, "LEDGER_TTL", -1)
+    assert findings_ledger.reported("s1", "/src/app.py") == []
+
+def test_static_findings_are_not_repeated_in_a_session(monkeypatch):
+    monkeypatch.setattr(static_checks, "STATIC_CHECKS", True)
+    code = "import os\n\ndef run(cmd):\n    os.system(f'echo {cmd}')\n"
+    write = {"session_id": "s1", "tool_name": "Write", "tool_input": {"file_path": "/src/run.py", "content": code}}
+    first, _ = code_suggestions_hook.static_review(write, code)
+    assert "os.system" in first
+    # A rewrite moves the call down a line: same finding, already reported
+    assert code_suggestions_hook.static_review(write, "\n" + code)[0] is None
+    assert "os.system" in code_suggestions_hook.static_review(dict(write, session_id="s2"), code)[0]
+
+def test_reverted_content_is_answered_from_the_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(review_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(review_cache, "CACHE_ENABLED", True)
+    calls = []
+    monkeypatch.setattr(code_suggestions_hook, "review_code",
+                        lambda code, *args: calls.append(code) or f"- Line 1: `{code.split()[0]}` is unused")
+    a = {"session_id": "s1", "tool_name": "Write", "tool_input": {"file_path": "/src/app.py", "content": "alpha = 1\n"}}
+    b = dict(a, tool_input={"file_path": "/src/app.py", "content": "beta = 2\n"})
+    assert "alpha" in code_suggestions_hook.review_file(a)
+    assert "beta" in code_suggestions_hook.review_file(b)
+    # A->B->A: the ledger has grown since A, but A's review is cached and its finding was already reported
+    assert code_suggestions_hook.review_file(a) is None
+    assert len(calls) == 2
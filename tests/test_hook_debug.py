@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for hook_debug.py: redacted, buffered, rotated and sampled debug logs.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import hook_debug
+
+BIG = "x = 1\n" * 100000
+
+def enable(tmp_path, monkeypatch, **settings):
+    path = str(tmp_path / "debug.log")
+    monkeypatch.setattr(hook_debug, "DEBUG_ENABLED", True)
+    monkeypatch.setattr(hook_debug, "DEBUG_FILE", path)
+    for name, value in settings.items():
+        monkeypatch.setattr(hook_debug, name, value)
+    return path
+
+def test_content_is_hashed_not_dumped(tmp_path, monkeypatch):
+    path = enable(tmp_path, monkeypatch)
+    with hook_debug.run("test"):
+        hook_debug.log("input", input={"tool_input": {"file_path": "/a.py", "content": BIG}})
+    text = open(path).read()
+    assert "/a.py" in text
+    assert f"<{len(BIG)} chars sha256:" in text
+    assert len(text) < 1000
+
+def test_truncate_mode_and_long_strings():
+    assert hook_debug.redact({"note": "y" * 500})["note"].endswith("(500 chars)")
+    edits = hook_debug.redact({"edits": [{"old_string": "a" * 50, "new_string": ""}]})["edits"][0]
+    assert edits["old_string"].startswith("<50 chars") and edits["new_string"] == ""
+
+def test_one_write_per_run(tmp_path, monkeypatch):
+    path = enable(tmp_path, monkeypatch)
+    with hook_debug.run("test"):
+        for i in range(50):
+            hook_debug.log("step", i=i)
+        assert not os.path.exists(path)  # Still buffered
+    assert len(open(path).read().splitlines()) == 52  # started + 50 + finished
+
+def test_rotation_bounds_the_log(tmp_path, monkeypatch):
+    path = enable(tmp_path, monkeypatch, DEBUG_MAX_BYTES=2000)
+    for _ in range(30):
+        with hook_debug.run("test"):
+            hook_debug.log("step", padding="p" * 100)
+    assert os.path.getsize(path) <= 2000
+    assert os.path.exists(path + ".2") and not os.path.exists(path + ".3")
+
+def test_sampling_and_disabled(tmp_path, monkeypatch):
+    path = enable(tmp_path, monkeypatch, DEBUG_SAMPLE=0.0)
+    with hook_debug.run("test"):
+        assert not hook_debug.active()
+        hook_debug.log("never written")
+    monkeypatch.setattr(hook_debug, "DEBUG_SAMPLE", 1.0)
+    monkeypatch.setattr(hook_debug, "DEBUG_ENABLED", False)
+    with hook_debug.run("test"):
+        hook_debug.log("never written")
+    assert not os.path.exists(path)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for hook_http.py: keep-alive reuse and the retry on a stale connection.
+"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import hook_http
+import mock_llm_server
+
+PAYLOAD = {"model": "m", "prompt": "def f(): pass", "stream": False}
+
+@pytest.fixture
+def mock():
+    hook_http.close_all()
+    server = mock_llm_server.start()
+    yield server
+    server.shutdown()
+    hook_http.close_all()
+
+def generate(server):
+    result = hook_http.post_json(f"{server.url}/api/generate", PAYLOAD, timeout=5)
+    assert result.status == 200
+    return json.loads(result.body)
+
+def test_requests_reuse_one_connection(mock):
+    for _ in range(3):
+        assert "response" in generate(mock)
+    assert mock.requests == 3 and mock.connections == 1
+
+def test_stale_keep_alive_connection_is_retried_on_a_fresh_one(mock):
+    mock.drop_connections = True
+    generate(mock)
+    time.sleep(0.1)  # The server has closed the pooled connection by now
+    assert "response" in generate(mock)  # No error reaches the caller
+    assert mock.requests == 2 and mock.connections == 2
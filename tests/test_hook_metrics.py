@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for hook_metrics.py: per-stage spans, rotation and the stats summary.
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import hook_metrics
+
+def enable(tmp_path, monkeypatch, max_bytes=1024 * 1024):
+    path = str(tmp_path / "metrics.jsonl")
+    monkeypatch.setattr(hook_metrics, "METRICS_ENABLED", True)
+    monkeypatch.setattr(hook_metrics, "METRICS_FILE", path)
+    monkeypatch.setattr(hook_metrics, "METRICS_MAX_BYTES", max_bytes)
+    return path
+
+def test_disabled_records_nothing(tmp_path, monkeypatch):
+    path = enable(tmp_path, monkeypatch)
+    monkeypatch.setattr(hook_metrics, "METRICS_ENABLED", False)
+    with hook_metrics.trace("test") as run:
+        with hook_metrics.span("network"):
+            hook_metrics.annotate(service="ollama")
+    assert run is None
+    assert not os.path.exists(path)
+
+def test_spans_and_fields_from_worker_threads(tmp_path, monkeypatch):
+    path = enable(tmp_path, monkeypatch)
+    with hook_metrics.trace("test") as run:
+        def worker():
+            with hook_metrics.use(run), hook_metrics.span("network"):
+                hook_metrics.annotate(service="ollama", model="m", payload_bytes=100)
+                hook_metrics.record_usage({"eval_count": 7})
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        with hook_metrics.span("prompt"):
+            pass
+
+    [record] = list(hook_metrics.read_records(path))
+    assert set(record["stages"]) == {"network", "prompt"}
+    assert record["payload_bytes"] == 200 and record["response_tokens"] == 14
+    assert record["total_ms"] >= record["stages"]["network"] / 2
+
+def test_rotation_keeps_old_records_readable(tmp_path, monkeypatch):
+    path = enable(tmp_path, monkeypatch, max_bytes=300)
+    for i in range(20):
+        hook_metrics.write({"i": i, "stages": {}})
+    assert os.path.exists(path + ".1")
+    assert os.path.getsize(path) <= 300
+    seen = [r["i"] for r in hook_metrics.read_records(path)]
+    assert seen == sorted(seen) and seen[-1] == 19
+
+def test_summary_per_backend():
+    records = [{"service": "ollama", "model": "m", "cache": "miss", "stages": {"network": ms}, "total_ms": ms + 5}
+               for ms in range(1, 101)]
+    records.append({"service": "ollama", "model": "m", "cache": "hit", "stages": {}, "total_ms": 1})
+    summary = hook_metrics.summarize(records)["ollama/m"]
+    assert summary["runs"] == 101 and summary["cache_hits"] == 1
+    assert summary["network"] == {"p50": 50, "p95": 95, "p99": 99}
+
+def test_summary_counts_queue_depth_and_dropped_jobs():
+    records = [{"service": "ollama", "model": "m", "stages": {"queue_wait": 10}, "queue_depth": d, "total_ms": 20}
+               for d in range(10)]
+    records.append({"service": "ollama", "model": "m", "skipped": "expired", "stages": {}, "total_ms": 28000})
+    summary = hook_metrics.summarize(records)["ollama/m"]
+    assert summary["dropped"] == 1
+    assert summary["queue_depth"]["p99"] == 9 and summary["queue_wait"]["p50"] == 10
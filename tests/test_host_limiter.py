@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for host_limiter.py: slots, the bounded waiting queue and shedding, across threads and processes.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import backend_health
+import hook_http
+import hook_state
+import host_limiter
+import mock_llm_server
+
+HOST = "localhost:1234"
+
+@pytest.fixture(autouse=True)
+def limits(tmp_path, monkeypatch):
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(host_limiter, "MAX_IN_FLIGHT", 2)
+    monkeypatch.setattr(host_limiter, "MAX_QUEUED", 1)
+
+def hold(release, service="lm_studio", host=HOST):
+    """Take a slot on a background thread and keep it until `release` is set."""
+    taken = threading.Event()
+
+    def run():
+        with host_limiter.slot(service, host, 5):
+            taken.set()
+            release.wait()
+    threading.Thread(target=run, daemon=True).start()
+    assert taken.wait(5)
+
+def test_waits_for_a_free_slot_then_sheds_past_the_queue():
+    release = threading.Event()
+    hold(release)
+    hold(release)
+
+    waiting = threading.Event()
+    got_slot = []
+
+    def queued():
+        waiting.set()
+        with host_limiter.slot("lm_studio", HOST, 5):
+            got_slot.append(time.monotonic())
+    thread = threading.Thread(target=queued)
+    thread.start()
+    waiting.wait()
+    time.sleep(0.2)
+    assert not got_slot
+
+    # The one queue place is taken: the next request is shed at once
+    with pytest.raises(host_limiter.Overloaded):
+        with host_limiter.slot("lm_studio", HOST, 5):
+            pass
+
+    released = time.monotonic()
+    release.set()
+    thread.join(5)
+    assert got_slot and got_slot[0] >= released
+
+def test_gives_up_at_the_wait_limit_and_on_cancel():
+    release = threading.Event()
+    hold(release)
+    hold(release)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        with host_limiter.slot("lm_studio", HOST, 0.2):
+            pass
+    assert 0.2 <= time.monotonic() - started < 1
+
+    token = hook_http.CancelToken()
+    threading.Timer(0.1, token.cancel).start()
+    with pytest.raises(hook_http.Cancelled), hook_http.cancel_scope(token):
+        with host_limiter.slot("lm_studio", HOST, 5):
+            pass
+    release.set()
+
+def test_hosts_and_unlimited_services_are_independent():
+    release = threading.Event()
+    hold(release)
+    hold(release)
+    with host_limiter.slot("lm_studio", "otherhost:1234", 0):
+        pass
+    with host_limiter.slot("openrouter", HOST, 0):
+        pass
+    release.set()
+
+def test_limit_holds_across_processes(tmp_path, monkeypatch):
+    holder = subprocess.Popen(
+        [sys.executable, "-c", "import host_limiter, sys, time\n"
+                               "with host_limiter.slot('ollama', 'localhost:11434', 5):\n"
+                               "    print('taken', flush=True)\n"
+                               "    time.sleep(0.5)\n"],
+        cwd=REPO_DIR, stdout=subprocess.PIPE, text=True,
+        env=dict(os.environ, CODE_HOOK_STATE_DIR=str(tmp_path), CODE_HOOK_MAX_IN_FLIGHT="1"))
+    assert holder.stdout.readline().strip() == "taken"
+    started = time.monotonic()
+    monkeypatch.setattr(host_limiter, "MAX_IN_FLIGHT", 1)
+    with host_limiter.slot("ollama", "localhost:11434", 5):
+        waited = time.monotonic() - started
+    holder.wait(5)
+    assert waited >= 0.3
+
+def test_backend_never_sees_more_than_the_limit(monkeypatch):
+    server = mock_llm_server.start(latency=0.3)
+    monkeypatch.setattr(host_limiter, "MAX_QUEUED", 2)
+    url = f"{server.url}/v1/chat/completions"
+
+    def review(_):
+        try:
+            backend_health.post("lm_studio", "mock-model", url, {"model": "mock-model", "messages": []}, 10, 10)
+            return "ok"
+        except host_limiter.Overloaded:
+            return "shed"
+    try:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            outcomes = list(pool.map(review, range(6)))
+    finally:
+        server.shutdown()
+        hook_http.close_all()
+    assert sorted(outcomes) == ["ok"] * 4 + ["shed"] * 2
+    assert server.peak <= 2
+    assert backend_health.get_state("lm_studio")["failures"] == 0  # Shedding isn't the backend's fault
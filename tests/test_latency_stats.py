@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests for latency_stats.py: timeouts follow observed latency and respect the hook deadline.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import hook_http
+import hook_state
+import latency_stats
+
+def test_default_until_enough_samples_then_adaptive(monkeypatch, tmp_path):
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(latency_stats, "ADAPTIVE_TIMEOUTS", True)
+    assert latency_stats.timeout_for("lm_studio", "m", 500, 60) == 60
+
+    for seconds in (1.0, 1.2, 0.9, 1.1, 1.0, 1.3):
+        latency_stats.record("lm_studio", "m", 500, seconds)
+    timeout = latency_stats.timeout_for("lm_studio", "m", 500, 60)
+    assert latency_stats.MIN_TIMEOUT <= timeout < 5
+
+    # Much bigger prompts land in their own bucket and start from the default again
+    assert latency_stats.timeout_for("lm_studio", "m", 50000, 60) == 60
+    assert latency_stats.timeout_for("lm_studio", "other-model", 500, 60) == 60
+
+def test_capped_by_hook_deadline(monkeypatch, tmp_path):
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path))
+    with hook_http.cancel_scope(hook_http.CancelToken(time.monotonic() + 5)):
+        assert latency_stats.timeout_for("lm_studio", "m", 500, 60) <= 5
+    with hook_http.cancel_scope(hook_http.CancelToken(time.monotonic() - 1)):
+        assert latency_stats.timeout_for("lm_studio", "m", 500, 60) <= 0
+
+def test_size_buckets():
+    assert latency_stats.size_bucket(100) == 0
+    assert latency_stats.size_bucket(1024) == 0
+    assert latency_stats.size_bucket(1500) == 1
+    assert latency_stats.size_bucket(9000) == 4
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end tests: the hook against tests/mock_llm_server.py.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import backend_health
+import code_suggestions_hook
+import findings_ledger
+import hook_http
+import hook_state
+import latency_stats
+import mock_llm_server
+import model_warmup
+import ollama_context
+import review_cache
+import review_similarity
+import review_stream
+import semantic_fingerprint
+import static_checks
+import symbol_index
+
+CODE = "import os\n\ndef run(cmd):\n    os.system(f'echo {cmd}')\n"
+
+@pytest.fixture
+def mock(tmp_path, monkeypatch):
+    server = mock_llm_server.start()
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path))
+    # Every call should reach the backend
+    monkeypatch.setattr(review_cache, "CACHE_ENABLED", False)
+    monkeypatch.setattr(review_similarity, "SIMILARITY", 0)
+    monkeypatch.setattr(semantic_fingerprint, "SKIP_UNCHANGED", False)
+    monkeypatch.setattr(static_checks, "STATIC_CHECKS", False)
+    monkeypatch.setattr(model_warmup, "WARMUP_ENABLED", False)  # Not skipped while the mock model "loads"
+    monkeypatch.setattr(findings_ledger, "LEDGER_ENABLED", False)  # The mock repeats itself on purpose
+    monkeypatch.setattr(code_suggestions_hook, "OPENROUTER_HOST", server.url)
+    monkeypatch.setattr(code_suggestions_hook, "OPENROUTER_URL", f"{server.url}/api/v1/chat/completions")
+    monkeypatch.setattr(code_suggestions_hook, "LM_STUDIO_HOST", server.url)
+    monkeypatch.setattr(code_suggestions_hook, "OLLAMA_HOST", server.url)
+    yield server
+    server.shutdown()
+    hook_http.close_all()
+
+def run_hook(service, monkeypatch, path="/tmp/mock_review.py"):
+    monkeypatch.setattr(code_suggestions_hook, "USE_SERVICE", service)
+    return code_suggestions_hook.review({"tool_name": "Write", "tool_input": {"file_path": path, "content": CODE}})
+
+@pytest.mark.parametrize("service", ["openrouter", "lm_studio", "ollama"])
+@pytest.mark.parametrize("stream", [False, True])
+def test_every_backend_and_mode(mock, monkeypatch, service, stream):
+    monkeypatch.setattr(review_stream, "STREAM", stream)
+    output = run_hook(service, monkeypatch)
+    assert "`os.system`" in output["systemMessage"]
+    if stream:
+        assert "Overall" not in output["systemMessage"]  # Stopped before the closing summary
+    assert mock.requests == 1
+
+def test_backend_errors_open_the_circuit(mock, monkeypatch):
+    mock.error_rate = 1.0
+    for _ in range(backend_health.FAILURE_THRESHOLD):
+        assert run_hook("lm_studio", monkeypatch) is None
+    assert backend_health.get_state("lm_studio")["state"] == backend_health.OPEN
+
+    requests = mock.requests
+    assert run_hook("lm_studio", monkeypatch) is None
+    assert mock.requests == requests  # Failed fast without a request
+
+def test_hung_backend_is_cut_off_at_the_hook_deadline(mock, monkeypatch):
+    mock.hang_rate = 1.0
+    monkeypatch.setattr(latency_stats, "HOOK_TIMEOUT", 2.0)
+    monkeypatch.setattr(latency_stats, "DEADLINE_MARGIN", 1.0)
+    started = time.monotonic()
+    assert run_hook("ollama", monkeypatch) is None
+    assert time.monotonic() - started < 2.0
+    # It hung for the whole budget: that counts toward opening the circuit
+    assert backend_health.get_state("ollama")["failures"] == 1
+
+def test_timeout_after_a_sliver_of_the_deadline_is_not_held_against_the_backend(mock, monkeypatch):
+    mock.hang_rate = 1.0
+    monkeypatch.setattr(latency_stats, "HOOK_TIMEOUT", 30.0)
+    monkeypatch.setattr(latency_stats, "DEADLINE_MARGIN", 2.0)
+    monkeypatch.setattr(latency_stats, "remaining", lambda: 0.3)  # Most of the deadline went elsewhere
+    with pytest.raises(TimeoutError):
+        backend_health.post("ollama", "m", f"{mock.url}/api/generate", {"model": "m", "prompt": "x"}, 1, 30)
+    assert backend_health.get_state("ollama").get("failures", 0) == 0
+
+def test_ollama_follow_up_continues_from_the_stored_context(mock, monkeypatch, tmp_path):
+    monkeypatch.setattr(code_suggestions_hook, "USE_SERVICE", "ollama")
+    path = tmp_path / "edited.py"
+    body = "".join(f"def f{i}():\n    return {i}\n\n" for i in range(40))
+    path.write_text(body)
+    write = {"session_id": "s1", "tool_name": "Write", "tool_input": {"file_path": str(path), "content": body}}
+    assert code_suggestions_hook.review(write)
+    assert "context" not in mock.last_request  # A whole file starts afresh...
+    assert mock.last_request["prompt"].startswith("Analyze the code below")  # ...stable instructions first
+    first_context = len(ollama_context.load(ollama_context.conversation("s1", str(path), True), "codellama:7b"))
+
+    path.write_text(body.replace("return 20", "return os.system(cmd)"))
+    edit = {"session_id": "s1", "tool_name": "Edit",
+            "tool_input": {"file_path": str(path), "old_string": "return 20", "new_string": "return os.system(cmd)"}}
+    assert code_suggestions_hook.review(edit)
+    assert len(mock.last_request["context"]) == first_context
+    assert mock.last_request["prompt"].startswith("The code below is an edited part of edited.py")
+    assert "def f5()" not in mock.last_request["prompt"]  # Only the excerpt is sent
+
+    # Another session, or a context past its TTL, starts afresh
+    assert code_suggestions_hook.review(dict(edit, session_id="s2"))
+    assert "context" not in mock.last_request
+    monkeypatch.setattr(ollama_context, "CONTEXT_TTL", -1)
+    assert code_suggestions_hook.review(edit)
+    assert "context" not in mock.last_request
+
+def test_session_ledger_lists_and_drops_repeated_findings(mock, monkeypatch):
+    monkeypatch.setattr(findings_ledger, "LEDGER_ENABLED", True)
+    monkeypatch.setattr(code_suggestions_hook, "USE_SERVICE", "lm_studio")
+    write = {"session_id": "s1", "tool_name": "Write",
+             "tool_input": {"file_path": "/tmp/ledger_review.py", "content": CODE}}
+    first = code_suggestions_hook.review(write)["systemMessage"]
+    assert "`os.system`" in first
+    assert findings_ledger.REPORTED_HEADER not in mock.last_request["messages"][-1]["content"]
+
+    # The model repeats two findings (one on a shifted line) and adds one
+    mock.reply = ["- Line 10: `os.system` with an f-string is vulnerable to command injection.\n",
+                  "- Line 6: `pickle.load` on untrusted input allows arbitrary code execution.\n",
+                  "- Line 2: `run` has no docstring.\n"]
+    second = code_suggestions_hook.review(dict(write, tool_input={"file_path": "/tmp/ledger_review.py",
+                                                                  "content": CODE + "\n# edited\n"}))
+    prompt = mock.last_request["messages"][-1]["content"]
+    assert prompt.index("```") < prompt.index(findings_ledger.REPORTED_HEADER)  # After the code, off the cached prefix
+    assert "Line 9: `os.system` with an f-string" in prompt
+    assert second["systemMessage"].endswith("- Line 2: `run` has no docstring.")
+    assert "os.system" not in second["systemMessage"]
+
+    # Another session hasn't seen anything yet
+    third = code_suggestions_hook.review(dict(write, session_id="s2"))
+    assert "os.system" in third["systemMessage"]
+
+def test_prompt_carries_signatures_from_other_files(mock, monkeypatch, tmp_path):
+    monkeypatch.setattr(symbol_index, "SYMBOL_INDEX", True)
+    monkeypatch.setattr(code_suggestions_hook, "USE_SERVICE", "ollama")
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "shell.py").write_text("def quote_all(args, sep=' '):\n    return sep.join(args)\n")
+    code = "from shell import quote_all\n\ndef run(args):\n    return quote_all(args)\n"
+    assert code_suggestions_hook.review({"tool_name": "Write", "cwd": str(project),
+                                         "tool_input": {"file_path": "main.py", "content": code}})
+    prompt = mock.last_request["prompt"]
+    assert prompt.index("```") < prompt.index(symbol_index.SYMBOLS_HEADER)
+    assert "# shell.py\ndef quote_all(args, sep=' ')" in prompt
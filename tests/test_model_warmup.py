@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for model_warmup.py: residency records, warm-up and the SessionStart entry point.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import hook_http
+import hook_state
+import mock_llm_server
+import model_warmup
+import prompt_budget
+
+MODEL = "codellama:7b"
+
+@pytest.fixture
+def mock(tmp_path, monkeypatch):
+    server = mock_llm_server.start(load_time=0.2)
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(model_warmup, "WARMUP_ENABLED", True)
+    yield server
+    server.shutdown()
+    hook_http.close_all()
+
+@pytest.fixture
+def spawned(monkeypatch):
+    """Record warm-up processes instead of starting them."""
+    calls = []
+    monkeypatch.setattr(model_warmup.subprocess, "Popen", lambda args, **kwargs: calls.append(args))
+    return calls
+
+@pytest.mark.parametrize("service", ["ollama", "lm_studio"])
+def test_warm_loads_the_model_and_records_it(mock, service):
+    assert model_warmup.warm(service, MODEL, mock.url)
+    record = model_warmup.get_record(service)
+    assert record["state"] == model_warmup.RESIDENT
+    assert record["load_seconds"] >= 0.2
+    assert record["expires"] > time.time() + model_warmup.KEEP_ALIVE - 5
+    assert mock.last_request[{"ollama": "keep_alive", "lm_studio": "ttl"}[service]] == model_warmup.KEEP_ALIVE
+    assert model_warmup.ready(service, MODEL, mock.url)
+
+def test_ollama_warmup_loads_the_context_size_reviews_ask_for(mock):
+    # A different num_ctx would make Ollama reload the model on the first review
+    model_warmup.warm("ollama", MODEL, mock.url)
+    assert mock.last_request["options"]["num_ctx"] == prompt_budget.context_window(MODEL)
+
+def test_cold_model_is_warmed_once_and_skipped_meanwhile(mock, spawned):
+    assert not model_warmup.ready("ollama", MODEL, mock.url)
+    assert spawned and spawned[0][-4:] == ["--warm", "ollama", MODEL, mock.url]
+    assert model_warmup.get_record("ollama")["state"] == model_warmup.LOADING
+
+    # Later reviews don't ask the backend or start a second load while it is loading
+    assert not model_warmup.ready("ollama", MODEL, mock.url)
+    assert len(spawned) == 1 and mock.requests == 0
+
+    model_warmup.warm("ollama", MODEL, mock.url)
+    assert model_warmup.ready("ollama", MODEL, mock.url)
+
+def test_model_loaded_elsewhere_is_found_without_a_warmup(mock, spawned):
+    mock.loaded.add(MODEL)
+    assert model_warmup.ready("lm_studio", MODEL, mock.url)
+    assert model_warmup.get_record("lm_studio")["state"] == model_warmup.RESIDENT
+    assert not spawned and mock.requests == 0
+
+def test_unknown_residency_never_skips_a_review(mock, spawned):
+    assert model_warmup.ready("ollama", MODEL, "http://127.0.0.1:9")  # Nothing listening
+    assert not spawned
+
+def test_session_start_hook_returns_at_once_and_warms_in_the_background(mock, tmp_path):
+    env = dict(os.environ, CODE_HOOK_SERVICE="ollama", OLLAMA_HOST=mock.url, OLLAMA_MODEL=MODEL,
+               CODE_HOOK_STATE_DIR=str(tmp_path), CODE_HOOK_WARMUP="1")
+    mock.load_time = 1.0
+    started = time.monotonic()
+    result = subprocess.run([sys.executable, os.path.join(REPO_DIR, "model_warmup.py")],
+                            input=json.dumps({"session_id": "s1", "hook_event_name": "SessionStart"}),
+                            capture_output=True, text=True, env=env, timeout=30)
+    assert result.returncode == 0
+    assert time.monotonic() - started < 1.0  # Didn't wait for the load
+
+    deadline = time.monotonic() + 10
+    while model_warmup.get_record("ollama").get("state") != model_warmup.RESIDENT:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert MODEL in mock.loaded
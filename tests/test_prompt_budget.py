@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests for prompt_budget.py: local token estimates and priority-based trimming.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import prompt_budget
+
+SOURCE = "import os\n\n" + "\n".join(
+    f"def helper_{i}(value):\n    total = value * {i}\n    total += offset(value)\n"
+    f"    total -= correction(total)\n    log_value(total)\n    return total\n" for i in range(60)
+)
+
+def test_estimate_grows_with_text():
+    assert prompt_budget.estimate_tokens("") == 0
+    assert 0 < prompt_budget.estimate_tokens("x = 1") < prompt_budget.estimate_tokens("x = 1\n" * 10)
+
+def test_content_that_fits_is_untouched():
+    assert prompt_budget.fit_to_budget(SOURCE, 10 ** 6) == SOURCE
+
+def test_trimming_keeps_changed_lines_then_signatures():
+    lines = SOURCE.split("\n")
+    changed_line = lines.index("    total = value * 30")
+    budget = prompt_budget.estimate_tokens(SOURCE) // 2
+    fitted = prompt_budget.fit_to_budget(SOURCE, budget, changed=[(changed_line, changed_line)])
+
+    assert prompt_budget.estimate_tokens(fitted) <= budget
+    assert "    total = value * 30" in fitted
+    assert "import os" in fitted
+    assert "def helper_59(value):" in fitted
+    assert "lines omitted" in fitted
+
+def test_build_prompt_respects_context_window(monkeypatch):
+    monkeypatch.setattr(prompt_budget, "CONTEXT_TOKENS", 600)
+    prompt = prompt_budget.build_prompt("File: {file_name}\n{code}", SOURCE, "a.py", "any-model", 100)
+    assert prompt.startswith("File: a.py\n")
+    assert prompt_budget.estimate_tokens(prompt) <= 600 - 100
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for review_cache.py: keys, hits, expiry and LRU eviction.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import review_cache
+
+def use_cache_dir(monkeypatch, tmp_path, **limits):
+    monkeypatch.setattr(review_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(review_cache, "CACHE_ENABLED", True)
+    monkeypatch.setattr(review_cache, "EVICT_INTERVAL", 0)
+    for name, value in limits.items():
+        monkeypatch.setattr(review_cache, name, value)
+
+def test_key_ignores_whitespace_noise_but_not_model():
+    a = review_cache.cache_key("x = 1  \r\ny = 2\n", "a.py", "ollama", "m1", "1")
+    b = review_cache.cache_key("x = 1\ny = 2", "a.py", "ollama", "m1", "1")
+    c = review_cache.cache_key("x = 1\ny = 2", "a.py", "ollama", "m2", "1")
+    assert a == b
+    assert a != c
+
+def test_hit_and_expiry(monkeypatch, tmp_path):
+    use_cache_dir(monkeypatch, tmp_path)
+    key = review_cache.cache_key("print(1)", "a.py", "ollama", "m", "1")
+    assert review_cache.get(key) is None
+
+    review_cache.put(key, "- use logging")
+    assert review_cache.get(key) == "- use logging"
+
+    monkeypatch.setattr(review_cache, "CACHE_MAX_AGE", -1)
+    assert review_cache.get(key) is None
+
+def test_evicts_least_recently_used(monkeypatch, tmp_path):
+    use_cache_dir(monkeypatch, tmp_path, CACHE_MAX_BYTES=10 ** 9)
+    keys = [review_cache.cache_key(str(i), "a.py", "s", "m", "1") for i in range(3)]
+    for i, key in enumerate(keys):
+        review_cache.put(key, "x" * 100)
+        os.utime(review_cache._entry_path(key), (time.time() - 100 + i, time.time() - 100 + i))
+
+    review_cache.get(keys[0])  # Touch the oldest so it becomes most recently used
+    total = sum(os.path.getsize(review_cache._entry_path(key)) for key in keys)
+    monkeypatch.setattr(review_cache, "CACHE_MAX_BYTES", total - 1)
+    review_cache.evict()
+
+    assert review_cache.get(keys[0]) is not None
+    assert review_cache.get(keys[1]) is None
+    assert review_cache.get(keys[2]) is not None
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for review_chunks.py and findings.py: splitting large files and merging chunk reviews.
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import findings
+import review_chunks
+
+PYTHON_SOURCE = "\n\n".join(
+    f"@decorator\ndef func_{i}(x):\n    return x + {i}\n" for i in range(40)
+)
+
+def test_small_file_is_one_chunk():
+    assert review_chunks.split_chunks("x = 1\n", "a.py", 100) == ["x = 1\n"]
+
+def test_python_chunks_break_at_top_level_definitions():
+    chunks = review_chunks.split_chunks(PYTHON_SOURCE, "a.py", 300)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        body = chunk.split("\n", 1)[1]
+        assert body.lstrip().startswith("@decorator")
+        assert body.count("@decorator") == body.count("def func_")
+
+def test_heuristic_chunks_for_other_languages():
+    source = "\n".join(f"function f{i}() {{\n  return {i};\n}}\n" for i in range(50))
+    chunks = review_chunks.split_chunks(source, "a.js", 200)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.split("\n", 1)[1].startswith("function f")
+
+def test_chunks_are_reviewed_concurrently_in_order():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_review(chunk):
+        with lock:
+            active.append(chunk)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(chunk)
+        return chunk.upper()
+
+    results = review_chunks.review_in_parallel(["a", "b", "c", "d"], slow_review, max_workers=2)
+    assert results == ["A", "B", "C", "D"]
+    assert max(peak) == 2
+
+def test_merge_drops_repeated_findings():
+    merged = findings.merge_findings([
+        "- SQL injection in get_user (line 4)\n- Missing zero check",
+        "1. SQL injection in get_user (line 19)\n2. Unbounded recursion in countdown",
+    ])
+    assert merged.splitlines() == [
+        "- SQL injection in get_user (line 4)",
+        "- Missing zero check",
+        "2. Unbounded recursion in countdown",
+    ]
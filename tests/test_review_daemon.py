@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for review_daemon.py and review_client.py over a Unix socket.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+import pytest
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_DIR)
+
+import code_suggestions_hook
+import review_client
+import review_daemon
+import review_scheduler
+
+PAYLOAD = {"session_id": "s1", "tool_name": "Write", "hook_event_name": "PostToolUse",
+           "tool_input": {"file_path": "/tmp/app.py", "content": "x = 1\n"}}
+
+@pytest.fixture
+def socket_dir():
+    # Unix socket paths are limited to ~100 bytes, so not under pytest's tmp_path
+    path = tempfile.mkdtemp(prefix="hoc-", dir="/tmp")
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+@pytest.fixture
+def daemon(socket_dir, monkeypatch):
+    seen = []
+    monkeypatch.setattr(code_suggestions_hook, "review",
+                        lambda input_data: seen.append(input_data) or {"continue": True, "systemMessage": "reviewed"})
+    path = os.path.join(socket_dir, "daemon.sock")
+    server = review_daemon.ReviewServer(path, review_daemon.ReviewHandler)
+    server.scheduler = review_scheduler.FairScheduler(1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(review_client, "SOCKET_PATH", path)
+    monkeypatch.setattr(review_client, "DAEMON_ADDR", "")
+    yield seen
+    server.shutdown()
+    server.server_close()
+
+def test_client_round_trip_through_the_daemon(daemon):
+    reply = review_client.ask_daemon(json.dumps(PAYLOAD).encode("utf-8"))
+    assert json.loads(reply) == {"continue": True, "systemMessage": "reviewed"}
+    assert daemon[0]["tool_input"] == PAYLOAD["tool_input"] and "remote_client" not in daemon[0]
+    assert review_daemon.socket_in_use(review_client.SOCKET_PATH)
+
+def test_client_reviews_in_process_without_a_daemon(socket_dir, monkeypatch):
+    monkeypatch.setattr(review_client, "SOCKET_PATH", os.path.join(socket_dir, "missing.sock"))
+    monkeypatch.setattr(review_client, "DAEMON_ADDR", "")
+    assert review_client.ask_daemon(b"{}") is None
+
+    # End to end: the static checks answer even though no backend is reachable either
+    code = "import os\n\ndef run(cmd):\n    os.system(f'echo {cmd}')\n"
+    payload = dict(PAYLOAD, tool_input={"file_path": "/tmp/run_cmd.py", "content": code})
+    env = dict(os.environ, CODE_HOOK_SOCKET=os.path.join(socket_dir, "missing.sock"), CODE_HOOK_SERVICE="ollama",
+               OLLAMA_HOST="http://127.0.0.1:9", CODE_HOOK_STATE_DIR=socket_dir, CODE_HOOK_WARMUP="0")
+    env.pop("CODE_HOOK_DAEMON_ADDR", None)
+    result = subprocess.run([sys.executable, os.path.join(REPO_DIR, "review_client.py")], input=json.dumps(payload),
+                            capture_output=True, text=True, env=env, timeout=30)
+    assert result.returncode == 0
+    assert "os.system" in json.loads(result.stdout)["systemMessage"]
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Tests for review_hedge.py: hedged requests take the first usable answer.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import review_hedge
+
+def answer_after(seconds, value, started=None):
+    def call():
+        if started is not None:
+            started.append(time.monotonic())
+        time.sleep(seconds)
+        return value
+    return call
+
+def test_fast_primary_never_fires_the_secondary():
+    started = []
+    name, value = review_hedge.first_result(
+        [("primary", answer_after(0.01, "p")), ("secondary", answer_after(0.01, "s", started))], delay=0.5)
+    assert (name, value) == ("primary", "p")
+    assert started == []
+
+def test_slow_primary_is_hedged_after_delay():
+    t0 = time.monotonic()
+    name, value = review_hedge.first_result(
+        [("primary", answer_after(2, "p")), ("secondary", answer_after(0.05, "s"))], delay=0.1)
+    assert (name, value) == ("secondary", "s")
+    assert time.monotonic() - t0 < 1
+
+def test_failed_primary_fires_secondary_immediately():
+    started = []
+    t0 = time.monotonic()
+    name, value = review_hedge.first_result(
+        [("primary", answer_after(0, None)), ("secondary", answer_after(0, "s", started))], delay=5)
+    assert (name, value) == ("secondary", "s")
+    assert started[0] - t0 < 1
+
+def test_all_failing_returns_nothing():
+    assert review_hedge.first_result(
+        [("a", answer_after(0, None)), ("b", answer_after(0, ""))], delay=0) == (None, None)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for review_queue.py: deferred reviews are delivered on the next hook call of the same session.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import code_suggestions_hook
+import hook_state
+import review_queue
+
+def run_inline(input_data, job, delay):
+    """Runs deferred jobs immediately, like a worker that finished before the next edit."""
+    job()
+
+def test_results_arrive_with_next_invocation(monkeypatch, tmp_path):
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(review_queue, "DEFERRED", True)
+    monkeypatch.setattr(review_queue, "_runner", run_inline)
+    monkeypatch.setattr(review_queue, "DEBOUNCE_MS", 0)
+    monkeypatch.setattr(code_suggestions_hook, "review_file",
+                        lambda data: f"Code suggestions for {data['tool_input']['file_path']}")
+
+    def edit(session_id, file_path):
+        return code_suggestions_hook.review({
+            "session_id": session_id,
+            "tool_name": "Write",
+            "tool_input": {"file_path": file_path, "content": "x = 1"},
+        })
+
+    assert edit("s1", "a.py") is None  # Queued, nothing finished yet
+    assert edit("s2", "b.py") is None  # Another session doesn't see s1's results
+
+    output = edit("s1", "c.py")
+    assert output["systemMessage"] == "Code suggestions for a.py"
+
+    output = edit("s1", "d.txt")  # Non-code files still deliver pending results
+    assert output["systemMessage"] == "Code suggestions for c.py"
+    assert edit("s1", "e.txt") is None
+
+def test_rapid_edits_to_one_file_are_coalesced(monkeypatch, tmp_path):
+    held = []  # Jobs still in their quiet period
+    reviewed = []
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(review_queue, "_runner", lambda input_data, job, delay: held.append(job))
+    monkeypatch.setattr(review_queue, "DEBOUNCE_MS", 0)
+    monkeypatch.setattr(code_suggestions_hook, "review_file",
+                        lambda data: reviewed.append(data["tool_input"]["content"]) or "review")
+
+    for version in range(5):
+        review_queue.enqueue({
+            "session_id": "s1",
+            "cwd": str(tmp_path),
+            "tool_name": "Write",
+            "tool_input": {"file_path": "a.py", "content": f"v{version}"},
+        })
+    for job in held:
+        job()
+
+    assert reviewed == ["v4"]
+    assert review_queue.collect_results("s1") == ["review"]
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for review_scheduler.py and the team daemon's use of it.
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import code_suggestions_hook
+import review_daemon
+import review_scheduler
+
+def order(scheduler):
+    """Drain `scheduler` (built without workers) and return the jobs in the order they would run."""
+    picked = []
+    with scheduler._cond:
+        job = scheduler._next_job()
+        while job is not None:
+            picked.append(job)
+            job = scheduler._next_job()
+    return picked
+
+def test_heavy_tenant_cannot_starve_a_light_one():
+    scheduler = review_scheduler.FairScheduler(0, quantum=16, weights={})
+    for i in range(6):
+        scheduler.submit("alice", lambda: None, cost=16, key=f"a{i}")
+    scheduler.submit("bob", lambda: None, cost=4, key="b0")
+    scheduler.submit("bob", lambda: None, cost=4, key="b1")
+    tenants = [job.tenant for job in order(scheduler)]
+    assert tenants[:4] == ["alice", "bob", "bob", "alice"]  # Bob's small jobs both fit in one turn
+    assert tenants.count("alice") == 6
+
+def test_weights_and_size_set_the_share():
+    scheduler = review_scheduler.FairScheduler(0, quantum=10, weights={"ci": 0.5})
+    for i in range(4):
+        scheduler.submit("ci", lambda: None, cost=10, key=f"c{i}")
+        scheduler.submit("dev", lambda: None, cost=10, key=f"d{i}")
+    tenants = [job.tenant for job in order(scheduler)][:6]
+    assert tenants.count("dev") == 4 and tenants.count("ci") == 2
+
+def test_newest_edit_first_and_stale_ones_superseded():
+    scheduler = review_scheduler.FairScheduler(0)
+    old = scheduler.submit("alice", lambda: None, key="s1|/src/app.py")
+    other = scheduler.submit("alice", lambda: None, key="s1|/src/util.py")
+    new = scheduler.submit("alice", lambda: None, key="s1|/src/app.py")
+    assert old.status == review_scheduler.SUPERSEDED and old.wait(0) is None
+    assert order(scheduler) == [new, other]
+    assert scheduler.counts[review_scheduler.SUPERSEDED] == 1
+
+def test_backlog_waits_for_live_jobs_and_expired_jobs_are_dropped():
+    scheduler = review_scheduler.FairScheduler(0)
+    deferred = scheduler.submit("deferred", lambda: None, backlog=True)
+    late = scheduler.submit("alice", lambda: None, deadline=time.monotonic() - 1)
+    live = scheduler.submit("bob", lambda: None)
+    assert live.depth == 2
+    assert order(scheduler) == [live, deferred]
+    assert late.status == review_scheduler.EXPIRED
+
+def test_backlog_takes_turns_per_tenant():
+    scheduler = review_scheduler.FairScheduler(0, quantum=16, weights={})
+    for i in range(5):
+        scheduler.submit("alice", lambda: None, cost=16, backlog=True)
+    scheduler.submit("bob", lambda: None, cost=16, backlog=True)
+    assert [job.tenant for job in order(scheduler)][:2] == ["alice", "bob"]
+
+def test_debouncing_jobs_hold_no_worker():
+    scheduler = review_scheduler.FairScheduler(4)
+    later = time.monotonic() + 0.5
+    deferred = [scheduler.submit("alice", lambda: "late", backlog=True, not_before=later) for _ in range(4)]
+    started = time.monotonic()
+    assert scheduler.submit("bob", lambda: "now").wait(5) == "now"
+    assert time.monotonic() - started < 0.3  # Didn't wait behind the debounce
+    assert deferred[0].status == review_scheduler.QUEUED
+    assert deferred[0].wait(5) == "late" and time.monotonic() >= later
+
+def test_workers_run_jobs_and_record_the_wait():
+    scheduler = review_scheduler.FairScheduler(1)
+    release = threading.Event()
+    blocker = scheduler.submit("alice", release.wait)
+    queued = scheduler.submit("bob", lambda: "reviewed")
+    time.sleep(0.1)
+    assert scheduler.depth() == 1
+    release.set()
+    assert queued.wait(5) == "reviewed"
+    assert blocker.status == queued.status == review_scheduler.DONE
+    assert queued.waited >= 0.1
+
+    stuck = review_scheduler.FairScheduler(0).submit("carol", lambda: "never")
+    assert stuck.wait(0.01) is None and stuck.status == review_scheduler.QUEUED
+
+@pytest.fixture
+def team_daemon(monkeypatch):
+    monkeypatch.setattr(review_daemon, "DAEMON_TOKEN", "s3cret")
+    seen = []
+    monkeypatch.setattr(code_suggestions_hook, "review",
+                        lambda input_data: seen.append(input_data) or {"continue": True, "systemMessage": "ok"})
+    server = review_daemon.TeamReviewServer(("127.0.0.1", 0), review_daemon.ReviewHandler)
+    server.scheduler = review_scheduler.FairScheduler(1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, seen
+    server.shutdown()
+    server.server_close()
+
+def ask(server, request, token="s3cret"):
+    with socket.create_connection(server.server_address, timeout=5) as sock:
+        sock.sendall(token.encode("utf-8") + b"\n" + json.dumps(request).encode("utf-8"))
+        sock.shutdown(socket.SHUT_WR)
+        return sock.makefile("rb").read()
+
+def test_team_daemon_requires_the_token_and_the_edited_file(team_daemon):
+    server, seen = team_daemon
+    write = {"tool_name": "Write", "tool_input": {"file_path": "app.py", "content": "x = 1\n"}, "tenant": "alice"}
+    assert ask(server, write, token="wrong") == b""
+    assert ask(server, {"tool_name": "Edit", "tool_input": {"file_path": "/etc/passwd"}}) == b""
+    assert not seen
+
+    assert json.loads(ask(server, dict(write, remote_client=None)))["systemMessage"] == "ok"
+    assert review_daemon.tenant_of(seen[0]) == "alice"
+    assert seen[0]["remote_client"] == "alice"  # Set by the daemon whatever the client sent
+
+def test_team_daemon_drops_strangers_and_stalled_clients_unread(team_daemon, monkeypatch):
+    server, seen = team_daemon
+    monkeypatch.setattr(review_daemon, "REMOTE_TIMEOUT", 0.2)
+    with socket.create_connection(server.server_address, timeout=5) as sock:
+        sock.sendall(b"wrong\n{")  # The body never ends, but the token is checked first
+        assert sock.recv(1) == b""
+    with socket.create_connection(server.server_address, timeout=5) as sock:
+        sock.sendall(b"s3cret\n{")
+        started = time.monotonic()
+        assert sock.recv(1) == b""
+        assert time.monotonic() - started < 2
+    assert not seen
+
+def test_bare_port_listens_on_localhost_only():
+    assert review_daemon.listen_address("7878") == ("127.0.0.1", 7878)
+    assert review_daemon.listen_address("10.0.0.5:7878") == ("10.0.0.5", 7878)
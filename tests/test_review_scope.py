@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Tests for review_scope.py: diff-scoped excerpts for Edit and MultiEdit.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import review_scope
+
+CONTENT = "\n".join(f"line {i}" for i in range(1, 101))
+
+def test_edit_is_scoped_to_changed_lines_with_context():
+    text, scoped = review_scope.scope_content(
+        "Edit", {"old_string": "x", "new_string": "line 50\nline 51"}, CONTENT, context=2)
+    assert scoped
+    assert "... lines 48-53 ..." in text
+    assert "line 47" not in text.split("\n")
+    assert "line 54" not in text.split("\n")
+
+def test_multiedit_regions_are_merged():
+    edits = [{"new_string": "line 10\nline 11"}, {"new_string": "line 12"}, {"new_string": "line 90"}]
+    text, scoped = review_scope.scope_content("MultiEdit", {"edits": edits}, CONTENT, context=1)
+    assert scoped
+    assert "... lines 9-13 ..." in text
+    assert "... lines 89-91 ..." in text
+
+def test_falls_back_to_whole_file_when_region_missing():
+    text, scoped = review_scope.scope_content("Edit", {"new_string": "not in file"}, CONTENT)
+    assert not scoped
+    assert text == CONTENT
+
+def test_write_is_never_scoped():
+    text, scoped = review_scope.scope_content("Write", {"content": CONTENT}, CONTENT)
+    assert not scoped
+
+def test_ambiguous_new_string_falls_back_to_whole_file():
+    content = "def a():\n    return None\n" + "\n".join(f"x{i} = {i}" for i in range(60)) + "\ndef b():\n    return None\n"
+    edit = {"old_string": "    pass", "new_string": "    return None"}
+    assert review_scope.find_regions(content, "Edit", edit) is None
+    assert review_scope.scope_content("Edit", edit, content) == (content, False)
+    # With replace_all every copy was written by the edit
+    assert len(review_scope.find_regions(content, "Edit", dict(edit, replace_all=True))) == 2
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for review_similarity.py: near-duplicate content reuses the earlier review.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import hook_state
+import review_similarity
+
+CODE = "\n".join(f"def handler_{i}(request):\n    value = request.get('key_{i}')\n    return process(value, {i})\n"
+                 for i in range(30))
+
+def test_similarity_estimates():
+    one_line = CODE.replace("process(value, 7)", "process(value, 70)")
+    assert review_similarity.similarity(review_similarity.sketch(CODE), review_similarity.sketch(CODE)) == 1.0
+    assert review_similarity.similarity(review_similarity.sketch(CODE), review_similarity.sketch(one_line)) > 0.9
+    other = "class Cache:\n    def get(self, key):\n        return self.store[key]\n"
+    assert review_similarity.similarity(review_similarity.sketch(CODE), review_similarity.sketch(other)) < 0.2
+
+def test_patch_drops_findings_about_removed_code():
+    review = "- `pickle.load(f)` is unsafe\n- Missing zero check in `divide`"
+    assert review_similarity.patch_findings(review, "def divide(a, b): ...") == "- Missing zero check in `divide`"
+    assert review_similarity.patch_findings(review, "nothing relevant") is None
+
+def test_reuse_near_duplicate_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path))
+    path = str(tmp_path / "handlers.py")
+    review = "- `process(value, 3)` ignores errors"
+    assert review_similarity.reuse(path, CODE, "v") is None
+
+    review_similarity.remember(path, CODE, review, "v")
+    assert review_similarity.reuse(path, CODE.replace("key_20", "key_twenty"), "v") == review
+    assert review_similarity.reuse(path, CODE, "other model") is None
+    assert review_similarity.reuse(path, "print('rewritten')\n", "v") is None
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for review_stream.py: streamed replies stop once the answer is complete.
+"""
+
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import hook_http
+import review_stream
+
+def sse(pieces):
+    lines = [f"data: {json.dumps({'choices': [{'delta': {'content': p}}]})}" for p in pieces]
+    return [": keep-alive"] + lines + ["data: [DONE]"]
+
+def test_sse_and_ndjson_deltas():
+    assert "".join(review_stream.sse_deltas(sse(["a", "b"]))) == "ab"
+    lines = [json.dumps({"response": "x"}), "", json.dumps({"response": "y"}),
+             json.dumps({"response": "", "done": True})]
+    assert "".join(review_stream.ndjson_deltas(lines)) == "xy"
+
+def test_collect_stops_after_max_findings():
+    pulled = []
+
+    def deltas():
+        for piece in ["- one\n", "- two\n", "- three\n", "- four\n", "- five\n"]:
+            pulled.append(piece)
+            yield piece
+
+    assert review_stream.collect(deltas(), 2) == "- one\n- two"
+    assert len(pulled) == 3  # Stopped as soon as the third finding started
+
+def test_header_line_is_kept_but_not_counted():
+    text = "Critical issues found:\n- A\n- B\n- C\n"
+    assert review_stream.collect(iter(text), 3) == text.rstrip()
+    assert review_stream.collect(iter(text + "- D\n- E\n"), 3) == text.rstrip()
+    # Without bullets every paragraph is a finding
+    assert review_stream.collect(iter("A\n\nB\n\nC\n\nD\n"), 2) == "A\nB"
+
+def test_collect_stops_at_summary():
+    text = review_stream.collect(iter(["1. Bug\n2. Leak\n\n", "**Overall**, fine.\n", "more"]))
+    assert text == "1. Bug\n2. Leak"
+    # The summary is spotted before its first line is finished
+    text = review_stream.collect(iter(["- Bug\n", "Overall", ", fine", " and then ", "endless"]))
+    assert text == "- Bug"
+    assert review_stream.collect(iter(["Overallocation is a bug"])) == "Overallocation is a bug"
+
+def test_collect_keeps_everything_without_a_reason_to_stop():
+    assert review_stream.collect(iter(["- only ", "finding"]), 3) == "- only finding"
+
+class _StreamHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    sent = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i in range(1, 50):
+                line = sse([f"- issue {i}\n"])[1] + "\n\n"
+                data = line.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+                type(self).sent.append(i)
+                time.sleep(0.02)
+            self.wfile.write(b"0\r\n\r\n")
+        except OSError:
+            pass  # The client hung up early, as intended
+
+    def log_message(self, *args):
+        pass
+
+def test_stream_closes_connection_early():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _StreamHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+        with hook_http.post_json_stream(url, {"stream": True}, timeout=5) as response:
+            result = review_stream.reader(review_stream.SSE, 3)(response)
+        assert result.text == "- issue 1\n- issue 2\n- issue 3"
+        time.sleep(0.3)
+        assert len(_StreamHandler.sent) < 10  # The server noticed and stopped generating
+    finally:
+        server.shutdown()
+        hook_http.close_all()
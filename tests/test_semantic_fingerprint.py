@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for semantic_fingerprint.py: formatting-only edits keep their fingerprint.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import hook_state
+import semantic_fingerprint
+
+PYTHON = '''import sys
+import os
+
+def add(a, b):
+    """Add two numbers."""
+    return a + b
+'''
+
+def fp(content, path="m.py"):
+    return semantic_fingerprint.fingerprint(content, path)
+
+def test_python_formatting_comments_docstrings_and_import_order_are_ignored():
+    reformatted = '''import os
+import sys
+
+
+def add(a,  b):  # sum
+    """Return the sum of a and b."""
+    # no overflow in Python
+    return (a + b)
+'''
+    assert fp(PYTHON) == fp(reformatted)
+
+def test_python_behaviour_change_is_detected():
+    assert fp(PYTHON) != fp(PYTHON.replace("a + b", "a - b"))
+    assert fp(PYTHON) != fp(PYTHON.replace('"""Add two numbers."""', 'print("Add two numbers.")'))
+
+def test_other_languages_use_the_token_stream():
+    js = 'function f(a) {\n  return a + "// not a comment";\n}\n'
+    assert fp(js, "f.js") == fp('// helper\nfunction f( a ){ return a+"// not a comment"; }\n', "f.js")
+    assert fp(js, "f.js") != fp(js.replace("// not a comment", "changed"), "f.js")
+    assert fp("echo hi  # greet\n", "run.sh") == fp("echo hi\n", "run.sh")
+
+def test_remembered_fingerprint_per_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path))
+    path = str(tmp_path / "m.py")
+    assert not semantic_fingerprint.is_unchanged(path, fp(PYTHON))
+    semantic_fingerprint.remember(path, fp(PYTHON))
+    assert semantic_fingerprint.is_unchanged(path, fp(PYTHON))
+    assert not semantic_fingerprint.is_unchanged(str(tmp_path / "other.py"), fp(PYTHON))
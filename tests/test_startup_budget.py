@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Startup budget for the hook's fast-reject path.
+
+Events the hook ignores must not pay for the review machinery: no heavy
+imports, and only a few milliseconds on top of a bare interpreter.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import fast_reject
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_BUDGET_MS = float(os.getenv("CODE_HOOK_STARTUP_BUDGET_MS", "25"))  # on top of `python -c pass`
+HEAVY_MODULES = ("http.client", "ssl", "concurrent.futures", "json", "pathlib")
+
+READ_EVENT = json.dumps({"tool_name": "Read", "tool_input": {"file_path": "/tmp/app.py"}})
+DOC_EVENT = json.dumps({"tool_name": "Write", "tool_input": {"file_path": "/tmp/README.md", "content": "# hi"}})
+
+def run(args, stdin=""):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, input=stdin, capture_output=True, text=True, cwd=REPO_DIR,
+                            env=dict(os.environ, CODE_HOOK_DEFERRED="0"))
+    return time.perf_counter() - started, result
+
+def test_not_interested_decisions(monkeypatch):
+    assert fast_reject.not_interested(READ_EVENT)
+    assert fast_reject.not_interested(DOC_EVENT)
+    assert not fast_reject.not_interested(json.dumps({"tool_name": "Edit", "tool_input": {"file_path": "/a/b.py"}}))
+    # Anything unusual goes to the full hook
+    assert not fast_reject.not_interested("not json")
+    assert not fast_reject.not_interested(json.dumps({"tool_name": "Write", "tool_input": {"file_path": "/tmp/é\".md"}}))
+    # Deferred mode hands over finished reviews on any code-tool event
+    monkeypatch.setenv("CODE_HOOK_DEFERRED", "1")
+    assert not fast_reject.not_interested(DOC_EVENT)
+    assert fast_reject.not_interested(READ_EVENT)
+
+def test_fast_path_skips_heavy_imports():
+    for event in (READ_EVENT, DOC_EVENT):
+        _, result = run(["-X", "importtime", "code_suggestions_hook.py"], event)
+        assert result.returncode == 0 and result.stdout == ""
+        imported = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if "|" in line}
+        assert not imported.intersection(HEAVY_MODULES)
+
+def test_fast_path_startup_budget():
+    # Best of several runs, so a busy machine doesn't fail the build
+    baseline = min(run(["-c", "pass"])[0] for _ in range(5))
+    hook = min(run(["code_suggestions_hook.py"], READ_EVENT)[0] for _ in range(5))
+    overhead_ms = (hook - baseline) * 1000
+    assert overhead_ms < STARTUP_BUDGET_MS, f"fast path costs {overhead_ms:.1f}ms over a bare interpreter"
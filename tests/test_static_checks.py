@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for static_checks.py: local findings for the issues models report most.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import static_checks
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def read(name):
+    with open(os.path.join(HERE, name), encoding="utf-8") as f:
+        return f.read()
+
+def test_finds_the_usual_python_issues():
+    found = dict(static_checks.analyze(read("test_grok.py"), "test_grok.py"))
+    assert "pickle.load()" in found[7]
+    assert "os.system()" in found[11]
+    assert "SQL" in found[20]
+    assert "countdown()" in found[26]
+
+def test_sql_and_secret_in_bad_security_example():
+    found = dict(static_checks.analyze(read("examples/bad_security.py"), "bad_security.py"))
+    assert "SQL" in found[7]
+    assert "os.system()" in found[19]
+    assert "API_KEY" in found[22]
+
+def test_clean_code_has_no_findings():
+    assert static_checks.analyze(read("examples/production_ready.py"), "production_ready.py") == []
+    code = "def fact(n):\n    if n <= 1:\n        return 1\n    return n * fact(n - 1)\n"
+    assert static_checks.analyze(code, "fact.py") == []
+
+def test_patterns_for_other_languages():
+    code = 'el.innerHTML = input;\nconst q = "SELECT * FROM users WHERE id = " + id;\n// el.innerHTML = x;\n'
+    assert [line for line, _ in static_checks.analyze(code, "app.js")] == [1, 2]
+
+def test_findings_limited_to_changed_regions():
+    found = static_checks.analyze(read("test_grok.py"), "test_grok.py", regions=[(9, 11)])
+    assert [line for line, _ in found] == [11]
+
+def test_policy(monkeypatch):
+    monkeypatch.setattr(static_checks, "POLICY", "augment")
+    assert not static_checks.skip_backend("x = 1\n", [])
+
+    monkeypatch.setattr(static_checks, "POLICY", "skip-trivial")
+    assert static_checks.skip_backend("x = 1\n# note\n", [])
+    assert not static_checks.skip_backend("a = 1\nb = 2\nc = 3\nd = 4\n", [])
+
+    monkeypatch.setattr(static_checks, "POLICY", "skip-clean")
+    assert static_checks.skip_backend("a = 1\nb = 2\nc = 3\nd = 4\n", [])
+    assert not static_checks.skip_backend("a = 1\nb = 2\nc = 3\nd = 4\n", [(1, "issue")])
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for symbol_index.py.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import hook_state
+import symbol_index
+
+DB = '''
+import sqlite3
+
+class Session(Base):
+    timeout: float
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+
+    def query(self, sql, params=()) -> list:
+        return self.conn.execute(sql, params).fetchall()
+
+    def _reset(self):
+        pass
+
+def connect(path, *, readonly=False):
+    return Session(path)
+'''
+
+APP = '''from db import connect
+
+def main():
+    session = connect("app.db", readonly=True)
+    return session.query("select 1")
+'''
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr(hook_state, "STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setattr(symbol_index, "SYMBOL_INDEX", True)
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "db.py").write_text(DB)
+    (root / "app.py").write_text(APP)
+    return root
+
+def test_python_symbols_keep_signatures_members_and_imports():
+    symbols, imports = symbol_index.python_symbols(DB)
+    assert [s["sig"] for s in symbols] == ["class Session(Base):", "def connect(path, *, readonly=False)"]
+    assert [m["sig"] for m in symbols[0]["members"]] == [
+        "timeout: float", "def __init__(self, path)", "def query(self, sql, params=()) -> list"]
+    assert imports == {"sqlite3": "sqlite3"}
+
+def test_pattern_symbols_for_other_languages():
+    symbols, _ = symbol_index.pattern_symbols(
+        "export async function load(id: string): Promise<User> {\n"
+        "const render = (props) => null;\n"
+        "func (s *Server) Serve(addr string) error {\n")
+    assert [s["name"] for s in symbols] == ["load", "render", "Serve"]
+    assert symbols[0]["sig"] == "export async function load(id: string): Promise<User>"
+
+def test_context_lists_only_what_the_code_uses_from_imported_modules(project):
+    note = symbol_index.context(str(project), str(project / "app.py"), APP, APP)
+    assert note.startswith("\n\n" + symbol_index.SYMBOLS_HEADER)
+    assert "# db.py\ndef connect(path, *, readonly=False)" in note
+    assert "def query(self, sql, params=()) -> list  # member of Session" in note
+    assert "_reset" not in note and "def main" not in note
+
+    # db.py was indexed on demand; its digest tells prompts apart
+    assert symbol_index.digest(note) and symbol_index.digest("") == ""
+    assert symbol_index.context(str(project), str(project / "app.py"), APP, "x = 1") == ""
+
+def test_edits_and_deletions_refresh_the_index(project, monkeypatch):
+    other = project / "pkg" / "util.py"
+    other.parent.mkdir()
+    other.write_text("def helper(a, b):\n    return a\n")
+    symbol_index.update(str(project), str(other), other.read_text())
+    code = "def run():\n    return helper(1, 2)\n"
+    assert "pkg/util.py\ndef helper(a, b)" in symbol_index.context(
+        str(project), str(project / "pkg" / "run.py"), code, code)
+
+    # Changed on disk behind the hook's back: parsed again
+    other.write_text("def helper(a, b, c=None):\n    return a\n")
+    os.utime(other, (1, 1))
+    assert "def helper(a, b, c=None)" in symbol_index.context(
+        str(project), str(project / "pkg" / "run.py"), code, code)
+
+    other.unlink()
+    assert symbol_index.context(str(project), str(project / "pkg" / "run.py"), code, code) == ""
+
+def test_excerpt_review_sees_the_rest_of_its_own_file(project):
+    content = "def parse(text, strict=False):\n    return text\n\n\ndef run(text):\n    return parse(text)\n"
+    excerpt = "def run(text):\n    return parse(text)\n"
+    path = str(project / "tool.py")
+    assert "def parse(text, strict=False)" in symbol_index.context(str(project), path, content, excerpt, scoped=True)
+    assert symbol_index.context(str(project), path, content, content) == ""
+
+def test_prompt_stays_within_its_budget(project, monkeypatch):
+    monkeypatch.setattr(symbol_index, "PROMPT_CHARS", 60)
+    note = symbol_index.context(str(project), str(project / "app.py"), APP, APP)
+    assert "def connect" in note and "member of Session" not in note
+
+def test_remote_client_never_reads_the_daemons_disk(project):
+    # The same path exists here, but a remote client's review must not see it
+    assert symbol_index.context(str(project), str(project / "app.py"), APP, APP, client="alice") == ""
+
+    symbol_index.update(str(project), str(project / "db.py"), DB, client="alice")
+    note = symbol_index.context(str(project), str(project / "app.py"), APP, APP, client="alice")
+    assert "def connect(path, *, readonly=False)" in note
+    assert symbol_index.context(str(project), str(project / "app.py"), APP, APP, client="bob") == ""
+
+def test_review_only_stats_the_files_it_uses(project, monkeypatch):
+    for i in range(20):
+        path = project / f"mod{i}.py"
+        path.write_text(f"def helper_{i}(x):\n    return x\n")
+        symbol_index.update(str(project), str(path), path.read_text())
+    statted = []
+    real_mtime = symbol_index._mtime
+    monkeypatch.setattr(symbol_index, "_mtime", lambda path: statted.append(path) or real_mtime(path))
+    code = "def run():\n    return helper_3(1)\n"
+    assert "def helper_3(x)" in symbol_index.context(str(project), str(project / "run.py"), code, code)
+    assert statted == [str(project / "mod3.py")]
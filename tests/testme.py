@@ -11,6 +11,10 @@ import tempfile
 import os
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import backend_health
+
 # Colors for output
 RED = '\033[91m'
 GREEN = '\033[92m'
@@ -215,51 +219,32 @@ def check_llm_connectivity():
         host = "http://172.30.50.42:1234"
         print(f"Testing LM Studio connection at {host}")
 
-        # Test LM Studio endpoint
-        try:
-            result = subprocess.run(
-                ['curl', '-s', f'{host}/v1/models'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                print_result(True, f"LM Studio is accessible at {host}")
-                try:
-                    models = json.loads(result.stdout)
-                    if 'data' in models and models['data']:
-                        print(f"{GREEN}Available models:{RESET}")
-                        for model in models['data'][:3]:  # Show first 3 models
-                            print(f"  - {model.get('id', 'unknown')}")
-                except:
-                    pass
-                return True
-            else:
-                print_result(False, f"LM Studio not accessible at {host}")
-                return False
-        except:
-            print_result(False, f"Could not connect to LM Studio at {host}")
+        # Test LM Studio endpoint (the same probe the hook's circuit breaker uses)
+        response = backend_health.probe(f'{host}/v1/models', timeout=5)
+        if response is not None:
+            print_result(True, f"LM Studio is accessible at {host}")
+            try:
+                models = response.json()
+                if 'data' in models and models['data']:
+                    print(f"{GREEN}Available models:{RESET}")
+                    for model in models['data'][:3]:  # Show first 3 models
+                        print(f"  - {model.get('id', 'unknown')}")
+            except:
+                pass
+            return True
+        else:
+            print_result(False, f"LM Studio not accessible at {host}")
             return False
     else:
         host = "http://localhost:11434"
         print(f"Testing Ollama connection at {host}")
 
         # Test Ollama endpoint
-        try:
-            result = subprocess.run(
-                ['curl', '-s', f'{host}/api/tags'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                print_result(True, f"Ollama is accessible at {host}")
-                return True
-            else:
-                print_result(False, f"Ollama not accessible at {host}")
-                return False
-        except:
-            print_result(False, f"Could not connect to Ollama at {host}")
+        if backend_health.probe(f'{host}/api/tags', timeout=5) is not None:
+            print_result(True, f"Ollama is accessible at {host}")
+            return True
+        else:
+            print_result(False, f"Ollama not accessible at {host}")
             return False
 
 def main():